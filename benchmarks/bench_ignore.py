@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+FileSage Ignore Matcher Benchmark
+Compares the legacy substring check with the compiled matcher as the pattern count grows
+
+Usage: python benchmarks/bench_ignore.py [--paths 50000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from scanner.ignore import IgnoreMatcher
+
+def legacy_should_ignore(path: str, ignore_patterns: List[str]) -> bool:
+    """The original O(patterns) substring test"""
+    for pattern in ignore_patterns:
+        if pattern in path:
+            return True
+    return False
+
+def make_patterns(count: int, rng: random.Random, wildcards_only: bool = False) -> List[str]:
+    """A realistic .gitignore mix: mostly names and extensions, some anchored paths and globs.
+
+    ``wildcards_only`` keeps just the slash-free globs with a leading or inner
+    ``*``, which cannot be answered from a hash table.
+    """
+    patterns: List[str] = []
+    for i in range(count):
+        kind = i % 20 if not wildcards_only else 15 + i % 5
+        if kind < 8:
+            patterns.append(f"name_{i}")
+        elif kind < 13:
+            patterns.append(f"*.ext{i}")
+        elif kind < 14:
+            patterns.append(f"/top_{i}/sub_{i}")
+        elif kind < 15:
+            patterns.append(f"build_{i}/**/*.o{i}")
+        elif kind < 17:
+            patterns.append(f"*tmp{i}*")
+        elif kind < 18:
+            patterns.append(f"cache_*_{i}")
+        elif kind < 19:
+            patterns.append(f"*_{i}.bak")
+        else:
+            patterns.append(f"*log{i}?.txt")
+    rng.shuffle(patterns)
+    return patterns
+
+def make_paths(count: int, rng: random.Random) -> List[str]:
+    paths: List[str] = []
+    for _ in range(count):
+        depth = rng.randint(1, 6)
+        parts = [f"dir{rng.randint(0, 50)}" for _ in range(depth - 1)]
+        name = rng.choice(("file{}.ext{}", "tmp{}_{}.swp", "cache_{}_{}", "run_{}_{}.bak", "log{}{}.txt"))
+        parts.append(name.format(rng.randint(0, 1000), rng.randint(0, 2000)))
+        paths.append("/".join(parts))
+    return paths
+
+def time_per_call(fn, paths: List[str]) -> float:
+    start = time.perf_counter()
+    for path in paths:
+        fn(path)
+    return (time.perf_counter() - start) / len(paths) * 1e9
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paths", type=int, default=50000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    paths = make_paths(args.paths, rng)
+
+    for title, wildcards_only in (("Mixed patterns", False), ("Leading and inner wildcards only", True)):
+        print(f"\n{title}")
+        print(f"{'patterns':>9} | {'legacy ns/path':>15} | {'compiled ns/path':>17} | {'compile ms':>10}")
+        print("-" * 62)
+        for count in (10, 50, 100, 250, 500, 1000, 2000):
+            patterns = make_patterns(count, rng, wildcards_only)
+            start = time.perf_counter()
+            matcher = IgnoreMatcher.from_patterns(patterns)
+            compile_ms = (time.perf_counter() - start) * 1000
+
+            legacy = time_per_call(lambda p: legacy_should_ignore(p, patterns), paths)
+            compiled = time_per_call(lambda p: matcher.matches(p, False), paths)
+            print(f"{count:>9} | {legacy:>15.0f} | {compiled:>17.0f} | {compile_ms:>10.1f}")
+
+if __name__ == "__main__":
+    main()
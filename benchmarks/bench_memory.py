@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+FileSage Scan Memory Benchmark
+Compares the dict-based walk_directory structure with CompactScan for synthetic scans
+
+Usage: python benchmarks/bench_memory.py [--files 1000000] [--files-per-dir 50]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Iterator, Tuple, TypeVar
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from scanner.compact import CompactScan
+from scanner.walker import DirectoryEntry
+
+T = TypeVar("T")
+
+NAMES = ["__init__.py", "main.py", "utils.py", "README.md", "config.yaml", "test_core.py", "index.js", "data.json"]
+TAG_SETS = [[], ["#documentation"], ["#config", "#workflow"], ["#validation_asset"], ["#composite_action"]]
+
+def iter_synthetic_structure(file_count: int, files_per_dir: int, seed: int = 7) -> Iterator[DirectoryEntry]:
+    """Yield walk_directory-shaped entries one folder at a time, without touching the disk"""
+    rng = random.Random(seed)
+    now = datetime.now().timestamp()
+    made = 0
+    dir_index = 0
+    while made < file_count:
+        count = min(files_per_dir, file_count - made)
+        yield {
+            "path": f"pkg{dir_index // 100}/module{dir_index}",
+            "folders": [],
+            "files": [{
+                "name": f"{i}_{rng.choice(NAMES)}" if i % 3 else rng.choice(NAMES),
+                "size": rng.randint(0, 200000),
+                "modified": datetime.fromtimestamp(now - rng.randint(0, 10 ** 8)),
+                "tags": list(rng.choice(TAG_SETS))
+            } for i in range(count)],
+            "tags": []
+        }
+        made += count
+        dir_index += 1
+
+def measure(build: Callable[[], T]) -> Tuple[T, int]:
+    """Return the built object and the bytes it still holds once built"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=200000)
+    parser.add_argument("--files-per-dir", type=int, default=50)
+    args = parser.parse_args()
+
+    # Each side is built from its own freshly generated entries so neither shares strings with the other
+    structure, dict_bytes = measure(lambda: list(iter_synthetic_structure(args.files, args.files_per_dir)))
+    del structure
+    compact, compact_bytes = measure(
+        lambda: CompactScan.from_structure(iter_synthetic_structure(args.files, args.files_per_dir)))
+
+    print(f"📦 Files scanned:       {args.files:,} in {len(compact):,} folders")
+    print(f"🧱 Dict structure:      {dict_bytes / 2 ** 20:8.1f} MB ({dict_bytes / args.files:6.0f} B/file)")
+    print(f"🗜️  CompactScan:         {compact_bytes / 2 ** 20:8.1f} MB ({compact_bytes / args.files:6.0f} B/file)")
+    print(f"✨ Reduction:           {dict_bytes / max(compact_bytes, 1):8.1f}x")
+
+if __name__ == "__main__":
+    main()
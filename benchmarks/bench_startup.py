@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+FileSage Startup Benchmark
+Measures CLI start-up cost: wall time of fresh interpreters and the slowest imports per python -X importtime
+
+Usage: python benchmarks/bench_startup.py [--runs 20] [--top 15]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# (label, python arguments) run from the repository root
+SCENARIOS: List[Tuple[str, List[str]]] = [
+    ("interpreter only", ["-c", "pass"]),
+    ("import main", ["-c", "import main"]),
+    ("main.py --help", ["main.py", "--help"]),
+    ("import + load_settings", ["-c", "from scanner.settings import load_settings; load_settings()"]),
+]
+
+def wall_times(args: List[str], runs: int) -> List[float]:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+def import_times(args: List[str]) -> Dict[str, Tuple[int, int]]:
+    """module -> (self µs, cumulative µs) from one -X importtime run"""
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True, check=True)
+    modules: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list for `import main`")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<24} | {'median ms':>9} | {'min ms':>7}")
+    print("-" * 47)
+    for label, command in SCENARIOS:
+        times = wall_times(command, args.runs)
+        print(f"{label:<24} | {statistics.median(times):>9.1f} | {min(times):>7.1f}")
+
+    modules = import_times(["-c", "import main"])
+    print(f"\nSlowest imports under `import main` (cumulative, of {len(modules)} modules):")
+    ranked = sorted(modules.items(), key=lambda item: -item[1][1])
+    for name, (self_us, cumulative_us) in ranked[:args.top]:
+        print(f"  {cumulative_us / 1000:>7.2f} ms  (self {self_us / 1000:>5.2f})  {name}")
+    heavy = [name for name in ("yaml", "multiprocessing", "concurrent.futures", "cProfile", "ctypes") if name in modules]
+    print(f"\nHeavy modules imported eagerly: {', '.join(heavy) if heavy else 'none'}")
+
+if __name__ == "__main__":
+    main()
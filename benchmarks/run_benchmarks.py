@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+FileSage Pipeline Benchmark Suite
+Times and measures memory for each pipeline stage on synthetic trees of 10k, 100k and 1M files
+
+Usage: python benchmarks/run_benchmarks.py [--scales 10k,100k,1m] [--layout balanced]
+       [--output results.json] [--compare baseline.json] [--threshold 0.15]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic_tree import LAYOUTS, TreeShape, ensure_tree
+from scanner.edwardizer import edwardize
+from scanner.interpreter import interpret_structure
+from scanner.walker import walk_directory
+from writer.markdown_writer import write_markdown
+
+RESULTS_VERSION = 1
+STAGES = ["walk_directory", "interpret_structure", "edwardize", "write_markdown"]
+DEFAULT_TREE_ROOT = os.path.join(tempfile.gettempdir(), "filesage_bench_trees")
+# Stages faster than this are too noisy to flag as time regressions
+MIN_COMPARABLE_SECONDS = 0.05
+
+def parse_scale(text: str) -> int:
+    text = text.strip().lower()
+    multiplier = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * multiplier)
+
+def scale_label(files: int) -> str:
+    if files % 1000000 == 0:
+        return f"{files // 1000000}m"
+    if files % 1000 == 0:
+        return f"{files // 1000}k"
+    return str(files)
+
+def run_pipeline(tree: str, output_path: str, measure: Callable[[str, Callable[[], Any]], Any]) -> None:
+    """Run every stage in order, handing each stage's result to the next"""
+    random.seed(7)  # edwardize picks comments at random
+    structure = measure("walk_directory", lambda: walk_directory(tree))
+    interpreted = measure("interpret_structure", lambda: interpret_structure(structure))
+    cosmic = measure("edwardize", lambda: edwardize(interpreted))
+    measure("write_markdown", lambda: write_markdown(cosmic, output_path))
+
+def time_stages(tree: str, output_path: str) -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+
+    def measure(stage: str, run: Callable[[], Any]) -> Any:
+        gc.collect()
+        started = time.perf_counter()
+        result = run()
+        timings[stage] = time.perf_counter() - started
+        return result
+
+    run_pipeline(tree, output_path, measure)
+    return timings
+
+def memory_stages(tree: str, output_path: str) -> Dict[str, Tuple[int, int]]:
+    """Peak and retained traced bytes per stage (a separate pass, since tracing slows everything down)"""
+    memory: Dict[str, Tuple[int, int]] = {}
+
+    def measure(stage: str, run: Callable[[], Any]) -> Any:
+        gc.collect()
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = run()
+        current, peak = tracemalloc.get_traced_memory()
+        memory[stage] = (peak - before, current - before)
+        return result
+
+    tracemalloc.start()
+    try:
+        run_pipeline(tree, output_path, measure)
+    finally:
+        tracemalloc.stop()
+    return memory
+
+def benchmark_scale(shape: TreeShape, layout: str, tree_root: str, with_memory: bool) -> Dict[str, Any]:
+    started = time.perf_counter()
+    tree, info = ensure_tree(tree_root, shape)
+    print(f"🌱 {scale_label(shape.files)} tree ready: {info['files']:,} files in {info['folders']:,} folders "
+          f"({time.perf_counter() - started:.1f}s)")
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        output_path = os.path.join(out_dir, "report.md")
+        timings = time_stages(tree, output_path)
+        report_bytes = os.path.getsize(output_path)
+        memory = memory_stages(tree, output_path) if with_memory else {}
+
+    stages: Dict[str, Dict[str, Any]] = {}
+    for stage in STAGES:
+        seconds = timings[stage]
+        stages[stage] = {
+            "seconds": round(seconds, 4),
+            "files_per_second": round(info["files"] / seconds) if seconds else None
+        }
+        if stage in memory:
+            peak, retained = memory[stage]
+            stages[stage]["peak_mb"] = round(peak / 2 ** 20, 2)
+            stages[stage]["retained_mb"] = round(retained / 2 ** 20, 2)
+        print(f"   ⏱️  {stage:<20} {seconds:8.3f}s"
+              + (f"   peak {stages[stage]['peak_mb']:8.1f} MB" if stage in memory else ""))
+
+    return {
+        "scale": scale_label(shape.files),
+        "layout": layout,
+        "shape": shape._asdict(),
+        "files": info["files"],
+        "folders": info["folders"],
+        "report_bytes": report_bytes,
+        "stages": stages
+    }
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print stage-by-stage changes and return the regressions beyond ``threshold``"""
+    previous = {(r["scale"], r["layout"]): r for r in baseline.get("results", [])}
+    regressions: List[str] = []
+    print(f"\n📊 Comparison with {baseline.get('meta', {}).get('commit') or 'baseline'}")
+    for result in current["results"]:
+        old = previous.get((result["scale"], result["layout"]))
+        if old is None:
+            continue
+        for stage in STAGES:
+            new_stage, old_stage = result["stages"][stage], old["stages"].get(stage)
+            if not old_stage:
+                continue
+            for metric, floor in (("seconds", MIN_COMPARABLE_SECONDS), ("peak_mb", 1.0)):
+                if metric not in new_stage or metric not in old_stage or old_stage[metric] < floor:
+                    continue
+                change = new_stage[metric] / old_stage[metric] - 1
+                marker = "🔺" if change > threshold else ("🔻" if change < -threshold else "  ")
+                print(f"{marker} {result['scale']:>5} {stage:<20} {metric:<8} "
+                      f"{old_stage[metric]:10.3f} → {new_stage[metric]:10.3f} ({change:+.1%})")
+                if change > threshold:
+                    regressions.append(f"{result['scale']} {stage} {metric} {change:+.1%}")
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", default="10k,100k,1m", help="comma-separated file counts, e.g. 10k,100k,1m")
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="balanced")
+    parser.add_argument("--depth", type=int)
+    parser.add_argument("--fanout", type=int)
+    parser.add_argument("--files-per-dir", type=int)
+    parser.add_argument("--sizes", choices=["lognormal", "uniform", "fixed"], default="lognormal")
+    parser.add_argument("--tree-root", default=DEFAULT_TREE_ROOT, help="where generated trees are kept for reuse")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", default=os.path.join(REPO_ROOT, "output", "benchmarks",
+                                                         f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"))
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative slowdown counted as a regression")
+    args = parser.parse_args()
+
+    results = {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform()
+        },
+        "results": []
+    }
+    for scale in args.scales.split(","):
+        shape = TreeShape.for_layout(parse_scale(scale), args.layout, args.depth, args.fanout,
+                                     args.files_per_dir, args.sizes)
+        results["results"].append(benchmark_scale(shape, args.layout, args.tree_root, not args.no_memory))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✨ No regressions detected")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+FileSage Synthetic Tree Generator
+Builds reproducible directory trees of a chosen shape for benchmarking
+
+Usage: python benchmarks/synthetic_tree.py DEST [--files 10000] [--layout wide|deep|balanced]
+       [--depth N] [--fanout N] [--files-per-dir N] [--sizes lognormal|uniform|fixed] [--seed 7]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# depth, fanout and files per directory for each layout preset
+LAYOUTS: Dict[str, Tuple[int, int, int]] = {
+    "wide": (2, 200, 25),
+    "deep": (24, 2, 8),
+    "balanced": (6, 6, 20)
+}
+
+# Folder names that exercise the tag and archetype rules
+DIR_NAMES = ["src", "docs", "tests", "config", "utils", "data", "lib", "assets", "scripts", "module", "pkg", "tools"]
+FILE_NAMES = [
+    ("", ".py", 30), ("test_", ".py", 10), ("", ".md", 8), ("", ".json", 8), ("", ".yaml", 5),
+    ("", ".txt", 6), ("", ".js", 12), ("", ".pyc", 4), ("backup_", ".py", 2), ("helper_", ".py", 3),
+    ("", ".pdf", 2), ("", ".png", 8), ("", "", 2)
+]
+MARKER = ".filesage_synthetic.json"
+
+class TreeShape(NamedTuple):
+    files: int
+    depth: int
+    fanout: int
+    files_per_dir: int
+    sizes: str = "lognormal"
+    seed: int = 7
+
+    @classmethod
+    def for_layout(cls, files: int, layout: str = "balanced", depth: Optional[int] = None,
+                   fanout: Optional[int] = None, files_per_dir: Optional[int] = None,
+                   sizes: str = "lognormal", seed: int = 7) -> "TreeShape":
+        """Start from a layout preset and override any dimension"""
+        preset_depth, preset_fanout, preset_files = LAYOUTS[layout]
+        return cls(files, depth or preset_depth, fanout or preset_fanout, files_per_dir or preset_files, sizes, seed)
+
+    @property
+    def capacity(self) -> int:
+        """Folders available within depth and fanout"""
+        if self.fanout == 1:
+            return self.depth + 1
+        return (self.fanout ** (self.depth + 1) - 1) // (self.fanout - 1)
+
+    @property
+    def effective_files_per_dir(self) -> int:
+        """files_per_dir, raised when the tree shape cannot otherwise hold every file"""
+        return max(self.files_per_dir, math.ceil(self.files / max(1, self.capacity)))
+
+    @property
+    def key(self) -> str:
+        return f"{self.files}f-d{self.depth}-w{self.fanout}-p{self.files_per_dir}-{self.sizes}-s{self.seed}"
+
+def file_size(rng: random.Random, distribution: str) -> int:
+    if distribution == "fixed":
+        return 4096
+    if distribution == "uniform":
+        return rng.randint(0, 256 * 1024)
+    # Log-normal with a ~4KB median and a long tail of large files
+    return min(int(rng.lognormvariate(8.3, 1.8)), 512 * 1024 * 1024)
+
+def iter_layout(shape: TreeShape) -> Iterator[Tuple[str, int]]:
+    """Yield (relative folder path, file count) depth-first until every file is placed.
+
+    Depth-first order means a deep layout really produces long paths rather
+    than filling every shallow level first.
+    """
+    per_dir = shape.effective_files_per_dir
+    remaining = shape.files
+    stack: List[Tuple[str, int]] = [("", 0)]
+    while stack and remaining > 0:
+        folder, depth = stack.pop()
+        count = min(per_dir, remaining)
+        remaining -= count
+        yield folder, count
+        if depth < shape.depth:
+            for i in reversed(range(shape.fanout)):
+                name = f"{DIR_NAMES[i % len(DIR_NAMES)]}_{i}"
+                stack.append((os.path.join(folder, name) if folder else name, depth + 1))
+
+def generate_tree(dest: str, shape: TreeShape) -> Dict[str, Any]:
+    """Create the tree under ``dest`` and return its description.
+
+    Files are sparse (truncated to size without writing data) and get
+    spread-out modification times, so generation stays fast while sizes and
+    ages still exercise the chaos rules. A marker file records the shape so
+    an existing tree can be reused.
+    """
+    rng = random.Random(shape.seed)
+    now = time.time()
+    folders = files = total_size = 0
+    weights = [weight for _, _, weight in FILE_NAMES]
+
+    for rel_dir, count in iter_layout(shape):
+        abs_dir = os.path.join(dest, rel_dir)
+        os.makedirs(abs_dir, exist_ok=True)
+        folders += 1
+        for i in range(count):
+            prefix, ext, _ = rng.choices(FILE_NAMES, weights)[0]
+            path = os.path.join(abs_dir, f"{prefix}file_{i}{ext}")
+            size = file_size(rng, shape.sizes)
+            with open(path, "wb") as f:
+                f.truncate(size)
+            mtime = now - rng.randint(0, 3 * 365 * 86400)
+            os.utime(path, (mtime, mtime))
+            files += 1
+            total_size += size
+
+    info = {"shape": shape._asdict(), "folders": folders, "files": files, "total_size": total_size}
+    with open(os.path.join(dest, MARKER), "w", encoding="utf-8") as f:
+        json.dump(info, f)
+    return info
+
+def ensure_tree(root: str, shape: TreeShape) -> Tuple[str, Dict[str, Any]]:
+    """Return a tree for ``shape`` under ``root``, generating it only when missing"""
+    dest = os.path.join(root, shape.key)
+    try:
+        with open(os.path.join(dest, MARKER), encoding="utf-8") as f:
+            return dest, json.load(f)
+    except (OSError, ValueError):
+        pass
+    return dest, generate_tree(dest, shape)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("dest")
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="balanced")
+    parser.add_argument("--depth", type=int)
+    parser.add_argument("--fanout", type=int)
+    parser.add_argument("--files-per-dir", type=int)
+    parser.add_argument("--sizes", choices=["lognormal", "uniform", "fixed"], default="lognormal")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    shape = TreeShape.for_layout(args.files, args.layout, args.depth, args.fanout, args.files_per_dir,
+                                 args.sizes, args.seed)
+    started = time.perf_counter()
+    info = generate_tree(args.dest, shape)
+    print(f"🌱 Generated {info['files']:,} files in {info['folders']:,} folders "
+          f"under {args.dest} ({time.perf_counter() - started:.1f}s)")
+
+if __name__ == "__main__":
+    main()
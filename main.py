@@ -1,24 +1,330 @@
-import os
-from scanner.walker import walk_directory
-from scanner.interpreter import interpret_structure
-from scanner.edwardizer import edwardize
-from writer.markdown_writer import write_markdown
-
-def main():
-    target_dir = input("Which directory shall I explore?\n> ").strip()
-    if not os.path.isdir(target_dir):
-        print("That path is not a valid directory. Try again.")
-        return
-
-    raw_structure = walk_directory(target_dir)
-    interpreted = interpret_structure(raw_structure)
-    cosmic_structure = edwardize(interpreted)
-
-    project_name = os.path.basename(os.path.abspath(target_dir))
-    output_path = os.path.join("output", f"{project_name}_structure.md")
-    write_markdown(cosmic_structure, output_path)
-
-    print(f"\n* Structure report generated: {output_path}")
-
-if __name__ == "__main__":
-    main()
+import argparse
+import os
+import sys
+import time
+from scanner.settings import SETTINGS_CHOICES, load_settings
+from writer.batch_summary import RootResult, report_paths
+
+OUTPUT_FORMATS = {"markdown": ".md", "ndjson": ".ndjson"}
+
+# Everything else is imported where it is used, so `main.py --help`, a plain
+# scan and a batch each pay only for the modules they need.
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="FileSage — map directories into cosmic structure reports")
+    parser.add_argument("directories", nargs="*",
+                        help="directories to explore (prompted for when omitted)")
+    parser.add_argument("--roots-file", metavar="FILE",
+                        help="file listing directories to explore, one per line ('#' starts a comment)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="roots scanned at once in a batch (default: CPU count)")
+    parser.add_argument("-o", "--output-dir", default="output",
+                        help="where reports and the scan cache are written (default: output); "
+                             "the index and snapshots keep their own paths")
+    parser.add_argument("-f", "--format", choices=sorted(OUTPUT_FORMATS), default=None,
+                        help="report format: human-readable markdown or NDJSON records for tools "
+                             "(default: output_format setting)")
+    parser.add_argument("--engine", choices=SETTINGS_CHOICES["scan_engine"], default=None,
+                        help="traversal engine: os.walk, threaded os.scandir, asyncio for network mounts or a "
+                             "process pool (default: scan_engine setting)")
+    parser.add_argument("--index", action="store_true",
+                        help="also store the scan in the SQLite index (see: main.py query --help)")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="also save a path-sorted snapshot for later diffs (see: main.py diff --help)")
+    parser.add_argument("--sample", type=float, default=None, metavar="FRACTION",
+                        help="estimate from a random FRACTION of subfolders per level (default: sample_fraction "
+                             "setting)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="random seed for --sample, for reproducible estimates (default: sample_seed setting)")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and refresh the report as folders change")
+    parser.add_argument("--debounce", type=float, default=None,
+                        help="seconds of quiet before a refresh in --watch mode (default: watch_debounce setting)")
+    parser.add_argument("--poll", action="store_true",
+                        help="in --watch mode, poll for changes instead of using inotify")
+    args = parser.parse_args(argv)
+    if args.roots_file:
+        try:
+            args.directories += read_roots_file(args.roots_file)
+        except OSError as e:
+            parser.error(f"cannot read --roots-file: {e}")
+    if args.watch and len(args.directories) > 1:
+        parser.error("--watch takes a single directory")
+    if args.watch and args.format == "ndjson":
+        parser.error("--watch writes a markdown report")
+    if args.sample is not None and not 0 < args.sample <= 1:
+        parser.error("--sample takes a fraction in (0, 1]")
+    if args.watch and args.sample is not None:
+        parser.error("--watch reports the whole tree; --sample cannot be combined with it")
+    if args.watch and args.engine is not None:
+        parser.error("--watch rescans changed folders itself; --engine cannot be combined with it")
+    return args
+
+def read_roots_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return [line for line in lines if line]
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "query":
+        # Answered from the scan index alone; nothing is scanned
+        from scanner.index_db import main as query_main
+        return query_main(argv[1:])
+    if argv and argv[0] == "diff":
+        from writer.diff_writer import main as diff_main
+        return diff_main(argv[1:])
+
+    args = parse_args(argv)
+    output_format = args.format or ("markdown" if args.watch else load_settings().get("output_format", "markdown"))
+    if len(args.directories) > 1:
+        results = run_batch(args.directories, args.output_dir, args.jobs, output_format, args.index,
+                            args.snapshot, args.sample, args.seed, args.engine)
+        return 1 if any(not result.ok for result in results) else 0
+
+    target_dir = args.directories[0] if args.directories else input("Which directory shall I explore?\n> ").strip()
+    if not os.path.isdir(target_dir):
+        print("That path is not a valid directory. Try again.")
+        return 1
+    output_path = report_paths([target_dir], args.output_dir, OUTPUT_FORMATS[output_format])[0]
+
+    if args.watch:
+        from scanner.watcher import DEFAULT_DEBOUNCE
+        settings = load_settings()
+        debounce = args.debounce if args.debounce is not None else settings.get("watch_debounce", DEFAULT_DEBOUNCE)
+        watch(target_dir, output_path, settings, content_options_from(settings), debounce,
+              use_inotify=False if args.poll else None)
+        return 0
+
+    scan_root(target_dir, output_path, output_format=output_format, index=args.index, snapshot=args.snapshot,
+              sample=args.sample, seed=args.seed, engine=args.engine)
+    return 0
+
+def content_options_from(settings):
+    if not settings.get("content_analysis", False):
+        return None
+    from scanner.content import DEFAULT_CONTENT_BYTES, DEFAULT_SKIP_ABOVE
+    return {
+        "workers": settings.get("content_workers"),
+        "max_bytes": settings.get("content_max_bytes", DEFAULT_CONTENT_BYTES),
+        "skip_above": settings.get("content_skip_above", DEFAULT_SKIP_ABOVE)
+    }
+
+def scan_root(target_dir, output_path, verbose=True, output_format="markdown", index=False, snapshot=False,
+              sample=None, seed=None, engine=None):
+    """Scan one directory and write its report, returning a RootResult"""
+    from scanner.walker import walk_directory, iter_directory
+    from scanner.interpreter import interpret_structure, iter_interpret
+    from scanner.edwardizer import edwardize, iter_edwardize
+    from scanner.metrics import METRICS, profiled, sidecar_path
+    from writer.markdown_writer import write_markdown, write_markdown_stream
+    started = time.perf_counter()
+    settings = load_settings()
+    index = index or settings.get("scan_index", False)
+    snapshot = snapshot or settings.get("scan_snapshot", False)
+    engine = engine or settings.get("scan_engine", "walk")
+    # Caches live beside the report, so -o DIR keeps each output tree's caches apart
+    cache_dir = os.path.join(os.path.dirname(output_path) or ".", ".filesage_cache")
+    cache = None
+    if settings.get("scan_cache", False) and engine in ("async", "process"):
+        print(f"! scan_cache only works with the walk and scandir engines; scanning {target_dir} "
+              f"with {engine} and no cache", file=sys.stderr)
+    elif settings.get("scan_cache", False):
+        from scanner.scan_cache import ScanCache
+        # Cached file stats miss in-place edits; the index and snapshots must record current sizes and mtimes
+        cache = ScanCache(target_dir, cache_dir, restat=index or snapshot)
+        cache.load()
+
+    if settings.get("metrics", False):
+        METRICS.enable()
+    profile_path = sidecar_path(output_path, ".prof") if settings.get("profile", False) else None
+
+    dedup = None
+    if settings.get("find_duplicates", False):
+        from scanner.dedup import DuplicateFinder, DEFAULT_DEDUP_WORKERS
+        dedup = DuplicateFinder(target_dir, settings.get("dedup_workers", DEFAULT_DEDUP_WORKERS))
+    content_options = content_options_from(settings)
+    fragments = None
+    if settings.get("fragment_cache", False):
+        from writer.fragment_cache import FragmentCache
+        fragments = FragmentCache(target_dir, cache_dir)
+        fragments.load()
+
+    sample = sample if sample is not None else settings.get("sample_fraction")
+    estimate = None
+    # The process engine scores chaos in its workers too, unless content analysis must run in between
+    processes = engine == "process"
+    fused = processes and content_options is None and not sample
+
+    with profiled(profile_path):
+        # A sample is small and its estimates need every sampled folder first, so it never streams
+        streaming = settings.get("streaming", False) and not sample
+        if streaming and fused:
+            from scanner.process_walker import interpret_directory
+            cosmic_structure = iter_edwardize(interpret_directory(target_dir))
+        elif streaming:
+            # Each folder flows walker → interpreter → edwardizer → writer as soon as it is scanned
+            entries = iter_directory(target_dir, engine, cache=cache)
+            if content_options is not None:
+                from scanner.content import iter_analyze_content
+                entries = iter_analyze_content(entries, target_dir, **content_options)
+            cosmic_structure = iter_edwardize(iter_interpret(entries))
+        elif fused:
+            from scanner.process_walker import interpret_directory
+            cosmic_structure = edwardize(list(interpret_directory(target_dir)))
+        else:
+            if sample:
+                from scanner.sampling import sample_directory
+                raw_structure, design = sample_directory(
+                    target_dir, sample, seed if seed is not None else settings.get("sample_seed", 0),
+                    settings.get("sample_max_files"), settings.get("sample_max_seconds"))
+            else:
+                raw_structure = walk_directory(target_dir, engine, cache=cache)
+            if content_options is not None:
+                from scanner.content import analyze_content
+                raw_structure = analyze_content(raw_structure, target_dir, **content_options)
+            interpreted = interpret_structure(raw_structure, settings.get("scan_processes") if processes else None)
+            cosmic_structure = edwardize(interpreted)
+            if sample:
+                from scanner.sampling import estimate_totals
+                estimate = estimate_totals(cosmic_structure, design)
+
+        index_writer = None
+        # A sample is not the tree: it is neither indexed nor snapshotted
+        if index and estimate is None:
+            from scanner.index_db import DEFAULT_INDEX_PATH, IndexWriter
+            index_writer = IndexWriter(target_dir, settings.get("scan_index_path") or DEFAULT_INDEX_PATH)
+            # Rows are recorded as each folder reaches the writer; the scan becomes current once all are in
+            cosmic_structure = index_writer.track(cosmic_structure)
+        snapshot_writer = None
+        if snapshot and estimate is None:
+            from scanner.snapshot import DEFAULT_SNAPSHOT_DIR, SnapshotWriter, snapshot_path
+            snapshot_writer = SnapshotWriter(
+                target_dir, snapshot_path(target_dir, settings.get("snapshot_dir") or DEFAULT_SNAPSHOT_DIR))
+            cosmic_structure = snapshot_writer.track(cosmic_structure)
+        if not streaming and (index_writer or snapshot_writer):
+            cosmic_structure = list(cosmic_structure)
+
+        if output_format == "ndjson":
+            from writer.ndjson_writer import write_ndjson
+            stats = write_ndjson(cosmic_structure, output_path, records=settings.get("ndjson_records", "folder"),
+                                 dedup=dedup, estimate=estimate)
+            totals = (stats.total_folders, stats.total_files, stats.total_size)
+        elif settings.get("output_mode", "single") == "sharded":
+            from writer.sharded_writer import write_markdown_sharded
+            pages = write_markdown_sharded(
+                cosmic_structure, output_path,
+                shard_by=settings.get("shard_by", "top_level"),
+                folders_per_page=settings.get("shard_folders_per_page", 500),
+                max_files_per_folder=settings.get("max_files_per_folder", 200),
+                dedup=dedup,
+                fragments=fragments,
+                estimate=estimate
+            )
+            totals = (sum(page["folders"] for page in pages), sum(page["files"] for page in pages),
+                      sum(page["size"] for page in pages))
+            if verbose:
+                print(f"\n* Report split across {len(pages)} pages")
+        else:
+            if streaming:
+                stats = write_markdown_stream(cosmic_structure, output_path, dedup=dedup, fragments=fragments)
+            else:
+                stats = write_markdown(cosmic_structure, output_path, dedup=dedup, fragments=fragments,
+                                       estimate=estimate)
+            totals = (stats.total_folders, stats.total_files, stats.total_size)
+
+    if cache is not None:
+        cache.save()
+    if fragments is not None:
+        fragments.save()
+
+    if verbose:
+        print(f"\n* Structure {'records' if output_format == 'ndjson' else 'report'} generated: {output_path}")
+    if METRICS.enabled:
+        metrics_path = sidecar_path(output_path, ".metrics.json")
+        METRICS.write_json(metrics_path)
+        if verbose:
+            print(f"* Stage metrics written: {metrics_path}")
+    if estimate is not None and verbose:
+        print(f"* Sampled {estimate.sampled_folders} folders: ≈{estimate.files.value:,.0f} files "
+              f"(±{estimate.files.margin:,.0f}) estimated"
+              + (f"; stopped at the {estimate.budget_hit} budget" if estimate.budget_hit else ""))
+    if index_writer is not None and verbose:
+        print(f"* Indexed {index_writer.files_written} files into {index_writer.path} (query with: main.py query)")
+    if snapshot_writer is not None and verbose:
+        print(f"* Snapshot saved: {snapshot_writer.path} (compare with: main.py diff --root {target_dir})")
+    if profile_path and verbose:
+        print(f"* Profile written: {profile_path} (inspect with python -m pstats)")
+    return RootResult(target_dir, output_path, *totals, seconds=time.perf_counter() - started)
+
+def scan_root_safely(target_dir, output_path, output_format="markdown", index=False, snapshot=False,
+                     sample=None, seed=None, engine=None):
+    """Batch worker: a failing root becomes a RootResult carrying the error instead of an exception"""
+    if not os.path.isdir(target_dir):
+        return RootResult(target_dir, output_path, error="not a directory")
+    try:
+        return scan_root(target_dir, output_path, verbose=False, output_format=output_format, index=index,
+                         snapshot=snapshot, sample=sample, seed=seed, engine=engine)
+    except Exception as e:
+        return RootResult(target_dir, output_path, error=f"{type(e).__name__}: {e}")
+
+def run_batch(roots, output_dir="output", jobs=None, output_format="markdown", index=False, snapshot=False,
+              sample=None, seed=None, engine=None):
+    """Scan many roots concurrently on a process pool, then write the combined summary"""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from writer.batch_summary import write_batch_summary
+    output_paths = report_paths(roots, output_dir, OUTPUT_FORMATS[output_format])
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(roots)))
+    results = [None] * len(roots)
+    print(f"🌌 Scanning {len(roots)} roots with {jobs} worker{'s' if jobs != 1 else ''}")
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(scan_root_safely, root, path, output_format, index, snapshot, sample, seed,
+                               engine): position
+                   for position, (root, path) in enumerate(zip(roots, output_paths))}
+        for future in as_completed(futures):
+            position = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # The worker itself died (e.g. BrokenProcessPool)
+                result = RootResult(roots[position], output_paths[position], error=f"{type(e).__name__}: {e}")
+            results[position] = result
+            if result.ok:
+                print(f"* {result.root}: {result.files} files → {result.output_path} ({result.seconds:.2f}s)")
+            else:
+                print(f"! {result.root}: {result.error}")
+
+    summary_path = os.path.join(output_dir, "batch_summary.md")
+    write_batch_summary(results, summary_path)
+    failed = sum(1 for result in results if not result.ok)
+    print(f"\n* Batch summary written: {summary_path}" + (f" ({failed} failed)" if failed else ""))
+    return results
+
+def watch(target_dir, output_path, settings, content_options, debounce, use_inotify=None):
+    """Write the report, then re-render only the folders that change until interrupted"""
+    from scanner.watcher import create_watcher, wait_for_changes
+    from writer.live_report import LiveReport
+    report = LiveReport(target_dir, output_path, settings, content_options)
+    report.build()
+    report.write()
+    print(f"\n* Structure report generated: {output_path}")
+
+    watcher = create_watcher(target_dir, report.folders(), use_inotify)
+    print(f"🔭 Watching {len(report.order)} folders via {type(watcher).__name__} (Ctrl+C to stop)")
+    try:
+        while True:
+            changed = wait_for_changes(watcher, debounce)
+            added, removed = report.refresh(changed)
+            watcher.update(added, removed)
+            if report.rendered or removed:
+                sections = report.rendered
+                report.write()
+                print(f"* Refreshed {sections} folder section{'s' if sections != 1 else ''} "
+                      f"({len(added)} new, {len(removed)} gone)")
+    except KeyboardInterrupt:
+        print("\n🌙 Watch ended.")
+    finally:
+        watcher.close()
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,2 +1,2 @@
-# FileSage Scanner Module
-# Handles directory traversal and structural analysis
+# FileSage Scanner Module
+# Handles directory traversal and structural analysis
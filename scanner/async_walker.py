@@ -0,0 +1,206 @@
+# FileSage Async Walker
+# Keeps many listings and stats in flight at once for FUSE and network mounts
+import asyncio
+import os
+from typing import (Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Set, Tuple, TypeVar,
+                    TYPE_CHECKING)
+
+from .ignore import IgnoreMatcher
+from .rules import TagRules
+from .walker import DirectoryEntry, DirectoryListing, ScanResult, _join_rel, build_entry, filter_listing, \
+    list_directory
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+# Requests in flight across the whole scan, and against any one mount
+DEFAULT_SCAN_CONCURRENCY = 64
+DEFAULT_MOUNT_CONCURRENCY = 16
+MOUNTS_TABLE = "/proc/self/mounts"
+# Entries iter_async lets the walker get ahead of a slow consumer
+ASYNC_RESULT_BUFFER = 256
+_HANDOVER_POLL = 0.01
+
+_T = TypeVar("_T")
+
+class FileSystem:
+    """The blocking calls the async walker makes; swap it out to scan through another layer"""
+
+    def list_directory(self, abs_dir: str) -> Optional[DirectoryListing]:
+        """``(name, is_symlink)`` folders and file names, or None when the folder cannot be listed"""
+        listed = list_directory(abs_dir)
+        return listed[0] if listed is not None else None
+
+    def stat(self, path: str) -> Optional[Tuple[int, float]]:
+        """``(size, mtime)``, or None when the file cannot be stat'ed"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime
+
+    def mount_points(self) -> Set[str]:
+        """Absolute mount points, used to give each mount its own concurrency limit"""
+        try:
+            with open(MOUNTS_TABLE, "r", encoding="utf-8", errors="replace") as f:
+                # Spaces and other specials in mount points are octal-escaped, e.g. \\040
+                return {_unescape_mount(line.split()[1]) for line in f if len(line.split()) > 1}
+        except OSError:
+            return set()
+
+def _unescape_mount(field: str) -> str:
+    if "\\" not in field:
+        return field
+    return field.encode("latin-1", "backslashreplace").decode("unicode_escape")
+
+def mount_of(path: str, mount_points: Set[str]) -> str:
+    """The mount point holding ``path``: its longest mount-point prefix ("/" when none match)"""
+    path = os.path.abspath(path)
+    while True:
+        if path in mount_points:
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return path
+        path = parent
+
+class AsyncWalker:
+    """Scans a tree with asyncio, running each listing and stat on a bounded thread pool.
+
+    At most ``concurrency`` calls are in flight overall and at most
+    ``mount_concurrency`` against a single mount, so one slow mount cannot
+    take every slot. Folders are scheduled as soon as their parent is
+    listed and a folder's files are stat'ed concurrently, while entries are
+    still produced in ``os.walk`` order.
+    """
+
+    def __init__(self, root: str, matcher: IgnoreMatcher, rules: Optional[TagRules] = None,
+                 concurrency: int = DEFAULT_SCAN_CONCURRENCY, mount_concurrency: int = DEFAULT_MOUNT_CONCURRENCY,
+                 fs: Optional[FileSystem] = None):
+        # Absolute, so folders compare equal to the absolute mount points
+        self.root = os.path.abspath(root)
+        self.matcher = matcher
+        self.rules = rules
+        self.concurrency = max(1, concurrency)
+        self.mount_concurrency = max(1, min(mount_concurrency, self.concurrency))
+        self.fs = fs or FileSystem()
+        self._mount_points: Set[str] = set()
+        self._mount_limits: Dict[str, asyncio.Semaphore] = {}
+        self._total_limit: Optional[asyncio.Semaphore] = None
+        self._executor: Optional["ThreadPoolExecutor"] = None
+
+    async def _call(self, mount: str, fn: Callable[..., _T], *args: Any) -> _T:
+        limit = self._mount_limits.get(mount)
+        if limit is None:
+            limit = self._mount_limits[mount] = asyncio.Semaphore(self.mount_concurrency)
+        # Mount first: a call queued behind a busy mount must not hold one of the shared slots
+        async with limit, self._total_limit:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _scan(self, rel_root: str, matcher: IgnoreMatcher, mount: str) -> Optional[Tuple[ScanResult, str]]:
+        abs_dir = self.root if rel_root == '.' else os.path.join(self.root, rel_root)
+        if abs_dir in self._mount_points:
+            mount = abs_dir
+        listing = await self._call(mount, self.fs.list_directory, abs_dir)
+        if listing is None:
+            return None
+        if matcher.use_gitignore and ".gitignore" in listing["files"]:
+            matcher = await self._call(mount, matcher.for_directory, abs_dir, rel_root, listing["files"])
+        matcher, dirs, subdirs, files = filter_listing(rel_root, listing, matcher)
+        stats = await asyncio.gather(*(self._call(mount, self.fs.stat, os.path.join(abs_dir, file))
+                                       for file in files))
+        entry = build_entry(rel_root, dirs, files, dict(zip(files, stats)), self.rules)
+        return (entry, subdirs, matcher), mount
+
+    async def entries(self) -> AsyncIterator[DirectoryEntry]:
+        """Yield every folder's DirectoryEntry top-down, in os.walk order"""
+        from concurrent.futures import ThreadPoolExecutor
+        self._total_limit = asyncio.Semaphore(self.concurrency)
+        self._mount_points = self.fs.mount_points()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        root_mount = mount_of(self.root, self._mount_points)
+        pending = {'.': asyncio.ensure_future(self._scan('.', self.matcher, root_mount))}
+        try:
+            stack = ['.']
+            while stack:
+                rel_root = stack.pop()
+                scanned = await pending.pop(rel_root)
+                if scanned is None:
+                    continue
+                (entry, subdirs, child_matcher), mount = scanned
+                children = [_join_rel(rel_root, d) for d in subdirs]
+                for child in children:
+                    pending[child] = asyncio.ensure_future(self._scan(child, child_matcher, mount))
+                yield entry
+                stack.extend(reversed(children))
+        finally:
+            for task in pending.values():
+                task.cancel()
+            await asyncio.gather(*pending.values(), return_exceptions=True)
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+async def walk_directory_async(path: str, matcher: IgnoreMatcher, rules: Optional[TagRules] = None,
+                               concurrency: int = DEFAULT_SCAN_CONCURRENCY,
+                               mount_concurrency: int = DEFAULT_MOUNT_CONCURRENCY,
+                               fs: Optional[FileSystem] = None) -> List[DirectoryEntry]:
+    """Coroutine form for callers already running an event loop"""
+    walker = AsyncWalker(path, matcher, rules, concurrency, mount_concurrency, fs)
+    return [entry async for entry in walker.entries()]
+
+def iter_async(path: str, matcher: IgnoreMatcher, rules: Optional[TagRules] = None,
+               concurrency: int = DEFAULT_SCAN_CONCURRENCY, mount_concurrency: int = DEFAULT_MOUNT_CONCURRENCY,
+               fs: Optional[FileSystem] = None) -> Iterator[DirectoryEntry]:
+    """Run the async walker on its own event loop thread and yield its entries as they arrive.
+
+    At most ASYNC_RESULT_BUFFER entries wait for the consumer; beyond that the
+    walker pauses, so a slow consumer does not make it buffer the tree.
+    """
+    import queue
+    import threading
+    walker = AsyncWalker(path, matcher, rules, concurrency, mount_concurrency, fs)
+    results: "queue.Queue[Tuple[str, Any]]" = queue.Queue(maxsize=ASYNC_RESULT_BUFFER)
+    stop = threading.Event()
+
+    async def produce() -> None:
+        async for entry in walker.entries():
+            # Poll instead of blocking so the loop keeps serving the calls in flight
+            while True:
+                if stop.is_set():
+                    return
+                try:
+                    results.put_nowait(("entry", entry))
+                    break
+                except queue.Full:
+                    await asyncio.sleep(_HANDOVER_POLL)
+
+    def hand_over(message: Tuple[str, Any]) -> None:
+        # Once the consumer has left nobody will drain the queue, so give up instead of blocking forever
+        while not stop.is_set():
+            try:
+                results.put(message, timeout=_HANDOVER_POLL)
+                return
+            except queue.Full:
+                continue
+
+    def run() -> None:
+        try:
+            asyncio.run(produce())
+        except BaseException as e:  # Handed to the consuming thread
+            hand_over(("error", e))
+        else:
+            hand_over(("done", None))
+
+    thread = threading.Thread(target=run, name="filesage-async-walker", daemon=True)
+    thread.start()
+    try:
+        while True:
+            kind, value = results.get()
+            if kind == "entry":
+                yield value
+            elif kind == "error":
+                raise value
+            else:
+                return
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,227 @@
+# FileSage Batch Scoring
+# Computes chaos indexes and folder summaries for whole scans at once
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .compact import MICROSECONDS, CompactScan, from_epoch_us
+from .interpreter import (InterpretedEntry, FileInfo, format_file_size, generate_folder_archetype,
+                          infer_file_purpose)
+from .rules import ChaosRules, age_in_days, default_rules
+from .walker import ContentMetrics
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python path gives identical results
+    np = None
+
+DAY_US = 86_400 * MICROSECONDS
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_ONE_US = timedelta(microseconds=1)
+
+def _utc_offset_us(seconds: int) -> int:
+    """Local wall clock minus UTC at an epoch second, as ``datetime.fromtimestamp`` sees it"""
+    local = datetime.fromtimestamp(seconds)
+    return (local - datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None)) // _ONE_US
+
+def _day_offsets(days: Iterable[int]) -> Dict[int, Optional[int]]:
+    """UTC offset for each distinct UTC day, or None on a day the offset changes (a DST switch)"""
+    offsets: Dict[int, Optional[int]] = {}
+    for day in days:
+        start = _utc_offset_us(day * 86_400)
+        offsets[day] = start if start == _utc_offset_us(day * 86_400 + 86_399) else None
+    return offsets
+
+def batch_ages(mtimes: Sequence[int], now: datetime, use_numpy: Optional[bool] = None) -> Any:
+    """``age_in_days`` for epoch-microsecond mtimes, with the local-time conversion done once per distinct day.
+
+    Each mtime is shifted to the wall clock by its day's UTC offset and
+    floored to whole days against ``now`` in integer arithmetic. Files on
+    a day whose offset changes go through ``age_in_days`` one by one, so
+    ages around DST switches match the scalar rules exactly. Returns an
+    int64 NumPy array or an ``array('q')``, like ``batch_chaos_indexes``.
+    """
+    now_us = (now - _NAIVE_EPOCH) // _ONE_US
+    if np is not None and use_numpy is not False:
+        mtime_arr = np.asarray(mtimes, dtype=np.int64)
+        unique_days, inverse = np.unique(mtime_arr // DAY_US, return_inverse=True)
+        offsets = _day_offsets(unique_days.tolist())
+        day_offsets = np.array([offsets[day] or 0 for day in unique_days.tolist()], dtype=np.int64)
+        ages = (now_us - mtime_arr - day_offsets[inverse]) // DAY_US
+        switches = [row for row, day in enumerate(unique_days.tolist()) if offsets[day] is None]
+        if switches:
+            for i in np.flatnonzero(np.isin(inverse, switches)).tolist():
+                ages[i] = age_in_days(from_epoch_us(int(mtime_arr[i])), now)
+        return ages
+
+    offsets = _day_offsets({mtime // DAY_US for mtime in mtimes})
+    ages = array('q')
+    for mtime in mtimes:
+        offset = offsets[mtime // DAY_US]
+        ages.append((now_us - mtime - offset) // DAY_US if offset is not None
+                    else age_in_days(from_epoch_us(mtime), now))
+    return ages
+
+def _tag_scores(tag_masks: Sequence[int], tag_names: List[str], chaos: ChaosRules) -> Dict[int, float]:
+    """Tag weight for every distinct tag bitmask in the batch"""
+    scores: Dict[int, float] = {}
+    for mask in set(tag_masks):
+        tags = [tag for bit, tag in enumerate(tag_names) if mask >> bit & 1]
+        scores[mask] = chaos.tag_score(tags)
+    return scores
+
+def batch_chaos_indexes(names: Sequence[str], sizes: Sequence[int], mtimes: Sequence[int],
+                        tag_masks: Sequence[int], tag_names: List[str], now: Optional[datetime] = None,
+                        rules: Optional[ChaosRules] = None, use_numpy: Optional[bool] = None,
+                        contents: Optional[Dict[int, ContentMetrics]] = None) -> Sequence[float]:
+    """Score many files at once.
+
+    ``mtimes`` are epoch microseconds, ``tag_masks`` bitmasks over
+    ``tag_names`` and ``contents`` content metrics by file index (as stored
+    by CompactScan). Ages are whole wall-clock days, as in the scalar rules,
+    and terms are added in the same order as ``ChaosRules.score``, so
+    results equal ``calculate_chaos_index``. Returns a NumPy array when
+    NumPy is available (and ``use_numpy`` is not False), otherwise an
+    ``array('d')``.
+    """
+    chaos = rules or default_rules().chaos
+    now = now or datetime.now()
+    ages = batch_ages(mtimes, now, use_numpy)
+    tag_scores = _tag_scores(tag_masks, tag_names, chaos)
+    content_scores = {i: chaos.content_score(content) for i, content in (contents or {}).items() if content}
+
+    # Name-derived terms depend only on the name, so compute them once per distinct name
+    name_rows: Dict[str, int] = {}
+    name_terms: List[Tuple[float, ...]] = []
+    name_codes = array('I')
+    for name in names:
+        row = name_rows.get(name)
+        if row is None:
+            row = len(name_terms)
+            name_rows[name] = row
+            name_terms.append(chaos.name_terms(name))
+        name_codes.append(row)
+
+    if np is not None and use_numpy is not False:
+        return _chaos_numpy(chaos, sizes, ages, tag_masks, tag_scores, name_codes, name_terms, content_scores)
+
+    size_score = chaos.size_score
+    age_score = chaos.age_score
+    result = array('d')
+    for i in range(len(names)):
+        value = chaos.base
+        value += size_score(sizes[i])
+        value += age_score(ages[i])
+        value += tag_scores[tag_masks[i]]
+        for term in name_terms[name_codes[i]]:
+            value += term
+        if i in content_scores:
+            value += content_scores[i]
+        result.append(min(value, chaos.cap))
+    return result
+
+def _first_match(values: Any, thresholds: List[Tuple[Any, float]]) -> Any:
+    # Thresholds are sorted high to low, so the first matching condition wins as in the scalar rules
+    if not thresholds:
+        return np.zeros(len(values), dtype=np.float64)
+    return np.select([values > above for above, _ in thresholds], [score for _, score in thresholds], 0.0)
+
+def _chaos_numpy(chaos: ChaosRules, sizes: Sequence[int], ages: Any, tag_masks: Sequence[int],
+                 tag_scores: Dict[int, float], name_codes: array, name_terms: List[Tuple[float, ...]],
+                 content_scores: Dict[int, float]) -> Any:
+    size_arr = np.asarray(sizes, dtype=np.int64)
+    mask_arr = np.asarray(tag_masks, dtype=np.uint64)
+
+    size_score = _first_match(size_arr, chaos.size_thresholds)
+    age_score = _first_match(ages, chaos.age_thresholds)
+    unique_masks, inverse = np.unique(mask_arr, return_inverse=True)
+    tag_score = np.array([tag_scores[int(mask)] for mask in unique_masks], dtype=np.float64)[inverse]
+
+    # Pad name terms with zeros; adding 0.0 leaves every partial sum unchanged
+    width = max((len(terms) for terms in name_terms), default=0)
+    term_table = np.zeros((len(name_terms), width), dtype=np.float64)
+    for row, terms in enumerate(name_terms):
+        term_table[row, :len(terms)] = terms
+    file_terms = term_table[np.frombuffer(name_codes, dtype=np.uint32)] if len(name_codes) else term_table[:0]
+
+    result = np.full(len(size_arr), chaos.base, dtype=np.float64)
+    result += size_score
+    result += age_score
+    result += tag_score
+    for column in range(width):
+        result += file_terms[:, column]
+    if content_scores:
+        content_score = np.zeros(len(size_arr), dtype=np.float64)
+        content_score[np.fromiter(content_scores, dtype=np.int64)] = list(content_scores.values())
+        result += content_score
+    return np.minimum(result, chaos.cap)
+
+def batch_folder_summaries(file_counts: Sequence[int], sizes: Sequence[int], chaos_indexes: Sequence[float],
+                           use_numpy: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """Per-folder summaries for files stored contiguously folder by folder.
+
+    Returns dicts shaped like ``calculate_folder_summary`` output. Chaos sums
+    accumulate in file order, so averages match the scalar function.
+    """
+    if np is not None and use_numpy is not False:
+        counts = np.asarray(file_counts, dtype=np.int64)
+        folder_ids = np.repeat(np.arange(len(counts)), counts)
+        size_cumsum = np.concatenate(([0], np.cumsum(np.asarray(sizes, dtype=np.int64))))
+        ends = np.cumsum(counts)
+        size_totals = (size_cumsum[ends] - size_cumsum[ends - counts]).tolist()
+        chaos_totals = np.bincount(folder_ids, weights=np.asarray(chaos_indexes, dtype=np.float64),
+                                   minlength=len(counts)).tolist()
+    else:
+        size_totals, chaos_totals = [], []
+        start = 0
+        for count in file_counts:
+            size_totals.append(sum(sizes[start:start + count]))
+            chaos_totals.append(sum(chaos_indexes[start:start + count]))
+            start += count
+
+    summaries: List[Dict[str, Any]] = []
+    for count, total_size, chaos_total in zip(file_counts, size_totals, chaos_totals):
+        if not count:
+            summaries.append({"total_files": 0, "total_size": 0, "average_chaos": 0.0, "size_formatted": "void-sized"})
+            continue
+        summaries.append({
+            "total_files": int(count),
+            "total_size": int(total_size),
+            "average_chaos": round(float(chaos_total) / count, 2),
+            "size_formatted": format_file_size(int(total_size))
+        })
+    return summaries
+
+def score_compact_scan(scan: CompactScan, now: Optional[datetime] = None,
+                       use_numpy: Optional[bool] = None) -> Tuple[Sequence[float], List[Dict[str, Any]]]:
+    """Chaos index for every file and summary for every folder of a CompactScan"""
+    chaos = batch_chaos_indexes(scan.names, scan.sizes, scan.mtimes, scan.tag_masks, scan.tag_names,
+                                now=now, use_numpy=use_numpy, contents=scan.contents)
+    file_counts = [len(scan.file_range(i)) for i in range(len(scan))]
+    return chaos, batch_folder_summaries(file_counts, scan.sizes, chaos, use_numpy=use_numpy)
+
+def iter_interpret_compact(scan: CompactScan, now: Optional[datetime] = None) -> Iterator[InterpretedEntry]:
+    """interpret_structure for a CompactScan, using batch-computed chaos indexes"""
+    chaos, _ = score_compact_scan(scan, now)
+    for dir_index in range(len(scan)):
+        entry = scan.entry(dir_index)
+        files: List[FileInfo] = []
+        for file_index, file_meta in zip(scan.file_range(dir_index), entry["files"]):
+            file_info: FileInfo = {
+                "name": file_meta["name"],
+                "description": infer_file_purpose(file_meta["name"], file_meta["tags"]),
+                "size": file_meta["size"],
+                "modified": file_meta["modified"],
+                "chaos_index": float(chaos[file_index]),
+                "tags": file_meta["tags"]
+            }
+            if "content" in file_meta:
+                file_info["content"] = file_meta["content"]
+            files.append(file_info)
+        yield {
+            "path": entry["path"],
+            "description": f"Folder at {entry['path']}" if entry['path'] != '.' else "Root directory",
+            "files": files,
+            "folder_archetype": generate_folder_archetype(entry["path"], files),
+            "tags": entry["tags"]
+        }
@@ -0,0 +1,149 @@
+# FileSage Compact Scan
+# Struct-of-arrays storage for very large scans
+import sys
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .walker import ContentMetrics, DirectoryEntry, FileMetadata, iter_directory
+
+MICROSECONDS = 1_000_000
+
+def to_epoch_us(moment: datetime) -> int:
+    """Exact integer epoch microseconds of a naive local datetime (float timestamps can be 1µs off)"""
+    return int(moment.replace(microsecond=0).timestamp()) * MICROSECONDS + moment.microsecond
+
+def from_epoch_us(epoch_us: int) -> datetime:
+    """Inverse of to_epoch_us: the datetime walk_directory built, including its DST fold"""
+    seconds, micros = divmod(epoch_us, MICROSECONDS)
+    return datetime.fromtimestamp(seconds).replace(microsecond=micros)
+
+class CompactScan:
+    """Struct-of-arrays representation of a walk_directory result.
+
+    Instead of one dict, one list and one ``datetime`` per file, files are
+    stored column-wise: interned names, ``array``-backed sizes, mtimes
+    (integer epoch microseconds, the resolution of ``datetime``) and tag
+    bitmasks over an interned tag table. Content metrics from the content
+    stage are kept in a sparse column. Files of a folder are contiguous, so
+    folders only record where their files start. ``iter_entries`` (also
+    used by ``iter``) rebuilds the DirectoryEntry dicts exactly, one folder
+    at a time, for ``interpret_structure`` and the writers.
+    """
+
+    def __init__(self) -> None:
+        self.tag_names: List[str] = []
+        self._tag_ids: Dict[str, int] = {}
+        self._mask_tags: Dict[int, Tuple[str, ...]] = {}
+
+        # Per-folder columns
+        self.dir_paths: List[str] = []
+        self.dir_folders: List[Tuple[str, ...]] = []
+        self.dir_tags = array('Q')
+        self.dir_file_start = array('Q')
+
+        # Per-file columns
+        self.names: List[str] = []
+        self.sizes = array('q')
+        self.mtimes = array('q')
+        self.tag_masks = array('Q')
+        self.contents: Dict[int, ContentMetrics] = {}  # file index -> metrics, for analysed files only
+
+    @classmethod
+    def from_structure(cls, structure: Iterable[DirectoryEntry]) -> "CompactScan":
+        scan = cls()
+        for entry in structure:
+            scan.add_entry(entry)
+        return scan
+
+    def __len__(self) -> int:
+        return len(self.dir_paths)
+
+    def __iter__(self) -> Iterator[DirectoryEntry]:
+        return self.iter_entries()
+
+    @property
+    def file_count(self) -> int:
+        return len(self.names)
+
+    def tag_id(self, tag: str) -> int:
+        """Intern a tag and return its bit position"""
+        tag_id = self._tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = len(self.tag_names)
+            if tag_id >= 64:
+                raise ValueError("CompactScan supports at most 64 distinct tags")
+            self.tag_names.append(tag)
+            self._tag_ids[tag] = tag_id
+        return tag_id
+
+    def tags_mask(self, tags: List[str]) -> int:
+        mask = 0
+        for tag in tags:
+            mask |= 1 << self.tag_id(tag)
+        return mask
+
+    def mask_tags(self, mask: int) -> List[str]:
+        tags = self._mask_tags.get(mask)
+        if tags is None:
+            tags = tuple(tag for bit, tag in enumerate(self.tag_names) if mask >> bit & 1)
+            self._mask_tags[mask] = tags
+        return list(tags)
+
+    def add_entry(self, entry: DirectoryEntry) -> None:
+        """Append one scanned folder and its files"""
+        intern = sys.intern
+        self.dir_paths.append(intern(entry["path"]))
+        self.dir_folders.append(tuple(intern(name) for name in entry["folders"]))
+        self.dir_tags.append(self.tags_mask(entry["tags"]))
+        self.dir_file_start.append(len(self.names))
+        for file in entry["files"]:
+            if "content" in file:
+                self.contents[len(self.names)] = file["content"]
+            self.names.append(intern(file["name"]))
+            self.sizes.append(file["size"])
+            self.mtimes.append(to_epoch_us(file["modified"]))
+            self.tag_masks.append(self.tags_mask(file["tags"]))
+
+    def file_range(self, dir_index: int) -> range:
+        """Indexes of the files belonging to a folder"""
+        start = self.dir_file_start[dir_index]
+        end = self.dir_file_start[dir_index + 1] if dir_index + 1 < len(self.dir_paths) else len(self.names)
+        return range(start, end)
+
+    def dir_index_of_files(self) -> array:
+        """Per-file folder index, for grouped computations"""
+        dir_index = array('I')
+        for index in range(len(self.dir_paths)):
+            dir_index.extend([index] * len(self.file_range(index)))
+        return dir_index
+
+    def entry(self, dir_index: int) -> DirectoryEntry:
+        """Rebuild a DirectoryEntry for one folder"""
+        files: List[FileMetadata] = []
+        for i in self.file_range(dir_index):
+            file: FileMetadata = {
+                "name": self.names[i],
+                "size": self.sizes[i],
+                "modified": from_epoch_us(self.mtimes[i]),
+                "tags": self.mask_tags(self.tag_masks[i])
+            }
+            content = self.contents.get(i)
+            if content is not None:
+                file["content"] = content
+            files.append(file)
+        return {
+            "path": self.dir_paths[dir_index],
+            "folders": list(self.dir_folders[dir_index]),
+            "files": files,
+            "tags": self.mask_tags(self.dir_tags[dir_index])
+        }
+
+    def iter_entries(self) -> Iterator[DirectoryEntry]:
+        """Adapter yielding DirectoryEntry dicts one folder at a time"""
+        for dir_index in range(len(self.dir_paths)):
+            yield self.entry(dir_index)
+
+def walk_directory_compact(path: str, engine: Optional[str] = None, workers: Optional[int] = None) -> CompactScan:
+    """Scan straight into a CompactScan without materialising the dict structure"""
+    return CompactScan.from_structure(iter_directory(path, engine, workers))
@@ -0,0 +1,158 @@
+# FileSage Content Analysis
+# Measures source and text files in a process pool with bounded reads
+import mmap
+import os
+import re
+from collections import deque
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+from .metrics import METRICS
+from .walker import ContentMetrics, DirectoryEntry
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+DEFAULT_CONTENT_BYTES = 256 * 1024
+DEFAULT_SKIP_ABOVE = 8 * 1024 * 1024
+# Folders submitted ahead of the one being yielded, to keep the pool busy while streaming
+PIPELINE_WINDOW = 64
+BINARY_SNIFF = 8192
+
+TEXT_EXTENSIONS = frozenset({
+    ".py", ".pyi", ".js", ".jsx", ".ts", ".tsx", ".mjs", ".java", ".kt", ".scala", ".c", ".h", ".cc", ".cpp",
+    ".hpp", ".cs", ".go", ".rs", ".rb", ".php", ".swift", ".sh", ".bash", ".ps1", ".lua", ".pl", ".r",
+    ".md", ".rst", ".txt", ".yml", ".yaml", ".json", ".toml", ".ini", ".cfg", ".xml", ".html", ".css",
+    ".scss", ".sql"
+})
+TEXT_NAMES = frozenset({"makefile", "dockerfile", "jenkinsfile", "rakefile", "gemfile"})
+# Nesting is measured by indentation for these and by brackets for everything else
+INDENT_EXTENSIONS = frozenset({".py", ".pyi", ".yml", ".yaml"})
+
+IMPORT_PATTERN = re.compile(
+    rb"^[ \t]*(?:import\b|from[ \t]+[\w.]+[ \t]+import\b|#[ \t]*include\b|using[ \t]+[\w.]+;|use[ \t]+\w)"
+    rb"|\brequire[ \t]*\(",
+    re.MULTILINE
+)
+TODO_PATTERN = re.compile(rb"\b(?:TODO|FIXME|XXX|HACK)\b")
+INDENT_PATTERN = re.compile(rb"^([ \t]+)\S", re.MULTILINE)
+# Every byte except brackets, for bytes.translate(None, ...)
+_NON_BRACKETS = bytes(b for b in range(256) if b not in b"{}[]()")
+
+def is_analysable(name: str, size: int, skip_above: int = DEFAULT_SKIP_ABOVE) -> bool:
+    """Cheap pre-filter using only the walker's metadata"""
+    if size <= 0 or size > skip_above:
+        return False
+    lowered = name.lower()
+    dot = lowered.rfind(".")
+    return (lowered[dot:] in TEXT_EXTENSIONS) if dot >= 0 else lowered in TEXT_NAMES
+
+def _indent_depth(data: bytes) -> int:
+    widths = [len(indent.expandtabs(4)) for indent in INDENT_PATTERN.findall(data)]
+    if not widths:
+        return 0
+    unit = min(widths)
+    # Aligned continuation lines rarely sit on a multiple of the base indent; skip them
+    return max(width for width in widths if width % unit == 0) // unit
+
+def _bracket_depth(data: bytes) -> int:
+    depth = deepest = 0
+    for char in data.translate(None, _NON_BRACKETS):
+        if char in b"{[(":
+            depth += 1
+            if depth > deepest:
+                deepest = depth
+        elif depth:
+            depth -= 1
+    return deepest
+
+def measure_content(data: bytes, ext: str, truncated: bool = False) -> ContentMetrics:
+    """Line, import, nesting and TODO metrics for a block of text"""
+    lines = data.count(b"\n") + (0 if not data or data.endswith(b"\n") else 1)
+    todos = len(TODO_PATTERN.findall(data))
+    return {
+        "lines": lines,
+        "imports": len(IMPORT_PATTERN.findall(data)),
+        "max_depth": _indent_depth(data) if ext in INDENT_EXTENSIONS else _bracket_depth(data),
+        "todos": todos,
+        "todo_density": round(todos * 100.0 / lines, 2) if lines else 0.0,
+        "truncated": truncated
+    }
+
+def analyze_file(path: str, max_bytes: int = DEFAULT_CONTENT_BYTES) -> Optional[ContentMetrics]:
+    """Measure up to ``max_bytes`` of a file through mmap; None for binary or unreadable files"""
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return None
+            length = min(size, max_bytes)
+            with mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ) as mapped:
+                if mapped.find(b"\0", 0, min(length, BINARY_SNIFF)) != -1:
+                    return None
+                data = mapped[:length]
+    except (OSError, ValueError):
+        return None
+    ext = os.path.splitext(path)[1].lower()
+    return measure_content(data, ext, truncated=size > max_bytes)
+
+def analyze_paths(paths: List[str], max_bytes: int) -> List[Optional[ContentMetrics]]:
+    """Worker entry point: analyse one folder's files"""
+    return [analyze_file(path, max_bytes) for path in paths]
+
+def _eligible(root: str, entry: DirectoryEntry, skip_above: int) -> Tuple[List[int], List[str]]:
+    abs_dir = root if entry["path"] == "." else os.path.join(root, entry["path"])
+    indexes: List[int] = []
+    paths: List[str] = []
+    for index, file in enumerate(entry["files"]):
+        if is_analysable(file["name"], file["size"], skip_above):
+            indexes.append(index)
+            paths.append(os.path.join(abs_dir, file["name"]))
+    return indexes, paths
+
+def _attach(entry: DirectoryEntry, indexes: List[int], results: List[Optional[ContentMetrics]]) -> DirectoryEntry:
+    for index, content in zip(indexes, results):
+        if content is not None:
+            entry["files"][index]["content"] = content
+    return entry
+
+def iter_analyze_content(entries: Iterable[DirectoryEntry], root: str, workers: Optional[int] = None,
+                         max_bytes: int = DEFAULT_CONTENT_BYTES,
+                         skip_above: int = DEFAULT_SKIP_ABOVE) -> Iterator[DirectoryEntry]:
+    """Add ``content`` metrics to eligible files, yielding folders in their original order.
+
+    Files are filtered by extension and size before anything is opened;
+    each folder's remaining files go to a process pool as one task, with up
+    to PIPELINE_WINDOW folders in flight so streaming keeps every worker
+    busy. ``workers=1`` analyses in-process.
+    """
+    tracked = _iter_analyze(entries, root, workers or os.cpu_count() or 1, max_bytes, skip_above)
+    return METRICS.track("content", tracked) if METRICS.enabled else tracked
+
+def _iter_analyze(entries: Iterable[DirectoryEntry], root: str, workers: int, max_bytes: int,
+                  skip_above: int) -> Iterator[DirectoryEntry]:
+    if workers <= 1:
+        for entry in entries:
+            indexes, paths = _eligible(root, entry, skip_above)
+            yield _attach(entry, indexes, analyze_paths(paths, max_bytes)) if paths else entry
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    pending: Deque[Tuple[DirectoryEntry, List[int], Optional["Future[List[Optional[ContentMetrics]]]"]]] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for entry in entries:
+            indexes, paths = _eligible(root, entry, skip_above)
+            pending.append((entry, indexes, pool.submit(analyze_paths, paths, max_bytes) if paths else None))
+            if len(pending) > PIPELINE_WINDOW:
+                yield _finish(*pending.popleft())
+        while pending:
+            yield _finish(*pending.popleft())
+
+def _finish(entry: DirectoryEntry, indexes: List[int],
+            future: Optional["Future[List[Optional[ContentMetrics]]]"]) -> DirectoryEntry:
+    return _attach(entry, indexes, future.result()) if future is not None else entry
+
+def analyze_content(structure: List[DirectoryEntry], root: str, workers: Optional[int] = None,
+                    max_bytes: int = DEFAULT_CONTENT_BYTES,
+                    skip_above: int = DEFAULT_SKIP_ABOVE) -> List[DirectoryEntry]:
+    """Batch form of iter_analyze_content; entries are updated in place"""
+    return list(iter_analyze_content(structure, root, workers, max_bytes, skip_above))
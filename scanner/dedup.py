@@ -0,0 +1,172 @@
+# FileSage Duplicate Finder
+# Finds duplicate files by size, then partial hash, then full hash
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, TypedDict
+
+from .metrics import METRICS
+
+# Bytes hashed from each end of a file in the partial-hash stage
+PARTIAL_BLOCK = 64 * 1024
+# Buffered read size for full hashes; files at least MMAP_THRESHOLD long are mapped instead
+READ_CHUNK = 1024 * 1024
+MMAP_THRESHOLD = 8 * 1024 * 1024
+DEFAULT_DEDUP_WORKERS = 8
+
+class DuplicateGroup(TypedDict):
+    size: int
+    digest: str
+    paths: List[str]
+    reclaimable: int
+
+def _new_hash() -> Any:
+    return hashlib.blake2b(digest_size=20)
+
+def partial_hash(path: str, size: int, block: int = PARTIAL_BLOCK) -> Optional[str]:
+    """Hash of the first and last ``block`` bytes (the whole file when it is small)"""
+    digest = _new_hash()
+    try:
+        with open(path, "rb") as f:
+            digest.update(f.read(block))
+            if size > 2 * block:
+                f.seek(-block, os.SEEK_END)
+                digest.update(f.read(block))
+            elif size > block:
+                digest.update(f.read())
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def full_hash(path: str, size: int) -> Optional[str]:
+    """Hash of the whole file, through mmap for large files and 1MB reads otherwise"""
+    digest = _new_hash()
+    try:
+        with open(path, "rb") as f:
+            if size >= MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for start in range(0, len(view), READ_CHUNK):
+                            digest.update(view[start:start + READ_CHUNK])
+                    finally:
+                        view.release()
+            else:
+                for chunk in iter(lambda: f.read(READ_CHUNK), b""):
+                    digest.update(chunk)
+    except (OSError, ValueError):
+        return None
+    return digest.hexdigest()
+
+class DuplicateFinder:
+    """Staged duplicate detection over scanned folders.
+
+    Folders are fed in with ``add`` (DirectoryEntry or InterpretedEntry,
+    using the sizes the walker already collected). ``find`` then narrows
+    candidates stage by stage: files of a unique size are dropped, hard
+    links and symlinks to the same inode are collapsed, the remaining files
+    are grouped by a hash of their first and last blocks, and only groups
+    that still collide are hashed in full. Hashing runs on a thread pool;
+    hashlib releases the GIL while digesting.
+    """
+
+    def __init__(self, root: str, workers: int = DEFAULT_DEDUP_WORKERS, min_size: int = 1,
+                 block: int = PARTIAL_BLOCK):
+        self.root = root
+        self.workers = max(1, workers)
+        self.min_size = min_size
+        self.block = block
+        self._by_size: Dict[int, List[str]] = {}
+        self.files_seen = 0
+        self.files_hashed = 0
+
+    def add(self, entry: Mapping[str, Any]) -> None:
+        """Record the files of one scanned folder"""
+        rel_root = entry["path"]
+        by_size = self._by_size
+        for file in entry["files"]:
+            size = file["size"]
+            if size >= self.min_size:
+                rel_path = file["name"] if rel_root == "." else os.path.join(rel_root, file["name"])
+                by_size.setdefault(size, []).append(rel_path)
+        self.files_seen += len(entry["files"])
+
+    def find(self) -> List[DuplicateGroup]:
+        """Run the hash stages and return duplicate groups, largest reclaimable space first"""
+        with METRICS.timed("dedup"):
+            candidates = {size: paths for size, paths in self._by_size.items() if len(paths) > 1}
+            candidates = self._distinct_inodes(candidates)
+
+            partial = self._refine(candidates, lambda path, size: partial_hash(path, size, self.block))
+            # Files no longer than two blocks were hashed whole already; only larger ones need a full hash
+            groups: List[Tuple[int, str, List[str]]] = []
+            large: Dict[int, List[List[str]]] = {}
+            for (size, digest), paths in partial.items():
+                if size <= 2 * self.block:
+                    groups.append((size, digest, paths))
+                else:
+                    large.setdefault(size, []).append(paths)
+            full = self._refine_groups(large, full_hash)
+            groups += [(size, digest, paths) for (size, digest), paths in full.items()]
+        if METRICS.enabled:
+            METRICS.stage("dedup").files += self.files_hashed
+
+        duplicates: List[DuplicateGroup] = [{
+            "size": size,
+            "digest": digest,
+            "paths": sorted(paths),
+            "reclaimable": size * (len(paths) - 1)
+        } for size, digest, paths in groups]
+        duplicates.sort(key=lambda group: (-group["reclaimable"], group["paths"][0]))
+        return duplicates
+
+    def _distinct_inodes(self, candidates: Dict[int, List[str]]) -> Dict[int, List[str]]:
+        """Keep one path (the first by name) per (device, inode) so hard links and symlinks are not reported"""
+        distinct: Dict[int, List[str]] = {}
+        for size, paths in candidates.items():
+            seen: Dict[Tuple[int, int], str] = {}
+            for rel_path in paths:
+                try:
+                    st = os.stat(os.path.join(self.root, rel_path))
+                except OSError:
+                    continue
+                key = (st.st_dev, st.st_ino)
+                if key not in seen or rel_path < seen[key]:
+                    seen[key] = rel_path
+            if len(seen) > 1:
+                distinct[size] = list(seen.values())
+        return distinct
+
+    def _refine(self, candidates: Dict[int, List[str]],
+                hasher: Callable[[str, int], Optional[str]]) -> Dict[Tuple[int, str], List[str]]:
+        return self._refine_groups({size: [paths] for size, paths in candidates.items()}, hasher)
+
+    def _refine_groups(self, candidates: Dict[int, List[List[str]]],
+                       hasher: Callable[[str, int], Optional[str]]) -> Dict[Tuple[int, str], List[str]]:
+        """Split each candidate group by ``hasher``, dropping groups left with a single file"""
+        jobs = [(size, rel_path) for size, groups in candidates.items() for paths in groups for rel_path in paths]
+        self.files_hashed += len(jobs)
+
+        def run(job: Tuple[int, str]) -> Optional[str]:
+            return hasher(os.path.join(self.root, job[1]), job[0])
+
+        if self.workers > 1 and len(jobs) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                digests = list(pool.map(run, jobs))
+        else:
+            digests = [run(job) for job in jobs]
+
+        refined: Dict[Tuple[int, str], List[str]] = {}
+        for (size, rel_path), digest in zip(jobs, digests):
+            if digest is not None:
+                refined.setdefault((size, digest), []).append(rel_path)
+        return {key: paths for key, paths in refined.items() if len(paths) > 1}
+
+def find_duplicates(root: str, structure: Iterable[Mapping[str, Any]],
+                    workers: int = DEFAULT_DEDUP_WORKERS) -> List[DuplicateGroup]:
+    """Duplicate groups among the files of a walk_directory result rooted at ``root``"""
+    finder = DuplicateFinder(root, workers)
+    for entry in structure:
+        finder.add(entry)
+    return finder.find()
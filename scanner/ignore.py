@@ -0,0 +1,346 @@
+# FileSage Ignore Matcher
+# Compiles ignore_patterns and .gitignore files into constant-time lookup tables
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+GLOB_CHARS = frozenset("*?[\\")
+
+class IgnoreRule(NamedTuple):
+    pattern: str
+    negate: bool
+    dir_only: bool
+    anchored: bool
+    base: str
+
+class _RuleTables(NamedTuple):
+    names: Dict[str, int]
+    paths: Dict[str, int]
+    extensions: Dict[str, int]
+    name_globs: "_NameGlobs"
+    buckets: Dict[str, Pattern[str]]
+    regex: Optional[Pattern[str]]
+
+def parse_rule(line: str, base: str = "") -> Optional[IgnoreRule]:
+    """Parse one gitignore-style line; blank lines and comments yield None"""
+    line = line.rstrip("\r\n")
+    if not line.strip() or line.startswith("#"):
+        return None
+    line = line.rstrip(" ")
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith(("\\!", "\\#")):
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    # A slash anywhere but the end anchors the pattern to its .gitignore's folder
+    anchored = "/" in line
+    return IgnoreRule(line.lstrip("/"), negate, dir_only, anchored, base)
+
+def translate_glob(pattern: str) -> str:
+    """Translate a gitignore glob into a regular expression body"""
+    out: List[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                if i + 2 < n and pattern[i + 2] == "/":
+                    out.append("(?:.*/)?")
+                    i += 3
+                else:
+                    out.append(".*")
+                    i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end + 1
+                continue
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+def glob_literals(pattern: str) -> Tuple[str, str, List[str]]:
+    """``(prefix, suffix, runs)``: the literal text before the first wildcard, after the last, and every run"""
+    runs: List[str] = []
+    current: List[str] = []
+    starts_wild = ends_wild = False
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        wild = c in "*?" or (c == "[" and pattern.find("]", i + 2) != -1)
+        if wild:
+            if i == 0:
+                starts_wild = True
+            if current:
+                runs.append("".join(current))
+                current = []
+            i = pattern.find("]", i + 2) + 1 if c == "[" else i + 1
+            ends_wild = i >= n
+            continue
+        if c == "\\" and i + 1 < n:
+            i += 1
+        current.append(pattern[i])
+        i += 1
+    if current:
+        runs.append("".join(current))
+    prefix = "" if starts_wild or not runs else runs[0]
+    suffix = "" if ends_wild or not runs else runs[-1]
+    return prefix, suffix, runs
+
+class _Automaton:
+    """Aho-Corasick automaton: every literal fragment found in a string, in one pass over its characters"""
+
+    def __init__(self, fragments: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.output: List[Tuple[str, ...]] = [()]
+        for fragment in fragments:
+            state = 0
+            for c in fragment:
+                nxt = self.goto[state].get(c)
+                if nxt is None:
+                    nxt = self.goto[state][c] = len(self.goto)
+                    self.goto.append({})
+                    self.output.append(())
+                state = nxt
+            self.output[state] += (fragment,)
+        # Breadth-first failure links; each state also reports the fragments ending at its fallbacks
+        self.fail = [0] * len(self.goto)
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for c, nxt in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and c not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(c, 0)
+                self.output[nxt] += self.output[self.fail[nxt]]
+                queue.append(nxt)
+
+    def search(self, text: str) -> List[str]:
+        goto, fail, output = self.goto, self.fail, self.output
+        found: List[str] = []
+        state = 0
+        for c in text:
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            if output[state]:
+                found.extend(output[state])
+        return found
+
+def _bucket(table: Dict[str, Any], literal: str) -> Optional[Pattern[str]]:
+    """A bucket's regex, compiled on first use: most buckets of a long pattern list are never reached"""
+    entry = table.get(literal)
+    if isinstance(entry, list):
+        entry = table[literal] = _alternation(entry)
+    return entry
+
+class _NameGlobs:
+    """Slash-free globs, indexed by their literal parts so a name only meets the globs it could match.
+
+    Each glob is keyed by one of its literal parts: the text it ends with,
+    the text it starts with, or a run between wildcards (``*tmp*``),
+    whichever the fewest other globs share. Suffix and prefix keys are found
+    with one dict probe per distinct key length and inner runs with a single
+    Aho-Corasick pass over the name, so a name only meets the globs it could
+    match. Only globs with no literal text at all share a plain alternation.
+    The cost of a lookup therefore follows the name's length, not the
+    number of globs.
+    """
+
+    def __init__(self, globs: List[Tuple[int, str]]):
+        candidates: List[Tuple[int, str, List[Tuple[str, str]]]] = []
+        shared: Dict[Tuple[str, str], int] = {}
+        for index, pattern in globs:
+            prefix, suffix, runs = glob_literals(pattern)
+            # Preference order on equal sharing: probes are cheaper than the automaton
+            keys = ([("suffix", suffix)] if suffix else []) + ([("prefix", prefix)] if prefix else []) + \
+                [("fragment", run) for run in sorted(set(runs), key=len, reverse=True)]
+            for key in keys:
+                shared[key] = shared.get(key, 0) + 1
+            candidates.append((index, pattern, keys))
+
+        tables: Dict[str, Dict[str, List[Tuple[int, str]]]] = {"suffix": {}, "prefix": {}, "fragment": {}}
+        rest: List[Tuple[int, str]] = []
+        for index, pattern, keys in candidates:
+            body = (index, translate_glob(pattern))
+            if keys:
+                kind, literal = min(keys, key=lambda key: shared[key])
+                tables[kind].setdefault(literal, []).append(body)
+            else:
+                rest.append(body)
+        suffixes, prefixes, fragments = tables["suffix"], tables["prefix"], tables["fragment"]
+        # Buckets hold their regex bodies until a name first reaches them (see _bucket)
+        self.suffixes: Dict[str, Any] = suffixes
+        self.suffix_lengths = sorted({len(key) for key in suffixes})
+        self.prefixes: Dict[str, Any] = prefixes
+        self.prefix_lengths = sorted({len(key) for key in prefixes})
+        self.fragments: Dict[str, Any] = fragments
+        self.automaton = _Automaton(fragments) if fragments else None
+        self.rest = _alternation(rest)
+
+    def best(self, name: str, best: int) -> int:
+        """The highest rule index among ``best`` and the globs matching ``name``"""
+        size = len(name)
+        for length in self.suffix_lengths:
+            if length > size:
+                break
+            best = _best_match(_bucket(self.suffixes, name[size - length:]), name, best)
+        for length in self.prefix_lengths:
+            if length > size:
+                break
+            best = _best_match(_bucket(self.prefixes, name[:length]), name, best)
+        if self.automaton is not None:
+            for fragment in set(self.automaton.search(name)):
+                best = _best_match(_bucket(self.fragments, fragment), name, best)
+        return _best_match(self.rest, name, best)
+
+def _alternation(alternatives: List[Tuple[int, str]]) -> Optional[Pattern[str]]:
+    if not alternatives:
+        return None
+    # Highest rule index first so the first alternative to match is the last rule that applies
+    alternatives.sort(reverse=True)
+    return re.compile("|".join(f"(?P<r{index}>{body})" for index, body in alternatives), re.DOTALL)
+
+def _compile_tables(rules: List[IgnoreRule], include_dir_only: bool) -> _RuleTables:
+    names: Dict[str, int] = {}
+    paths: Dict[str, int] = {}
+    extensions: Dict[str, int] = {}
+    name_globs: List[Tuple[int, str]] = []
+    bucketed: Dict[str, List[Tuple[int, str]]] = {}
+    generic: List[Tuple[int, str]] = []
+
+    for index, rule in enumerate(rules):
+        if rule.dir_only and not include_dir_only:
+            continue
+        pattern = rule.pattern
+        is_glob = any(c in GLOB_CHARS for c in pattern)
+        if not rule.base and not is_glob:
+            (paths if rule.anchored else names)[pattern] = index
+        elif not rule.base and not rule.anchored:
+            if pattern.startswith("*.") and not any(c in GLOB_CHARS or c == "." for c in pattern[2:]):
+                extensions[pattern[1:]] = index
+            else:
+                # Slash-free globs only ever need to see the final path component
+                name_globs.append((index, pattern))
+        else:
+            body = translate_glob(pattern)
+            if not rule.anchored:
+                body = "(?:.*/)?" + body
+            if rule.base:
+                body = re.escape(rule.base + "/") + body
+            # Group path globs by their literal first component so a lookup only tries its own bucket
+            first = (rule.base or pattern).split("/", 1)[0]
+            if any(c in GLOB_CHARS for c in first):
+                generic.append((index, body))
+            else:
+                bucketed.setdefault(first, []).append((index, body))
+
+    buckets: Dict[str, Pattern[str]] = {}
+    for first, alternatives in bucketed.items():
+        regex = _alternation(alternatives)
+        if regex is not None:
+            buckets[first] = regex
+    return _RuleTables(names, paths, extensions, _NameGlobs(name_globs), buckets, _alternation(generic))
+
+def _best_match(regex: Optional[Pattern[str]], text: str, best: int) -> int:
+    if regex is not None:
+        match = regex.fullmatch(text)
+        if match is not None:
+            index = int(match.lastgroup[1:])
+            if index > best:
+                return index
+    return best
+
+class IgnoreMatcher:
+    """Precompiled gitignore-style matcher.
+
+    Literal names, anchored literal paths and ``*.ext`` globs are stored in
+    hash tables. Slash-free globs are indexed by their literal prefix,
+    suffix or inner text (see ``_NameGlobs``) and the remaining path globs
+    are folded into alternation regexes per literal first path component,
+    with a named group per rule. A lookup therefore costs a few dict probes
+    and a handful of small regex matches however many patterns there are.
+    As in git, the last matching rule wins and ``!`` re-includes a path.
+
+    Paths are relative to the scan root using ``/`` separators. Matching a
+    path does not consult its parents; callers prune ignored folders before
+    descending, which is also what makes excluded subtrees final.
+    """
+
+    def __init__(self, rules: Iterable[IgnoreRule] = (), use_gitignore: bool = False):
+        self.rules: List[IgnoreRule] = list(rules)
+        self.use_gitignore = use_gitignore
+        self._dir_tables = _compile_tables(self.rules, include_dir_only=True)
+        self._file_tables = _compile_tables(self.rules, include_dir_only=False)
+
+    @classmethod
+    def from_patterns(cls, patterns: Iterable[str], use_gitignore: bool = False) -> "IgnoreMatcher":
+        rules = [rule for rule in (parse_rule(p) for p in patterns) if rule is not None]
+        return cls(rules, use_gitignore)
+
+    def extend(self, lines: Iterable[str], base: str) -> "IgnoreMatcher":
+        """Return a matcher that also applies a .gitignore found in ``base``"""
+        base = "" if base == "." else base.replace(os.sep, "/")
+        extra = [rule for rule in (parse_rule(line, base) for line in lines) if rule is not None]
+        if not extra:
+            return self
+        return IgnoreMatcher(self.rules + extra, self.use_gitignore)
+
+    def for_directory(self, abs_dir: str, rel_root: str, file_names: Iterable[str]) -> "IgnoreMatcher":
+        """Pick up ``abs_dir``'s .gitignore, when enabled and present"""
+        if not self.use_gitignore or ".gitignore" not in file_names:
+            return self
+        try:
+            with open(os.path.join(abs_dir, ".gitignore"), "r", encoding="utf-8", errors="replace") as f:
+                return self.extend(f.readlines(), rel_root)
+        except OSError:
+            return self
+
+    def matches(self, rel_path: str, is_dir: bool) -> bool:
+        """Check whether a root-relative path is ignored"""
+        if os.sep != "/":
+            rel_path = rel_path.replace(os.sep, "/")
+        tables = self._dir_tables if is_dir else self._file_tables
+        name = rel_path.rpartition("/")[2]
+
+        best = tables.names.get(name, -1)
+        index = tables.paths.get(rel_path, -1)
+        if index > best:
+            best = index
+        if tables.extensions:
+            dot = name.rfind(".")
+            if dot >= 0:
+                index = tables.extensions.get(name[dot:], -1)
+                if index > best:
+                    best = index
+        best = tables.name_globs.best(name, best)
+        if tables.buckets:
+            best = _best_match(tables.buckets.get(rel_path.partition("/")[0]), rel_path, best)
+        best = _best_match(tables.regex, rel_path, best)
+
+        return best >= 0 and not self.rules[best].negate
+
+@lru_cache(maxsize=32)
+def compile_ignore_patterns(patterns: Tuple[str, ...], use_gitignore: bool = False) -> IgnoreMatcher:
+    """Compile (and memoise) a matcher for a tuple of settings patterns"""
+    return IgnoreMatcher.from_patterns(patterns, use_gitignore)
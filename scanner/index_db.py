@@ -0,0 +1,332 @@
+# FileSage Scan Index
+# Stores scan results in SQLite so questions can be answered without touching the filesystem
+import argparse
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .interpreter import InterpretedEntry, format_file_size
+
+INDEX_VERSION = 1
+# Relative to the working directory, not the report's -o folder: every scan and query shares one index
+DEFAULT_INDEX_PATH = os.path.join("output", "filesage_index.sqlite")
+# Rows buffered before an executemany; each batch commits on its own so concurrent scans never wait long
+INSERT_BATCH = 10_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS scans (id INTEGER PRIMARY KEY, root TEXT NOT NULL, started INTEGER NOT NULL,
+                                  finished INTEGER);
+CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY, scan_id INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS folders (scan_id INTEGER NOT NULL, path TEXT NOT NULL, file_count INTEGER NOT NULL,
+                                    size INTEGER NOT NULL, average_chaos REAL NOT NULL, tags TEXT NOT NULL,
+                                    archetype TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, scan_id INTEGER NOT NULL, folder TEXT NOT NULL,
+                                  path TEXT NOT NULL, name TEXT NOT NULL, size INTEGER NOT NULL,
+                                  mtime INTEGER NOT NULL, chaos_index REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS file_tags (scan_id INTEGER NOT NULL, file_id INTEGER NOT NULL, tag TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_files_size ON files (size);
+CREATE INDEX IF NOT EXISTS idx_files_mtime ON files (mtime);
+CREATE INDEX IF NOT EXISTS idx_files_chaos ON files (chaos_index);
+CREATE INDEX IF NOT EXISTS idx_files_path ON files (scan_id, path);
+CREATE INDEX IF NOT EXISTS idx_file_tags_tag ON file_tags (tag, file_id);
+CREATE INDEX IF NOT EXISTS idx_file_tags_scan ON file_tags (scan_id);
+CREATE INDEX IF NOT EXISTS idx_folders_chaos ON folders (average_chaos);
+CREATE INDEX IF NOT EXISTS idx_folders_size ON folders (size);
+CREATE INDEX IF NOT EXISTS idx_folders_path ON folders (scan_id, path);
+"""
+
+# Sort keys accepted by the query helpers, mapped to SQL
+FILE_ORDERS = {"size": "f.size DESC", "oldest": "f.mtime ASC", "newest": "f.mtime DESC",
+               "chaos": "f.chaos_index DESC", "path": "r.path, f.path"}
+FOLDER_ORDERS = {"chaos": "d.average_chaos DESC", "size": "d.size DESC", "files": "d.file_count DESC",
+                 "path": "r.path, d.path"}
+
+def connect(path: str = DEFAULT_INDEX_PATH) -> sqlite3.Connection:
+    """Open (creating if needed) an index database"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(path, timeout=60)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    connection.execute("INSERT OR IGNORE INTO meta VALUES ('version', ?)", (str(INDEX_VERSION),))
+    connection.commit()
+    return connection
+
+class IndexWriter:
+    """Records one scan of a root, folder by folder.
+
+    Rows are written under a fresh scan id in batches of INSERT_BATCH, each
+    in its own transaction. ``finish`` then points the root at the new scan
+    and deletes the previous one in a single transaction. Queries always see
+    a complete scan, and batch workers sharing the database only hold the
+    write lock briefly.
+    """
+
+    def __init__(self, root: str, path: str = DEFAULT_INDEX_PATH):
+        self.root = os.path.abspath(root)
+        self.path = path
+        self.connection = connect(path)
+        with self.connection:
+            cursor = self.connection.execute("INSERT INTO scans (root, started) VALUES (?, ?)",
+                                             (self.root, int(time.time())))
+        self.scan_id = cursor.lastrowid
+        self._folders: List[Tuple[Any, ...]] = []
+        self._files: List[Tuple[Any, ...]] = []
+        self._tags: List[Tuple[Any, ...]] = []
+        self._next_file_id = self._max_file_id() + 1
+        self.files_written = 0
+
+    def _max_file_id(self) -> int:
+        row = self.connection.execute("SELECT MAX(id) FROM files").fetchone()
+        return row[0] or 0
+
+    def add(self, entry: InterpretedEntry) -> None:
+        """Buffer one interpreted folder's rows"""
+        folder = entry["path"]
+        total_size = 0
+        chaos_total = 0.0
+        for file in entry["files"]:
+            file_id = self._next_file_id
+            self._next_file_id += 1
+            total_size += file["size"]
+            chaos_total += file["chaos_index"]
+            self._files.append((file_id, self.scan_id, folder,
+                                file["name"] if folder == "." else os.path.join(folder, file["name"]),
+                                file["name"], file["size"], int(file["modified"].timestamp()), file["chaos_index"]))
+            self._tags.extend((self.scan_id, file_id, tag) for tag in file.get("tags", []))
+        count = len(entry["files"])
+        self._folders.append((self.scan_id, folder, count, total_size,
+                              round(chaos_total / count, 2) if count else 0.0,
+                              json.dumps(entry.get("tags", [])), entry["folder_archetype"]))
+        if len(self._files) + len(self._folders) >= INSERT_BATCH:
+            self.flush()
+
+    def flush(self) -> None:
+        connection = self.connection
+        # Take the write lock first: file ids are assigned here, and another scan may have used ours meanwhile
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if self._files and self._files[0][0] <= self._max_file_id():
+                self._renumber()
+            connection.executemany("INSERT INTO folders VALUES (?, ?, ?, ?, ?, ?, ?)", self._folders)
+            connection.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._files)
+            connection.executemany("INSERT INTO file_tags VALUES (?, ?, ?)", self._tags)
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        self.files_written += len(self._files)
+        self._folders, self._files, self._tags = [], [], []
+
+    def _renumber(self) -> None:
+        offset = self._max_file_id() + 1 - self._files[0][0]
+        self._files = [(row[0] + offset,) + row[1:] for row in self._files]
+        self._tags = [(scan_id, file_id + offset, tag) for scan_id, file_id, tag in self._tags]
+        self._next_file_id += offset
+
+    def finish(self) -> None:
+        """Make this scan the root's current one and drop the one it replaces"""
+        self.flush()
+        with self.connection:
+            row = self.connection.execute("SELECT scan_id FROM roots WHERE path = ?", (self.root,)).fetchone()
+            self.connection.execute("INSERT OR REPLACE INTO roots VALUES (?, ?)", (self.root, self.scan_id))
+            self.connection.execute("UPDATE scans SET finished = ? WHERE id = ?", (int(time.time()), self.scan_id))
+            if row is not None:
+                _delete_scan(self.connection, row[0])
+        self.connection.close()
+
+    def abandon(self) -> None:
+        """Delete the rows of a scan that will never finish; the root keeps its previous scan"""
+        self._folders, self._files, self._tags = [], [], []
+        try:
+            with self.connection:
+                _delete_scan(self.connection, self.scan_id)
+        finally:
+            self.connection.close()
+
+    def track(self, entries: Iterable[InterpretedEntry]) -> Iterator[InterpretedEntry]:
+        """Pass entries through unchanged while recording them; finishes the scan at the end.
+
+        If the scan fails or is abandoned part way, its rows are deleted instead.
+        """
+        try:
+            for entry in entries:
+                self.add(entry)
+                yield entry
+        except BaseException:
+            self.abandon()
+            raise
+        self.finish()
+
+def _delete_scan(connection: sqlite3.Connection, scan_id: int) -> None:
+    connection.execute("DELETE FROM file_tags WHERE scan_id = ?", (scan_id,))
+    connection.execute("DELETE FROM files WHERE scan_id = ?", (scan_id,))
+    connection.execute("DELETE FROM folders WHERE scan_id = ?", (scan_id,))
+    connection.execute("DELETE FROM scans WHERE id = ?", (scan_id,))
+
+def index_structure(root: str, structure: Iterable[InterpretedEntry], path: str = DEFAULT_INDEX_PATH) -> int:
+    """Store a whole interpreted structure, returning the number of files written"""
+    writer = IndexWriter(root, path)
+    try:
+        for entry in structure:
+            writer.add(entry)
+    except BaseException:
+        writer.abandon()
+        raise
+    writer.finish()
+    return writer.files_written
+
+class ScanIndex:
+    """Read-only queries over the current scan of every indexed root"""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No scan index at {path}; scan with scan_index: true (or --index) first")
+        self.connection = connect(path)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def roots(self) -> List[Dict[str, Any]]:
+        rows = self.connection.execute(
+            "SELECT r.path AS root, s.finished AS scanned, "
+            "(SELECT COUNT(*) FROM files f WHERE f.scan_id = r.scan_id) AS files "
+            "FROM roots r JOIN scans s ON s.id = r.scan_id ORDER BY r.path")
+        return [dict(row) for row in rows]
+
+    def files(self, tag: Optional[str] = None, older_than_days: Optional[float] = None,
+              min_size: Optional[int] = None, min_chaos: Optional[float] = None, root: Optional[str] = None,
+              path_prefix: Optional[str] = None, order: str = "size", limit: Optional[int] = 20
+              ) -> List[Dict[str, Any]]:
+        """Files matching every given filter, e.g. the largest #cache files older than a year"""
+        clauses: List[str] = []
+        params: List[Any] = []
+        if tag is not None:
+            clauses.append("f.id IN (SELECT file_id FROM file_tags WHERE tag = ?)")
+            params.append(tag)
+        if older_than_days is not None:
+            clauses.append("f.mtime < ?")
+            params.append(int(time.time() - older_than_days * 86400))
+        if min_size is not None:
+            clauses.append("f.size >= ?")
+            params.append(min_size)
+        if min_chaos is not None:
+            clauses.append("f.chaos_index >= ?")
+            params.append(min_chaos)
+        if root is not None:
+            clauses.append("r.path = ?")
+            params.append(os.path.abspath(root))
+        if path_prefix is not None:
+            clauses.append("f.path >= ? AND f.path < ?")
+            params += [path_prefix, path_prefix + "\U0010ffff"]
+        sql = ("SELECT r.path AS root, f.id, f.path, f.size, f.mtime, f.chaos_index, "
+               "(SELECT group_concat(tag, ' ') FROM file_tags t WHERE t.file_id = f.id) AS tags "
+               "FROM files f JOIN roots r ON r.scan_id = f.scan_id")
+        return self._select(sql, clauses, params, FILE_ORDERS, order, limit)
+
+    def folders(self, min_chaos: Optional[float] = None, min_size: Optional[int] = None,
+                root: Optional[str] = None, order: str = "chaos", limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """Folders matching every given filter, e.g. those with average chaos above 7"""
+        clauses: List[str] = []
+        params: List[Any] = []
+        if min_chaos is not None:
+            clauses.append("d.average_chaos > ?")
+            params.append(min_chaos)
+        if min_size is not None:
+            clauses.append("d.size >= ?")
+            params.append(min_size)
+        if root is not None:
+            clauses.append("r.path = ?")
+            params.append(os.path.abspath(root))
+        sql = ("SELECT r.path AS root, d.path, d.file_count, d.size, d.average_chaos, d.tags, d.archetype "
+               "FROM folders d JOIN roots r ON r.scan_id = d.scan_id")
+        return self._select(sql, clauses, params, FOLDER_ORDERS, order, limit)
+
+    def _select(self, sql: str, clauses: List[str], params: List[Any], orders: Dict[str, str], order: str,
+                limit: Optional[int]) -> List[Dict[str, Any]]:
+        if order not in orders:
+            raise ValueError(f"Unknown order '{order}', expected one of: {', '.join(orders)}")
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {orders[order]}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+def _print_rows(rows: List[Dict[str, Any]], kind: str) -> None:
+    if not rows:
+        print("🌌 Nothing in the index matches.")
+        return
+    for row in rows:
+        if kind == "files":
+            modified = time.strftime("%Y-%m-%d", time.localtime(row["mtime"]))
+            print(f"{format_file_size(row['size']):>10}  {modified}  chaos {row['chaos_index']:>4.1f}  "
+                  f"{os.path.join(row['root'], row['path'])}  {row['tags'] or ''}".rstrip())
+        elif kind == "folders":
+            print(f"{format_file_size(row['size']):>10}  {row['file_count']:>6} files  "
+                  f"chaos {row['average_chaos']:>4.1f}  {os.path.join(row['root'], row['path'])}")
+        else:
+            scanned = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["scanned"])) if row["scanned"] else "?"
+            print(f"{row['files']:>10} files  {scanned}  {row['root']}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Query the FileSage scan index without rescanning")
+    parser.add_argument("--db", default=DEFAULT_INDEX_PATH, help=f"index database (default: {DEFAULT_INDEX_PATH})")
+    parser.add_argument("--json", action="store_true", help="print rows as JSON")
+    # Also accepted after the subcommand; SUPPRESS keeps the subparser from resetting the top-level flag
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--json", action="store_true", default=argparse.SUPPRESS, help="print rows as JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    files = commands.add_parser("files", parents=[output], help="find files, e.g.: files --tag '#cache' --older-than 365")
+    files.add_argument("--tag")
+    files.add_argument("--older-than", type=float, metavar="DAYS")
+    files.add_argument("--min-size", type=int, metavar="BYTES")
+    files.add_argument("--min-chaos", type=float)
+    files.add_argument("--root")
+    files.add_argument("--under", metavar="PATH", help="only files below this root-relative folder")
+    files.add_argument("--order", choices=sorted(FILE_ORDERS), default="size")
+    files.add_argument("--limit", type=int, default=20)
+
+    folders = commands.add_parser("folders", parents=[output], help="find folders, e.g.: folders --min-chaos 7")
+    folders.add_argument("--min-chaos", type=float, help="average chaos strictly above this")
+    folders.add_argument("--min-size", type=int, metavar="BYTES")
+    folders.add_argument("--root")
+    folders.add_argument("--order", choices=sorted(FOLDER_ORDERS), default="chaos")
+    folders.add_argument("--limit", type=int, default=20)
+
+    commands.add_parser("roots", parents=[output], help="list indexed roots")
+    args = parser.parse_args(argv)
+
+    try:
+        index = ScanIndex(args.db)
+    except FileNotFoundError as e:
+        print(e)
+        return 1
+    try:
+        if args.command == "files":
+            under = args.under.rstrip("/" + os.sep) + os.sep if args.under else None
+            rows = index.files(args.tag, args.older_than, args.min_size, args.min_chaos, args.root, under,
+                               args.order, args.limit)
+        elif args.command == "folders":
+            rows = index.folders(args.min_chaos, args.min_size, args.root, args.order, args.limit)
+        else:
+            rows = index.roots()
+    finally:
+        index.close()
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        _print_rows(rows, args.command)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
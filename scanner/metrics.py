@@ -0,0 +1,186 @@
+# FileSage Metrics
+# Optional per-stage instrumentation, JSON metrics sidecars and cProfile dumps
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is then reported as None
+    resource = None
+
+T = TypeVar("T")
+
+METRICS_VERSION = 1
+PIPELINE_STAGES = ("walk", "interpret", "edwardize", "write")
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+class StageMetrics:
+    """Counters for one pipeline stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.dirs = 0
+        self.files = 0
+        self.stat_failures = 0
+        self.bytes_written = 0
+        self.peak_rss_mb: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "seconds": round(self.seconds, 6),
+            "dirs": self.dirs,
+            "files": self.files,
+            "dirs_per_second": round(self.dirs / self.seconds, 1) if self.seconds else None,
+            "files_per_second": round(self.files / self.seconds, 1) if self.seconds else None,
+            "stat_failures": self.stat_failures,
+            "bytes_written": self.bytes_written,
+            "peak_rss_mb": round(self.peak_rss_mb, 1) if self.peak_rss_mb is not None else None
+        }
+
+class PipelineMetrics:
+    """Per-stage wall time and counters for the scan pipeline.
+
+    Disabled by default: instrumented functions check ``enabled`` once per
+    call and otherwise run untouched. When enabled, stages are timed with a
+    stack so each stage is charged only its own time; a streaming writer
+    pulling entries through edwardize, interpret and walk generators gets
+    the time of each generator attributed to that generator.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.stages: Dict[str, StageMetrics] = {}
+        self.started: Optional[datetime] = None
+        self._stack: List[StageMetrics] = []
+        self._mark = 0.0
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        """Start recording, discarding anything recorded before"""
+        self.stages = {name: StageMetrics(name) for name in PIPELINE_STAGES}
+        self.started = datetime.now()
+        self._stack = []
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def stage(self, name: str) -> StageMetrics:
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = StageMetrics(name)
+        return stage
+
+    def _enter(self, stage: StageMetrics) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            self._stack[-1].seconds += now - self._mark
+        self._stack.append(stage)
+        self._mark = now
+
+    def _exit(self) -> None:
+        now = time.perf_counter()
+        stage = self._stack.pop()
+        stage.seconds += now - self._mark
+        stage.peak_rss_mb = peak_rss_mb()
+        self._mark = now
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[Optional[StageMetrics]]:
+        """Charge the enclosed block to a stage (a no-op while disabled)"""
+        if not self.enabled:
+            yield None
+            return
+        stage = self.stage(name)
+        self._enter(stage)
+        try:
+            yield stage
+        finally:
+            self._exit()
+
+    def track(self, name: str, entries: Iterable[T]) -> Iterator[T]:
+        """Time a stage's iterator and count the folders and files it yields"""
+        stage = self.stage(name)
+        iterator = iter(entries)
+        while True:
+            self._enter(stage)
+            try:
+                entry = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._exit()
+            stage.dirs += 1
+            stage.files += len(entry["files"])  # type: ignore[index]
+            yield entry
+
+    def record_write(self, name: str, dirs: int, files: int, *output_paths: str) -> None:
+        """Record what a writer produced once its output files are closed"""
+        stage = self.stage(name)
+        stage.dirs += dirs
+        stage.files += files
+        for path in output_paths:
+            try:
+                stage.bytes_written += os.path.getsize(path)
+            except OSError:
+                pass
+
+    def add_stat_failure(self, name: str = "walk") -> None:
+        # Called from scanner threads
+        with self._lock:
+            self.stage(name).stat_failures += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": METRICS_VERSION,
+            "started": self.started.isoformat(timespec="seconds") if self.started else None,
+            "total_seconds": round(sum(stage.seconds for stage in self.stages.values()), 6),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": {name: stage.to_dict() for name, stage in self.stages.items()}
+        }
+
+    def write_json(self, path: str) -> None:
+        """Write the metrics as a JSON sidecar"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+METRICS = PipelineMetrics()
+
+def sidecar_path(report_path: str, suffix: str) -> str:
+    """``output/foo_structure.md`` → ``output/foo_structure<suffix>``"""
+    return os.path.splitext(report_path)[0] + suffix
+
+@contextmanager
+def profiled(dump_path: Optional[str]) -> Iterator[None]:
+    """Run the enclosed block under cProfile and dump stats to ``dump_path`` (no-op when None)"""
+    if dump_path is None:
+        yield
+        return
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        directory = os.path.dirname(dump_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(dump_path)
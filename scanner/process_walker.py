@@ -0,0 +1,186 @@
+# FileSage Process Walker
+# Scans one skewed tree on every core: folders are shared out to idle worker processes as they appear
+import os
+import queue
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, TYPE_CHECKING
+
+from .ignore import IgnoreMatcher
+from .rules import TagRules
+from .walker import DirectoryEntry, _join_rel, scan_directory
+
+if TYPE_CHECKING:
+    from .interpreter import InterpretedEntry
+
+# Folders a worker scans before sending them back in one message
+DEFAULT_RESULT_BATCH = 64
+# Out-of-turn folders the consumer holds before workers stop sharing new folders
+DEFAULT_MAX_BUFFERED = 4096
+# How often a waiting consumer checks that the workers are still alive
+_POLL_SECONDS = 1.0
+# Grace period for workers to notice a stop before they are terminated
+_JOIN_SECONDS = 5.0
+
+Task = Tuple[str, IgnoreMatcher]
+# (path, entry or None when the folder could not be listed, child paths in scan order)
+FolderResult = Tuple[str, Optional[Union[DirectoryEntry, "InterpretedEntry"]], List[str]]
+
+def _worker(root: str, rules: Optional[TagRules], interpret: bool, batch_size: int,
+            tasks: Any, results: Any, hungry: Any, paused: Any, stop: Any) -> None:
+    """Scan folders depth first from a private stack, handing the shallowest ones to idle workers.
+
+    ``hungry`` counts workers waiting on ``tasks`` minus tasks already
+    waiting for them, so a busy worker only shares what will be picked up
+    straight away and otherwise keeps its folders local. Nothing is shared
+    while ``paused`` is set.
+    """
+    if interpret:
+        from .interpreter import interpret_entry
+    try:
+        while not stop.is_set():
+            with hungry.get_lock():
+                hungry.value += 1
+            task = tasks.get()
+            if task is None:
+                break
+            local: List[Task] = [task]
+            batch: List[FolderResult] = []
+            while local and not stop.is_set():
+                rel_root, matcher = local.pop()
+                scanned = scan_directory(root, rel_root, matcher, rules=rules)
+                if scanned is None:
+                    batch.append((rel_root, None, []))
+                else:
+                    entry, subdirs, child_matcher = scanned
+                    children = [_join_rel(rel_root, d) for d in subdirs]
+                    batch.append((rel_root, interpret_entry(entry) if interpret else entry, children))
+                    local.extend((child, child_matcher) for child in reversed(children))
+                if len(local) > 1 and not paused.is_set():
+                    # Read and claim under one lock, so two workers never serve the same idle one
+                    with hungry.get_lock():
+                        share = max(0, min(hungry.value, len(local) - 1))
+                        hungry.value -= share
+                    # The bottom of the stack holds the shallowest folders, usually the biggest subtrees
+                    for shared in local[:share]:
+                        tasks.put(shared)
+                    del local[:share]
+                if len(batch) >= batch_size or not local:
+                    results.put(("batch", batch))
+                    batch = []
+    except BaseException as e:  # Handed to the consuming process
+        results.put(("error", e))
+    if stop.is_set():
+        # Nobody reads the remaining results; don't wait to flush them on exit
+        results.cancel_join_thread()
+
+class ProcessWalker:
+    """Scans a tree on a pool of worker processes that share folders as they are discovered.
+
+    Splitting by top-level folder leaves workers idle next to one giant
+    subtree. Here every worker walks depth first from its own stack and,
+    whenever another worker is waiting, moves its shallowest pending folders
+    to a shared queue, so a huge subtree is split as soon as a core frees
+    up. Each folder's scan, tagging and (with ``interpret``) chaos scoring
+    happen in the worker. Results are reassembled in ``os.walk`` order, so
+    the output matches the other engines; folders that finish ahead of
+    their turn are buffered until it comes.
+
+    Once ``max_buffered`` folders are waiting, workers stop sharing until
+    the buffer drains to half. That is a soft cap: each running worker
+    still finishes the subtrees it holds, so the buffer can grow past it
+    by what the workers already had in hand, and in the worst case (one
+    huge folder scanned last) up to the whole tree, as a serial scan
+    that kept its results would.
+    """
+
+    def __init__(self, root: str, matcher: IgnoreMatcher, rules: Optional[TagRules] = None,
+                 workers: Optional[int] = None, interpret: bool = False, batch_size: int = DEFAULT_RESULT_BATCH,
+                 max_buffered: int = DEFAULT_MAX_BUFFERED):
+        self.root = root
+        self.matcher = matcher
+        self.rules = rules
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.interpret = interpret
+        self.batch_size = max(1, batch_size)
+        self.max_buffered = max(1, max_buffered)
+
+    def entries(self) -> Iterator[Any]:
+        """Yield every folder top-down, in os.walk order"""
+        import multiprocessing
+        context = multiprocessing.get_context()
+        tasks = context.Queue()
+        results = context.Queue()
+        hungry = context.Value("i", -1)  # the root task below is already waiting
+        paused = context.Event()
+        stop = context.Event()
+        tasks.put(('.', self.matcher))
+        processes = [context.Process(target=_worker, name=f"filesage-scan-{number}", daemon=True,
+                                     args=(self.root, self.rules, self.interpret, self.batch_size,
+                                           tasks, results, hungry, paused, stop))
+                     for number in range(self.workers)]
+        for process in processes:
+            process.start()
+        try:
+            buffered: Dict[str, Tuple[Any, List[str]]] = {}
+            stack = ['.']
+            while stack:
+                rel_root = stack.pop()
+                while rel_root not in buffered:
+                    for path, entry, children in self._receive(results, processes):
+                        buffered[path] = (entry, children)
+                    if len(buffered) >= self.max_buffered:
+                        paused.set()
+                entry, children = buffered.pop(rel_root)
+                if paused.is_set() and len(buffered) <= self.max_buffered // 2:
+                    paused.clear()
+                if entry is None:
+                    continue
+                yield entry
+                stack.extend(reversed(children))
+        finally:
+            stop.set()
+            for _ in processes:
+                tasks.put(None)
+            for process in processes:
+                process.join(_JOIN_SECONDS)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+            tasks.cancel_join_thread()
+
+    def _receive(self, results: Any, processes: List[Any]) -> List[FolderResult]:
+        while True:
+            try:
+                kind, value = results.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                # Workers only exit once the scan is over, so any exit now means one died
+                dead = [process for process in processes if process.exitcode is not None]
+                if dead:
+                    raise RuntimeError(f"Scan worker {dead[0].name} exited unexpectedly "
+                                       f"(exit code {dead[0].exitcode})")
+                continue
+            if kind == "error":
+                raise value
+            return value
+
+def iter_process(path: str, matcher: IgnoreMatcher, rules: Optional[TagRules] = None,
+                 workers: Optional[int] = None) -> Iterator[DirectoryEntry]:
+    """Process-pool counterpart of the other engines: DirectoryEntries in os.walk order"""
+    return ProcessWalker(path, matcher, rules, workers).entries()
+
+def interpret_directory(path: str, workers: Optional[int] = None) -> Iterator["InterpretedEntry"]:
+    """Scan and interpret a tree in one process-pool pass.
+
+    Equivalent to ``iter_interpret(iter_directory(path, engine="process"))``,
+    but chaos scoring and archetypes are computed in the workers too, so the
+    CPU-bound half of the pipeline scales across cores as well.
+    """
+    from .metrics import METRICS
+    from .settings import load_settings
+    from .walker import build_ignore_matcher, compile_rules
+    settings = load_settings()
+    if workers is None:
+        workers = settings.get("scan_processes")
+    walker = ProcessWalker(path, build_ignore_matcher(settings), compile_rules(settings).tags, workers,
+                           interpret=True)
+    entries = walker.entries()
+    return METRICS.track("interpret", entries) if METRICS.enabled else entries
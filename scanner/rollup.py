@@ -0,0 +1,96 @@
+# FileSage Subtree Rollups
+# Recursive per-folder totals (like du) computed bottom-up as folders stream past
+import os
+from typing import Dict, Iterable, List, TypedDict
+
+from .interpreter import InterpretedEntry
+
+class SubtreeRollup(TypedDict):
+    path: str
+    folders: int
+    files: int
+    size: int
+    chaos_total: float        # sum of chaos indices, for the plain average when every file is empty
+    weighted_chaos: float     # sum of size * chaos index
+    tag_counts: Dict[str, int]
+
+def folder_rollup(entry: InterpretedEntry) -> SubtreeRollup:
+    """A folder's own totals, before anything below it is added"""
+    size = 0
+    chaos_total = 0.0
+    weighted_chaos = 0.0
+    tag_counts: Dict[str, int] = {}
+    for file in entry["files"]:
+        size += file["size"]
+        chaos_total += file["chaos_index"]
+        weighted_chaos += file["size"] * file["chaos_index"]
+        for tag in file.get("tags", []):
+            tag_counts[tag] = tag_counts.get(tag, 0) + 1
+    return {"path": entry["path"], "folders": 1, "files": len(entry["files"]), "size": size,
+            "chaos_total": chaos_total, "weighted_chaos": weighted_chaos, "tag_counts": tag_counts}
+
+def subtree_chaos(rollup: SubtreeRollup) -> float:
+    """Size-weighted average chaos of a subtree, falling back to the plain average when it holds no bytes"""
+    if rollup["size"]:
+        return round(rollup["weighted_chaos"] / rollup["size"], 2)
+    return round(rollup["chaos_total"] / rollup["files"], 2) if rollup["files"] else 0.0
+
+def add_rollup(parent: SubtreeRollup, child: SubtreeRollup) -> None:
+    """Fold a completed child subtree into its parent's totals"""
+    parent["folders"] += child["folders"]
+    parent["files"] += child["files"]
+    parent["size"] += child["size"]
+    parent["chaos_total"] += child["chaos_total"]
+    parent["weighted_chaos"] += child["weighted_chaos"]
+    tag_counts = parent["tag_counts"]
+    for tag, count in child["tag_counts"].items():
+        tag_counts[tag] = tag_counts.get(tag, 0) + count
+
+def _within(path: str, ancestor: str) -> bool:
+    return ancestor == "." or path.startswith(ancestor + os.sep)
+
+class RollupAccumulator:
+    """Post-order rollups from folders fed in walk (pre-)order, in one pass.
+
+    Every engine yields a folder before anything below it and finishes a
+    subtree before moving to a sibling. A stack of the open ancestors is
+    therefore enough: when the next folder is not inside the top of the
+    stack, that subtree is complete and is folded into its parent. Memory
+    follows the tree's depth, not its size, and subtrees come out in the
+    order ``du`` prints them.
+    """
+
+    def __init__(self) -> None:
+        self._stack: List[SubtreeRollup] = []
+
+    def add(self, own: SubtreeRollup) -> List[SubtreeRollup]:
+        """Open a folder with its own totals; returns the subtrees this completes"""
+        finished: List[SubtreeRollup] = []
+        while self._stack and not _within(own["path"], self._stack[-1]["path"]):
+            finished.append(self._close())
+        self._stack.append(own)
+        return finished
+
+    def finish(self) -> List[SubtreeRollup]:
+        """Complete every subtree still open, ending with the root"""
+        finished: List[SubtreeRollup] = []
+        while self._stack:
+            finished.append(self._close())
+        return finished
+
+    def _close(self) -> SubtreeRollup:
+        done = self._stack.pop()
+        if self._stack:
+            add_rollup(self._stack[-1], done)
+        return done
+
+def compute_rollups(structure: Iterable[InterpretedEntry]) -> Dict[str, SubtreeRollup]:
+    """Every folder's recursive totals, keyed by path"""
+    accumulator = RollupAccumulator()
+    rollups: Dict[str, SubtreeRollup] = {}
+    for entry in structure:
+        for rollup in accumulator.add(folder_rollup(entry)):
+            rollups[rollup["path"]] = rollup
+    for rollup in accumulator.finish():
+        rollups[rollup["path"]] = rollup
+    return rollups
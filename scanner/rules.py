@@ -0,0 +1,328 @@
+# FileSage Rule Engine
+# Compiles tag and chaos rules from settings.yaml into fast lookup structures
+import json
+import re
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Pattern, Sequence, Tuple
+
+# Built-in rules, used when settings.yaml does not define its own
+DEFAULT_TAG_RULES: List[Dict[str, Any]] = [
+    {"tag": "#workflow", "path_prefixes": [".github"], "extensions": [".yml", ".yaml"]},
+    {"tag": "#cache", "path_contains": ["__pycache__"], "extensions": [".pyc"]},
+    {"tag": "#documentation", "path_contains": ["docs"], "extensions": [".md"], "folder_from_files": True},
+    {"tag": "#validation_asset", "path_contains": ["test"], "name_prefixes": ["test_"], "folder_from_files": True},
+    {"tag": "#config", "path_contains": ["config"], "extensions": [".yml", ".yaml", ".json", ".ini"]},
+    {"tag": "#composite_action", "name_contains": ["util", "helper", "tool"]}
+]
+
+DEFAULT_CHAOS_RULES: Dict[str, Any] = {
+    "base": 1.0,
+    "cap": 10.0,
+    "size_thresholds": [{"above": 100000, "score": 3.0}, {"above": 10000, "score": 1.5}],
+    "age_thresholds": [{"above_days": 365, "score": 1.5}, {"above_days": 90, "score": 0.8}],
+    "tag_weights": [
+        {"tag": "#cache", "score": 3.5},
+        {"tag": "#workflow", "score": 1.2},
+        {"tag": "#validation_asset", "score": 0.5},
+        {"tag": "#documentation", "score": 0.8},
+        {"tag": "#config", "score": 1.0},
+        {"tag": "#composite_action", "score": 2.0}
+    ],
+    "name_rules": [
+        {"contains": ["temp", "tmp", "backup", "old", "copy"], "score": 2.0},
+        {"contains": ["requirements"], "score": 4.7},
+        {"suffixes": [".pyc", ".pyo", ".pyd"], "score": 3.2}
+    ],
+    "extension_weights": {".py": 0.5, ".txt": 1.0, ".md": 1.0, ".pdf": 2.5, ".doc": 2.5, ".docx": 2.5},
+    "default_extension_weight": 1.8,
+    "content_thresholds": {
+        "lines": [{"above": 1000, "score": 1.0}, {"above": 300, "score": 0.5}],
+        "imports": [{"above": 25, "score": 0.8}, {"above": 10, "score": 0.3}],
+        "max_depth": [{"above": 6, "score": 1.2}, {"above": 4, "score": 0.5}],
+        "todo_density": [{"above": 2.0, "score": 1.0}, {"above": 0.5, "score": 0.4}]
+    }
+}
+
+# Per-name memo tables are dropped once they grow past this many entries
+NAME_MEMO_LIMIT = 100000
+
+def file_extension(name: str) -> str:
+    """Everything from the last dot, or '' when there is none"""
+    dot = name.rfind(".")
+    return name[dot:] if dot >= 0 else ""
+
+def age_in_days(modified: datetime, now: datetime) -> int:
+    """Whole days between two naive local times, on the wall clock (a DST day still counts as one)"""
+    return (now - modified).days
+
+def _lookahead_regex(groups: Sequence[Tuple[str, List[str]]]) -> Optional[Pattern[str]]:
+    """One regex with an optional lookahead per named group, so a single match reports every group that applies"""
+    parts = [f"(?:(?={'|'.join(alternatives)}))?" for _, alternatives in groups if alternatives]
+    if not parts:
+        return None
+    return re.compile("".join(parts), re.DOTALL)
+
+def _named(name: str, alternatives: List[str]) -> List[str]:
+    return [f"(?P<{name}>{'|'.join(alternatives)})"] if alternatives else []
+
+def _name_conditions(rule: Dict[str, Any], fold: bool) -> Tuple[List[str], List[str]]:
+    """A rule's plain extensions and its other name conditions as regex alternatives, lowercased if ``fold``"""
+    case = str.lower if fold else str
+    extensions: List[str] = []
+    alts = [re.escape(case(p)) for p in rule.get("name_prefixes", [])]
+    alts += [".*?" + re.escape(case(p)) for p in rule.get("name_contains", [])]
+    for ext in rule.get("extensions", []):
+        ext = case(ext)
+        if ext.count(".") == 1 and ext.startswith("."):
+            extensions.append(ext)
+        else:
+            alts.append(".*" + re.escape(ext) + "$")
+    alts += [".*" + re.escape(case(p)) + "$" for p in rule.get("name_suffixes", [])]
+    alts += [f"(?:{p})" for p in rule.get("name_regex", [])]
+    return extensions, alts
+
+class TagRules:
+    """Compiled tag rules.
+
+    Path conditions (``path_prefixes``, ``path_contains``) are evaluated once
+    per folder into a bitmask. Per file, tags come from one extension hash
+    lookup and one combined name regex, memoised per distinct name, so the
+    classification cost does not grow with the number of rules.
+
+    File tags match names case-insensitively, but ``folder_from_files``
+    matches them case-sensitively, as folder tagging always has: a folder
+    holding only ``README.MD`` is not tagged as documentation.
+    """
+
+    def __init__(self, rule_defs: List[Dict[str, Any]]):
+        self.tags: List[str] = [rule["tag"] for rule in rule_defs]
+        self._extensions: Dict[str, int] = {}
+        self._folder_extensions: Dict[str, int] = {}
+        self._folder_path_mask = 0
+        self._folder_file_mask = 0
+        path_groups: List[Tuple[str, List[str]]] = []
+        name_groups: List[Tuple[str, List[str]]] = []
+        folder_name_groups: List[Tuple[str, List[str]]] = []
+
+        for bit, rule in enumerate(rule_defs):
+            mask = 1 << bit
+            path_alts = [re.escape(p) for p in rule.get("path_prefixes", [])]
+            path_alts += [".*?" + re.escape(p) for p in rule.get("path_contains", [])]
+            if path_alts:
+                self._folder_path_mask |= mask
+            path_groups.append((f"t{bit}", _named(f"t{bit}", path_alts)))
+
+            extensions, name_alts = _name_conditions(rule, fold=True)
+            for ext in extensions:
+                self._extensions[ext] = self._extensions.get(ext, 0) | mask
+            name_groups.append((f"t{bit}", _named(f"t{bit}", name_alts)))
+            if rule.get("folder_from_files", False):
+                self._folder_file_mask |= mask
+                extensions, name_alts = _name_conditions(rule, fold=False)
+                for ext in extensions:
+                    self._folder_extensions[ext] = self._folder_extensions.get(ext, 0) | mask
+                folder_name_groups.append((f"t{bit}", _named(f"t{bit}", name_alts)))
+
+        self._path_regex = _lookahead_regex(path_groups)
+        self._name_regex = _lookahead_regex(name_groups)
+        self._folder_name_regex = _lookahead_regex(folder_name_groups)
+        self._name_masks: Dict[str, int] = {}
+        self._folder_name_masks: Dict[str, int] = {}
+        self._mask_tags: Dict[int, Tuple[str, ...]] = {}
+
+    def path_mask(self, rel_root: str) -> int:
+        """Bitmask of rules whose path conditions match a folder"""
+        if self._path_regex is None:
+            return 0
+        return self._groups_mask(self._path_regex.match(rel_root))
+
+    def name_mask(self, name: str) -> int:
+        """Bitmask of rules whose name or extension conditions match a file"""
+        mask = self._name_masks.get(name)
+        if mask is None:
+            lowered = name.lower()
+            mask = self._extensions.get(file_extension(lowered), 0)
+            if self._name_regex is not None:
+                mask |= self._groups_mask(self._name_regex.match(lowered))
+            if len(self._name_masks) >= NAME_MEMO_LIMIT:
+                self._name_masks.clear()
+            self._name_masks[name] = mask
+        return mask
+
+    def folder_name_mask(self, name: str) -> int:
+        """Bitmask of folder_from_files rules matching a file name exactly as written"""
+        mask = self._folder_name_masks.get(name)
+        if mask is None:
+            mask = self._folder_extensions.get(file_extension(name), 0)
+            if self._folder_name_regex is not None:
+                mask |= self._groups_mask(self._folder_name_regex.match(name))
+            if len(self._folder_name_masks) >= NAME_MEMO_LIMIT:
+                self._folder_name_masks.clear()
+            self._folder_name_masks[name] = mask
+        return mask
+
+    def tags_for_mask(self, mask: int) -> List[str]:
+        tags = self._mask_tags.get(mask)
+        if tags is None:
+            tags = tuple(tag for bit, tag in enumerate(self.tags) if mask >> bit & 1)
+            self._mask_tags[mask] = tags
+        return list(tags)
+
+    def file_tags(self, path_mask: int, name: str) -> List[str]:
+        """Tags for a file, given its folder's path mask"""
+        return self.tags_for_mask(path_mask | self.name_mask(name))
+
+    def folder_tags(self, path_mask: int, file_names: List[str]) -> List[str]:
+        """Tags for a folder from its path conditions and, where enabled, its files"""
+        mask = path_mask & self._folder_path_mask
+        wanted = self._folder_file_mask & ~mask
+        for name in file_names:
+            if not wanted:
+                break
+            hit = self.folder_name_mask(name) & wanted
+            mask |= hit
+            wanted &= ~hit
+        return self.tags_for_mask(mask)
+
+    @staticmethod
+    def _groups_mask(match: Optional["re.Match[str]"]) -> int:
+        mask = 0
+        if match is not None:
+            for group, value in match.groupdict().items():
+                if value is not None:
+                    mask |= 1 << int(group[1:])
+        return mask
+
+class ChaosRules:
+    """Compiled chaos index rules.
+
+    Size and age use ordered threshold lists, tag weights a priority table,
+    and the name-based terms (name rules plus the extension weight) are
+    computed with one regex and one hash lookup, memoised per file name.
+    Files analysed by the content stage also score against
+    ``content_thresholds``.
+    """
+
+    def __init__(self, defs: Dict[str, Any]):
+        self.base = float(defs.get("base", 1.0))
+        self.cap = float(defs.get("cap", 10.0))
+        self.size_thresholds = [(t["above"], float(t["score"])) for t in defs.get("size_thresholds", [])]
+        self.size_thresholds.sort(reverse=True)
+        self.age_thresholds = [(t["above_days"], float(t["score"])) for t in defs.get("age_thresholds", [])]
+        self.age_thresholds.sort(reverse=True)
+        self.tag_weights: Dict[str, Tuple[int, float]] = {}
+        for priority, weight in enumerate(defs.get("tag_weights", [])):
+            self.tag_weights.setdefault(weight["tag"], (priority, float(weight["score"])))
+        self.extension_weights = {ext.lower(): float(score) for ext, score in defs.get("extension_weights", {}).items()}
+        self.default_extension_weight = float(defs.get("default_extension_weight", 0.0))
+
+        self._name_scores: List[float] = []
+        groups: List[Tuple[str, List[str]]] = []
+        for index, rule in enumerate(defs.get("name_rules", [])):
+            alts = [".*?" + re.escape(p.lower()) for p in rule.get("contains", [])]
+            alts += [re.escape(p.lower()) for p in rule.get("prefixes", [])]
+            alts += [".*" + re.escape(p.lower()) + "$" for p in rule.get("suffixes", [])]
+            alts += [f"(?:{p})" for p in rule.get("regex", [])]
+            groups.append((f"n{index}", _named(f"n{index}", alts)))
+            self._name_scores.append(float(rule["score"]))
+        self._name_regex = _lookahead_regex(groups)
+        self._name_terms: Dict[str, Tuple[float, ...]] = {}
+        self.content_thresholds: List[Tuple[str, List[Tuple[float, float]]]] = []
+        for metric, thresholds in defs.get("content_thresholds", {}).items():
+            ordered = sorted(((t["above"], float(t["score"])) for t in thresholds), reverse=True)
+            self.content_thresholds.append((metric, ordered))
+
+    def size_score(self, size: int) -> float:
+        for above, score in self.size_thresholds:
+            if size > above:
+                return score
+        return 0.0
+
+    def age_score(self, age_days: int) -> float:
+        for above, score in self.age_thresholds:
+            if age_days > above:
+                return score
+        return 0.0
+
+    def tag_score(self, tags: List[str]) -> float:
+        best: Optional[Tuple[int, float]] = None
+        for tag in tags:
+            weight = self.tag_weights.get(tag)
+            if weight is not None and (best is None or weight[0] < best[0]):
+                best = weight
+        return best[1] if best is not None else 0.0
+
+    def content_score(self, content: Dict[str, Any]) -> float:
+        """Sum of the first matching threshold of every content metric"""
+        score = 0.0
+        for metric, thresholds in self.content_thresholds:
+            value = content.get(metric, 0)
+            for above, points in thresholds:
+                if value > above:
+                    score += points
+                    break
+        return score
+
+    def name_terms(self, name: str) -> Tuple[float, ...]:
+        """Name-rule scores followed by the extension weight, in rule order"""
+        terms = self._name_terms.get(name)
+        if terms is None:
+            lowered = name.lower()
+            scores: List[float] = []
+            if self._name_regex is not None:
+                match = self._name_regex.match(lowered)
+                if match is not None:
+                    # groupdict() follows definition order, which is rule order
+                    scores = [self._name_scores[int(group[1:])]
+                              for group, value in match.groupdict().items() if value is not None]
+            scores.append(self.extension_weights.get(file_extension(lowered), self.default_extension_weight))
+            terms = tuple(scores)
+            if len(self._name_terms) >= NAME_MEMO_LIMIT:
+                self._name_terms.clear()
+            self._name_terms[name] = terms
+        return terms
+
+    def score(self, name: str, size: int, modified: Optional[datetime], tags: List[str],
+              now: Optional[datetime] = None, content: Optional[Dict[str, Any]] = None) -> float:
+        chaos = self.base
+        chaos += self.size_score(size)
+        if modified is not None:
+            chaos += self.age_score(age_in_days(modified, now or datetime.now()))
+        chaos += self.tag_score(tags)
+        for term in self.name_terms(name):
+            chaos += term
+        if content:
+            chaos += self.content_score(content)
+        return min(chaos, self.cap)
+
+class RuleSet(NamedTuple):
+    tags: TagRules
+    chaos: ChaosRules
+
+_compiled: Dict[str, RuleSet] = {}
+# The settings dict compiled last; load_settings hands out the same one, so repeat calls skip the JSON key
+_last: Optional[Tuple[Dict[str, Any], RuleSet]] = None
+_default: Optional[RuleSet] = None
+
+def compile_rules(settings: Dict[str, Any]) -> RuleSet:
+    """Compile (once per distinct definition) the tag and chaos rules in settings"""
+    global _last
+    if _last is not None and _last[0] is settings:
+        return _last[1]
+    tag_defs = settings.get("tag_rules") or DEFAULT_TAG_RULES
+    chaos_defs = settings.get("chaos_rules") or DEFAULT_CHAOS_RULES
+    key = json.dumps([tag_defs, chaos_defs], sort_keys=True)
+    rules = _compiled.get(key)
+    if rules is None:
+        rules = RuleSet(TagRules(tag_defs), ChaosRules(chaos_defs))
+        _compiled[key] = rules
+    _last = (settings, rules)
+    return rules
+
+def default_rules() -> RuleSet:
+    """The rules from config/settings.yaml, compiled on first use"""
+    global _default
+    if _default is None:
+        from .settings import load_settings
+        _default = compile_rules(load_settings())
+    return _default
@@ -0,0 +1,243 @@
+# FileSage Sampling
+# Approximate reports for enormous trees: scan a seeded sample of folders and scale it up
+import math
+import random
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .ignore import IgnoreMatcher
+from .interpreter import InterpretedEntry
+from .rules import TagRules
+from .walker import DirectoryEntry, _join_rel, scan_directory
+
+DEFAULT_SAMPLE_FRACTION = 0.1
+# Folders with at least this many subfolders always have this many sampled, so every level has a spread to measure
+MIN_SAMPLED_CHILDREN = 2
+# Two-sided 95% normal quantile
+CONFIDENCE_Z = 1.96
+# Two-sided 95% Student-t quantiles for 1..30 degrees of freedom; beyond that a series around CONFIDENCE_Z
+T_QUANTILES = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+               2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+               2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+# Fewer sampled subfolders than this (out of more) measure a folder's spread too roughly to trust its interval
+MIN_MEASURED_CHILDREN = 5
+
+class SampleDesign:
+    """Which folders a sampling scan reached, and how many subfolders each one had to choose from"""
+
+    def __init__(self, fraction: float, seed: int):
+        self.fraction = fraction
+        self.seed = seed
+        self.eligible: Dict[str, int] = {}
+        self.scanned: Dict[str, List[str]] = {}
+        self.budget_hit: Optional[str] = None
+        self.unreached = 0
+
+class Estimate(NamedTuple):
+    value: float
+    low: float
+    high: float
+
+    @property
+    def margin(self) -> float:
+        return (self.high - self.low) / 2
+
+class SampleEstimate(NamedTuple):
+    fraction: float
+    seed: int
+    sampled_folders: int
+    sampled_files: int
+    folders: Estimate
+    files: Estimate
+    size: Estimate
+    average_chaos: Estimate
+    tag_counts: Dict[str, float]
+    budget_hit: Optional[str]
+    unreached: int
+    # Folders with fewer than two sampled subfolders where the design called for them (see estimate_totals)
+    degraded_folders: int
+    # Folders whose spread rests on two to four sampled subfolders, with more left unread
+    thin_folders: int
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = self._asdict()
+        for key, value in data.items():
+            if isinstance(value, Estimate):
+                data[key] = value._asdict()
+        return data
+
+def iter_sample(path: str, matcher: IgnoreMatcher, rules: Optional[TagRules], design: SampleDesign,
+                max_files: Optional[int] = None, max_seconds: Optional[float] = None) -> Iterator[DirectoryEntry]:
+    """Scan the root, then a seeded random ``design.fraction`` of each folder's subfolders, depth first.
+
+    Subfolders are sorted before sampling, so the same seed picks the same
+    folders on every run. Sampled folders are visited in random order; when
+    the file or time budget runs out, the folders still waiting are left out
+    of the sample and counted in ``design.unreached``.
+    """
+    rng = random.Random(design.seed)
+    started = time.monotonic()
+    files_seen = 0
+    stack: List[Tuple[str, IgnoreMatcher, Optional[str]]] = [('.', matcher, None)]
+    while stack:
+        if max_files is not None and files_seen >= max_files:
+            design.budget_hit = f"{max_files} files"
+        elif max_seconds is not None and time.monotonic() - started >= max_seconds:
+            design.budget_hit = f"{max_seconds:g}s"
+        if design.budget_hit:
+            design.unreached = len(stack)
+            return
+        rel_root, dir_matcher, parent = stack.pop()
+        scanned = scan_directory(path, rel_root, dir_matcher, None, rules)
+        if scanned is None:
+            # Unlistable folders are skipped by every engine; treat them as never eligible
+            if parent is not None:
+                design.eligible[parent] -= 1
+            continue
+        entry, subdirs, child_matcher = scanned
+        if parent is not None:
+            design.scanned[parent].append(rel_root)
+        design.eligible[rel_root] = len(subdirs)
+        design.scanned[rel_root] = []
+        files_seen += len(entry["files"])
+        yield entry
+
+        count = len(subdirs)
+        if count:
+            take = min(count, max(MIN_SAMPLED_CHILDREN, math.ceil(design.fraction * count)))
+            chosen = rng.sample(sorted(subdirs), take)
+            stack.extend((_join_rel(rel_root, d), child_matcher, rel_root) for d in chosen)
+
+# Per-folder totals estimated below: folders, files, bytes, summed chaos
+_FIELDS = 4
+
+def estimate_totals(structure: List[InterpretedEntry], design: SampleDesign) -> SampleEstimate:
+    """Scale a sampled structure up to whole-tree estimates with 95% confidence intervals.
+
+    Each folder's subtree total is its own files plus its sampled subtrees
+    scaled by ``eligible / sampled`` (a two-stage estimator applied at every
+    level). The variance adds the spread between sampled sibling subtrees,
+    with a finite-population correction, to their own variances. The
+    average chaos is a ratio estimate whose interval comes from the
+    linearized ``chaos - average * files`` totals.
+
+    A budget cut (or unlistable subfolders) can leave a folder with fewer
+    than two sampled subfolders, so there is no spread to measure. Those
+    folders are counted in ``degraded_folders``: with one sampled subfolder
+    its spread is assumed to be as large as its mean (a coefficient of
+    variation of 1), which widens the interval but is a guess, not a
+    measurement; with none, the unread subtrees are simply missing from
+    the totals.
+
+    A spread measured from ``n`` sampled subfolders is itself uncertain, so
+    each level's term is widened by ``(t / z)²`` with the Student-t quantile
+    for ``n - 1`` degrees of freedom. Two identical siblings still measure
+    no spread at all, so folders with fewer than MIN_MEASURED_CHILDREN
+    sampled subfolders (and more unread) are counted in ``thin_folders``.
+    """
+    own: Dict[str, Tuple[float, ...]] = {}
+    tags: Dict[str, Dict[str, int]] = {}
+    for entry in structure:
+        files = entry["files"]
+        own[entry["path"]] = (1.0, float(len(files)), float(sum(file["size"] for file in files)),
+                              sum(file["chaos_index"] for file in files))
+        counts: Dict[str, int] = {}
+        for file in files:
+            for tag in file.get("tags", []):
+                counts[tag] = counts.get(tag, 0) + 1
+        tags[entry["path"]] = counts
+
+    totals, variances, tag_totals = _roll_up(structure, design, own, tags)
+    root_total = totals.get('.', (0.0,) * _FIELDS)
+    root_variance = variances.get('.', (0.0,) * _FIELDS)
+    files_total = root_total[1]
+    average = root_total[3] / files_total if files_total else 0.0
+
+    # Linearize the ratio: z = chaos - average * files, then Var(average) ≈ Var(Z) / files²
+    linear = {path: (values[3] - average * values[1],) for path, values in own.items()}
+    _, linear_variances, _ = _roll_up(structure, design, linear, None)
+    chaos_variance = linear_variances.get('.', (0.0,))[0] / files_total ** 2 if files_total else 0.0
+
+    sampled_files = sum(int(values[1]) for values in own.values())
+    sampled_size = sum(values[2] for values in own.values())
+    return SampleEstimate(
+        fraction=design.fraction,
+        seed=design.seed,
+        sampled_folders=len(own),
+        sampled_files=sampled_files,
+        folders=_interval(root_total[0], root_variance[0], len(own)),
+        files=_interval(files_total, root_variance[1], sampled_files),
+        size=_interval(root_total[2], root_variance[2], sampled_size),
+        average_chaos=_interval(average, chaos_variance, 0.0),
+        tag_counts={tag: round(count) for tag, count in sorted(tag_totals.get('.', {}).items())},
+        budget_hit=design.budget_hit,
+        unreached=design.unreached,
+        degraded_folders=sum(1 for path, children in design.scanned.items()
+                             if len(children) < min(MIN_SAMPLED_CHILDREN, design.eligible.get(path, 0))),
+        thin_folders=sum(1 for path, children in design.scanned.items()
+                         if MIN_SAMPLED_CHILDREN <= len(children) < MIN_MEASURED_CHILDREN
+                         and len(children) < design.eligible.get(path, 0))
+    )
+
+def _roll_up(structure: List[InterpretedEntry], design: SampleDesign, own: Dict[str, Tuple[float, ...]],
+             tags: Optional[Dict[str, Dict[str, int]]]
+             ) -> Tuple[Dict[str, Tuple[float, ...]], Dict[str, Tuple[float, ...]], Dict[str, Dict[str, float]]]:
+    totals: Dict[str, Tuple[float, ...]] = {}
+    variances: Dict[str, Tuple[float, ...]] = {}
+    tag_totals: Dict[str, Dict[str, float]] = {}
+    # Depth-first order lists every folder before its descendants, so reversing it rolls children up first
+    for entry in reversed(structure):
+        path = entry["path"]
+        children = design.scanned.get(path, [])
+        eligible = design.eligible.get(path, 0)
+        total = list(own[path])
+        variance = [0.0] * len(total)
+        tag_total: Dict[str, float] = dict(tags[path]) if tags is not None else {}
+        sampled = len(children)
+        if sampled:
+            scale = eligible / sampled
+            correction = 1 - sampled / eligible
+            for field in range(len(total)):
+                values = [totals[child][field] for child in children]
+                mean = sum(values) / sampled
+                if sampled > 1:
+                    spread = sum((value - mean) ** 2 for value in values) / (sampled - 1) * \
+                        (t_quantile(sampled - 1) / CONFIDENCE_Z) ** 2
+                else:
+                    # No spread to measure: assume one as large as the mean (counted in degraded_folders)
+                    spread = mean ** 2
+                total[field] += scale * sum(values)
+                variance[field] += eligible ** 2 * correction * spread / sampled + \
+                    scale * sum(variances[child][field] for child in children)
+            for child in children:
+                for tag, count in tag_totals.get(child, {}).items():
+                    tag_total[tag] = tag_total.get(tag, 0.0) + scale * count
+        totals[path] = tuple(total)
+        variances[path] = tuple(variance)
+        tag_totals[path] = tag_total
+    return totals, variances, tag_totals
+
+def t_quantile(degrees: int) -> float:
+    """Two-sided 95% Student-t quantile for ``degrees`` degrees of freedom"""
+    if degrees <= len(T_QUANTILES):
+        return T_QUANTILES[degrees - 1]
+    return CONFIDENCE_Z + (CONFIDENCE_Z ** 3 + CONFIDENCE_Z) / (4 * degrees)
+
+def _interval(value: float, variance: float, floor: float) -> Estimate:
+    """A 95% interval; it never reaches below what the sample itself saw"""
+    margin = CONFIDENCE_Z * math.sqrt(max(variance, 0.0))
+    return Estimate(value, max(floor, value - margin), value + margin)
+
+def sample_directory(path: str, fraction: float = DEFAULT_SAMPLE_FRACTION, seed: int = 0,
+                     max_files: Optional[int] = None,
+                     max_seconds: Optional[float] = None) -> Tuple[List[DirectoryEntry], SampleDesign]:
+    """Sampling counterpart of walk_directory, returning the sampled structure and its design"""
+    from .settings import load_settings
+    from .walker import build_ignore_matcher, compile_rules
+    if not 0 < fraction <= 1:
+        raise ValueError(f"Sample fraction must be in (0, 1], got {fraction}")
+    settings = load_settings()
+    design = SampleDesign(fraction, seed)
+    entries = list(iter_sample(path, build_ignore_matcher(settings),
+                               compile_rules(settings).tags, design, max_files, max_seconds))
+    return entries, design
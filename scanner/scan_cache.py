@@ -0,0 +1,167 @@
+# FileSage Scan Cache
+# Persists per-directory listings between runs so unchanged folders are not re-listed
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, TypedDict
+
+from .walker import DirectoryListing
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = os.path.join("output", ".filesage_cache")
+
+# Directories touched this recently may still change within the same mtime tick
+RACY_WINDOW_NS = 2_000_000_000
+
+class CachedDirectory(TypedDict):
+    inode: int
+    mtime_ns: int
+    listing: DirectoryListing
+
+def _checksum(directories: Dict[str, CachedDirectory]) -> str:
+    payload = json.dumps(directories, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ScanCache:
+    """Per-root cache of directory listings keyed by ``(inode, mtime)``.
+
+    A directory's mtime changes whenever an entry is added, removed or
+    renamed, so an unchanged ``(inode, mtime)`` pair means its listing can be
+    reused without stat'ing every file. In-place edits to existing files do
+    not touch the directory mtime, so their cached size and timestamp stay
+    stale until anything else in that folder changes. With ``restat`` only
+    the listing is reused and every file is stat'ed again, which keeps sizes
+    and mtimes exact (the index and snapshots need that).
+
+    Listings are stored before ignore rules are applied, so editing
+    ``ignore_patterns`` or a .gitignore never invalidates the cache.
+    """
+
+    def __init__(self, root: str, cache_dir: str = DEFAULT_CACHE_DIR, restat: bool = False):
+        self.root = os.path.abspath(root)
+        self.restat = restat
+        digest = hashlib.sha1(self.root.encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(cache_dir, f"{digest}.json")
+        self.previous: Dict[str, CachedDirectory] = {}
+        self.current: Dict[str, CachedDirectory] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        """Load the previous run's listings; a missing or invalid cache starts empty"""
+        data = _read_cache_file(self.path)
+        if data is None or data.get("root") != self.root:
+            self.previous = {}
+            return False
+        if data["checksum"] != _checksum(data["directories"]):
+            self.previous = {}
+            return False
+        self.previous = data["directories"]
+        return True
+
+    def save(self) -> None:
+        """Persist the listings seen during this run, dropping vanished folders"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {
+            "version": CACHE_VERSION,
+            "root": self.root,
+            "checksum": _checksum(self.current),
+            "directories": self.current
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, rel_root: str, dir_stat: os.stat_result) -> Optional[DirectoryListing]:
+        """Return a folder's cached listing if its (inode, mtime) is unchanged"""
+        cached = self.previous.get(rel_root)
+        hit = cached is not None and cached["inode"] == dir_stat.st_ino and cached["mtime_ns"] == dir_stat.st_mtime_ns
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if not hit or cached is None:
+            return None
+        listing = cached["listing"]
+        if self.restat:
+            # Names only; the walker stats every file it keeps
+            return {"dirs": listing["dirs"], "files": listing["files"], "stats": {}}
+        return listing
+
+    def store(self, rel_root: str, dir_stat: os.stat_result, listing: DirectoryListing) -> None:
+        """Record a folder's listing for the next run"""
+        if time.time_ns() - dir_stat.st_mtime_ns < RACY_WINDOW_NS:
+            return
+        self.current[rel_root] = {
+            "inode": dir_stat.st_ino,
+            "mtime_ns": dir_stat.st_mtime_ns,
+            "listing": listing
+        }
+
+def _read_cache_file(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return None
+    if not isinstance(data.get("directories"), dict) or "checksum" not in data:
+        return None
+    return data
+
+def verify_cache(cache_dir: str = DEFAULT_CACHE_DIR) -> List[Tuple[str, bool, str]]:
+    """Check every cache file's version and checksum"""
+    results: List[Tuple[str, bool, str]] = []
+    if not os.path.isdir(cache_dir):
+        return results
+    for name in sorted(os.listdir(cache_dir)):
+        # Rendered-fragment caches (writer/fragment_cache.py) share the folder and validate themselves
+        if not name.endswith(".json") or name.endswith(".fragments.json"):
+            continue
+        path = os.path.join(cache_dir, name)
+        data = _read_cache_file(path)
+        if data is None:
+            results.append((path, False, "unreadable or unsupported version"))
+        elif data["checksum"] != _checksum(data["directories"]):
+            results.append((path, False, "checksum mismatch"))
+        else:
+            results.append((path, True, f"{len(data['directories'])} directories for {data.get('root')}"))
+    return results
+
+def clear_cache(cache_dir: str = DEFAULT_CACHE_DIR) -> int:
+    """Remove all cache files, returning how many were deleted"""
+    removed = 0
+    if not os.path.isdir(cache_dir):
+        return removed
+    for name in os.listdir(cache_dir):
+        if name.endswith((".json", ".tmp")):
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+    return removed
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect or clear the FileSage scan cache")
+    parser.add_argument("action", choices=["verify", "clear"])
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args()
+
+    if args.action == "clear":
+        print(f"Removed {clear_cache(args.cache_dir)} cache file(s) from {args.cache_dir}")
+        return
+    results = verify_cache(args.cache_dir)
+    if not results:
+        print(f"No cache files in {args.cache_dir}")
+    for path, ok, message in results:
+        print(f"{'OK ' if ok else 'BAD'} {path}: {message}")
+    if not all(ok for _, ok, _ in results):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# FileSage Settings
+# Loads and validates config/settings.yaml once per process
+import os
+from typing import Any, Dict, Optional, Tuple
+
+# Resolved from the package, not the working directory; FILESAGE_SETTINGS overrides it
+DEFAULT_SETTINGS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     "config", "settings.yaml")
+SETTINGS_ENV = "FILESAGE_SETTINGS"
+
+_NONE = type(None)
+_NUMBER = (int, float)
+
+# Expected types of known keys; unknown keys are passed through untouched
+SETTINGS_SCHEMA: Dict[str, Tuple[type, ...]] = {
+    "edward_mode": (bool,),
+    "verbosity": (str,),
+    "ignore_patterns": (list, _NONE),
+    "scan_engine": (str,),
+    "scan_workers": (int,),
+    "scan_concurrency": (int,),
+    "scan_mount_concurrency": (int,),
+    "scan_processes": (int, _NONE),
+    "streaming": (bool,),
+    "scan_cache": (bool,),
+    "fragment_cache": (bool,),
+    "scan_index": (bool,),
+    "scan_index_path": (str, _NONE),
+    "scan_snapshot": (bool,),
+    "sample_fraction": _NUMBER + (_NONE,),
+    "sample_seed": (int,),
+    "sample_max_files": (int, _NONE),
+    "sample_max_seconds": _NUMBER + (_NONE,),
+    "snapshot_dir": (str, _NONE),
+    "use_gitignore": (bool,),
+    "output_format": (str,),
+    "ndjson_records": (str,),
+    "output_mode": (str,),
+    "shard_by": (str,),
+    "shard_folders_per_page": (int,),
+    "max_files_per_folder": (int, _NONE),
+    "metrics": (bool,),
+    "profile": (bool,),
+    "find_duplicates": (bool,),
+    "dedup_workers": (int,),
+    "content_analysis": (bool,),
+    "content_max_bytes": (int,),
+    "content_skip_above": (int,),
+    "content_workers": (int, _NONE),
+    "watch_debounce": _NUMBER,
+    "leaderboard_sizes": (dict, _NONE),
+    "tag_rules": (list, _NONE),
+    "chaos_rules": (dict, _NONE),
+}
+
+SETTINGS_CHOICES: Dict[str, Tuple[str, ...]] = {
+    "scan_engine": ("walk", "scandir", "async", "process"),
+    "output_format": ("markdown", "ndjson"),
+    "ndjson_records": ("folder", "file"),
+    "output_mode": ("single", "sharded"),
+    "shard_by": ("top_level", "count"),
+}
+
+# Allowed ranges of numeric keys: (lowest, highest or None, whether the lowest itself is excluded)
+SETTINGS_RANGES: Dict[str, Tuple[float, Optional[float], bool]] = {
+    "scan_workers": (1, None, False),
+    "scan_concurrency": (1, None, False),
+    "scan_mount_concurrency": (1, None, False),
+    "scan_processes": (1, None, False),
+    "sample_fraction": (0, 1, True),
+    "sample_max_files": (1, None, False),
+    "sample_max_seconds": (0, None, True),
+    "shard_folders_per_page": (1, None, False),
+    "max_files_per_folder": (0, None, False),
+    "dedup_workers": (1, None, False),
+    "content_max_bytes": (1, None, False),
+    "content_skip_above": (0, None, False),
+    "content_workers": (1, None, False),
+    "watch_debounce": (0, None, False),
+}
+
+class SettingsError(ValueError):
+    """settings.yaml holds a value of the wrong type, an unknown choice or a number out of range"""
+
+_cache: Dict[str, Dict[str, Any]] = {}
+
+def settings_path() -> str:
+    return os.environ.get(SETTINGS_ENV) or DEFAULT_SETTINGS_PATH
+
+def load_settings(path: Optional[str] = None) -> Dict[str, Any]:
+    """Load settings from config/settings.yaml, parsing and validating the file once per process.
+
+    Every caller gets the same dict, so treat it as read-only. A missing
+    file yields the built-in defaults; ``clear_settings_cache`` forces a
+    re-read.
+    """
+    path = os.path.abspath(path or settings_path())
+    settings = _cache.get(path)
+    if settings is None:
+        settings = _cache[path] = validate_settings(_read_yaml(path), path)
+    return settings
+
+def clear_settings_cache() -> None:
+    _cache.clear()
+
+def _read_yaml(path: str) -> Dict[str, Any]:
+    try:
+        f = open(path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return {"ignore_patterns": []}
+    # Imported here: yaml is the single most expensive import on the CLI's path
+    import yaml
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with f:
+        return yaml.load(f, Loader=loader) or {}
+
+def validate_settings(settings: Any, source: str = "settings") -> Dict[str, Any]:
+    """Check the types, choices and ranges of known keys, raising SettingsError on the first bad one"""
+    if not isinstance(settings, dict):
+        raise SettingsError(f"{source}: expected a mapping at the top level, got {type(settings).__name__}")
+    for key, expected in SETTINGS_SCHEMA.items():
+        if key not in settings:
+            continue
+        value = settings[key]
+        # bool is an int subclass; don't let "scan_workers: true" through
+        if not isinstance(value, expected) or (isinstance(value, bool) and bool not in expected):
+            names = " or ".join("null" if kind is _NONE else kind.__name__ for kind in expected)
+            raise SettingsError(f"{source}: '{key}' must be {names}, got {type(value).__name__}")
+        choices = SETTINGS_CHOICES.get(key)
+        if choices and value not in choices:
+            raise SettingsError(f"{source}: '{key}' must be one of {', '.join(choices)}, got '{value}'")
+        bounds = SETTINGS_RANGES.get(key)
+        if bounds and value is not None:
+            low, high, open_low = bounds
+            if value < low or (open_low and value == low) or (high is not None and value > high):
+                wanted = f"in {'(' if open_low else '['}{low}, {high}]" if high is not None else \
+                    (f"above {low}" if open_low else f"at least {low}")
+                raise SettingsError(f"{source}: '{key}' must be {wanted}, got {value}")
+    return settings
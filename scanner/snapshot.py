@@ -0,0 +1,286 @@
+# FileSage Snapshots
+# Saves each scan sorted by path so two runs can be compared in one streaming pass
+import hashlib
+import heapq
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .interpreter import InterpretedEntry
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot.ndjson"
+# Relative to the working directory, not the report's -o folder, so diff --root finds every run's snapshots
+DEFAULT_SNAPSHOT_DIR = os.path.join("output", "snapshots")
+# Records sorted in memory before a chunk is spilled to a temporary file and merged back
+SNAPSHOT_CHUNK = 200_000
+# Smallest change in a folder's average chaos that the diff reports
+DEFAULT_CHAOS_DELTA = 0.5
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+class SnapshotError(ValueError):
+    """A snapshot file is missing its header, has another version or is out of order"""
+
+class SnapshotChange(NamedTuple):
+    kind: str                        # "file" or "folder"
+    change: str                      # added, removed, grown, shrunk, modified, retagged or chaos
+    path: str
+    old: Optional[Dict[str, Any]]
+    new: Optional[Dict[str, Any]]
+
+def record_key(record: Dict[str, Any]) -> str:
+    """The order snapshots are stored in: by path, a folder's record beside its files' records"""
+    return f"{record['path']}\0{record['type']}"
+
+def snapshot_path(root: str, directory: str = DEFAULT_SNAPSHOT_DIR, moment: Optional[float] = None) -> str:
+    """``<name>-<root digest>-<timestamp>.snapshot.ndjson``; names sort by time within a root.
+
+    The timestamp has microseconds, and ``SnapshotWriter.finish`` numbers
+    the name if it is still taken, so back-to-back scans never collide.
+    """
+    root = os.path.abspath(root)
+    if moment is None:
+        moment = time.time()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(moment)) + f"-{int(moment % 1 * 1_000_000):06d}"
+    return os.path.join(directory, f"{_snapshot_prefix(root)}{stamp}{SNAPSHOT_SUFFIX}")
+
+def _numbered(path: str, number: int) -> str:
+    """``path`` with ``_<number>`` before its suffix; '_' sorts after '.', so it lands after the original"""
+    if path.endswith(SNAPSHOT_SUFFIX):
+        stem, suffix = path[:-len(SNAPSHOT_SUFFIX)], SNAPSHOT_SUFFIX
+    else:
+        stem, suffix = os.path.splitext(path)
+    return f"{stem}_{number}{suffix}"
+
+def _claim(path: str) -> str:
+    """Create ``path``, or the first free numbered variant of it, exclusively; returns the name taken"""
+    number = 0
+    while True:
+        candidate = path if number == 0 else _numbered(path, number)
+        try:
+            os.close(os.open(candidate, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+            return candidate
+        except FileExistsError:
+            number += 1
+
+def _snapshot_prefix(root: str) -> str:
+    name = os.path.basename(root) or "root"
+    return f"{name}-{hashlib.sha1(root.encode('utf-8')).hexdigest()[:8]}-"
+
+def latest_snapshots(root: str, directory: str = DEFAULT_SNAPSHOT_DIR, count: int = 2) -> List[str]:
+    """The newest ``count`` snapshots of a root, oldest first"""
+    prefix = _snapshot_prefix(os.path.abspath(root))
+    try:
+        names = sorted(name for name in os.listdir(directory)
+                       if name.startswith(prefix) and name.endswith(SNAPSHOT_SUFFIX))
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, name) for name in names[-count:]]
+
+class SnapshotWriter:
+    """Collects one scan's folder and file records and writes them sorted by ``record_key``.
+
+    Up to SNAPSHOT_CHUNK records are held at once. Larger scans are sorted
+    in chunks spilled next to the output and merged with ``heapq.merge``,
+    so memory stays bounded however many files the tree has.
+    """
+
+    def __init__(self, root: str, path: str, chunk_size: int = SNAPSHOT_CHUNK):
+        self.root = os.path.abspath(root)
+        self.path = path
+        self.chunk_size = chunk_size
+        self.folders = 0
+        self.files = 0
+        self.size = 0
+        self._records: List[Tuple[str, str]] = []
+        self._chunks: List[str] = []
+
+    def add(self, entry: InterpretedEntry) -> None:
+        folder = entry["path"]
+        total_size = 0
+        chaos_total = 0.0
+        for file in entry["files"]:
+            total_size += file["size"]
+            chaos_total += file["chaos_index"]
+            self._append({
+                "type": "file",
+                "path": file["name"] if folder == "." else os.path.join(folder, file["name"]),
+                "size": file["size"],
+                "mtime": int(file["modified"].timestamp()),
+                "chaos": file["chaos_index"],
+                "tags": sorted(file.get("tags", []))
+            })
+        count = len(entry["files"])
+        self._append({
+            "type": "folder",
+            "path": folder,
+            "files": count,
+            "size": total_size,
+            "chaos": round(chaos_total / count, 2) if count else 0.0,
+            "tags": sorted(entry.get("tags", []))
+        })
+        self.folders += 1
+        self.files += count
+        self.size += total_size
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        self._records.append((record_key(record), _encoder.encode(record)))
+        if len(self._records) >= self.chunk_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        self._records.sort()
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, chunk_path = tempfile.mkstemp(suffix=".chunk", dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for _, line in self._records:
+                f.write(line)
+                f.write("\n")
+        self._chunks.append(chunk_path)
+        self._records = []
+
+    def finish(self) -> str:
+        """Write the header and every record in key order; returns the snapshot path.
+
+        An existing file is never replaced: if ``path`` is taken, the
+        snapshot goes to the first free ``_<n>`` variant of it instead.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._records.sort()
+        self.path = _claim(self.path)
+        files = [open(chunk, "r", encoding="utf-8") for chunk in self._chunks]
+        written = False
+        try:
+            runs = [self._records] + [((record_key(json.loads(line)), line.rstrip("\n")) for line in f)
+                                      for f in files]
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as out:
+                out.write(_encoder.encode({"type": "snapshot", "version": SNAPSHOT_VERSION, "root": self.root,
+                                           "created": int(time.time()), "folders": self.folders,
+                                           "files": self.files, "size": self.size}))
+                out.write("\n")
+                for _, line in heapq.merge(*runs) if len(runs) > 1 else runs[0]:
+                    out.write(line)
+                    out.write("\n")
+            os.replace(tmp_path, self.path)
+            written = True
+        finally:
+            if not written:
+                # Give the claimed name back; a half-written snapshot must not look like the newest one
+                for leftover in (self.path + ".tmp", self.path):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+            for f in files:
+                f.close()
+            for chunk in self._chunks:
+                os.remove(chunk)
+            self._records, self._chunks = [], []
+        return self.path
+
+    def abandon(self) -> None:
+        """Drop the records collected so far and delete any spilled chunks"""
+        for chunk in self._chunks:
+            if os.path.exists(chunk):
+                os.remove(chunk)
+        self._records, self._chunks = [], []
+
+    def track(self, entries: Iterable[InterpretedEntry]) -> Iterator[InterpretedEntry]:
+        """Pass entries through unchanged while recording them; writes the snapshot at the end.
+
+        If the scan fails or is abandoned part way, no snapshot is written and its chunks are deleted.
+        """
+        try:
+            for entry in entries:
+                self.add(entry)
+                yield entry
+        except BaseException:
+            self.abandon()
+            raise
+        self.finish()
+
+def write_snapshot(root: str, structure: Iterable[InterpretedEntry], path: str) -> str:
+    writer = SnapshotWriter(root, path)
+    for entry in structure:
+        writer.add(entry)
+    return writer.finish()
+
+class Snapshot:
+    """A snapshot file opened for one sequential read: ``header``, then records in key order"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "r", encoding="utf-8")
+        try:
+            header = json.loads(self._file.readline() or "null")
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get("type") != "snapshot":
+            self._file.close()
+            raise SnapshotError(f"{path}: not a FileSage snapshot")
+        if header.get("version") != SNAPSHOT_VERSION:
+            self._file.close()
+            raise SnapshotError(f"{path}: snapshot version {header.get('version')}, expected {SNAPSHOT_VERSION}")
+        self.header: Dict[str, Any] = header
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._file.close()
+
+    def __iter__(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        previous = ""
+        for line_number, line in enumerate(self._file, start=2):
+            record = json.loads(line)
+            key = record_key(record)
+            if key <= previous:
+                raise SnapshotError(f"{self.path}:{line_number}: records out of order at '{record['path']}'")
+            previous = key
+            yield key, record
+
+def diff_snapshots(old: Iterable[Tuple[str, Dict[str, Any]]], new: Iterable[Tuple[str, Dict[str, Any]]],
+                   chaos_delta: float = DEFAULT_CHAOS_DELTA) -> Iterator[SnapshotChange]:
+    """Merge-join two key-ordered record streams, yielding changes in path order.
+
+    Each side is read once and only the current record of each is held, so
+    the diff is O(n) in time and O(1) in memory. A file that both grew and
+    was retagged yields one change for each.
+    """
+    old_records = iter(old)
+    new_records = iter(new)
+    before = next(old_records, None)
+    after = next(new_records, None)
+    while before is not None or after is not None:
+        if after is None or (before is not None and before[0] < after[0]):
+            record = before[1]
+            yield SnapshotChange(record["type"], "removed", record["path"], record, None)
+            before = next(old_records, None)
+        elif before is None or after[0] < before[0]:
+            record = after[1]
+            yield SnapshotChange(record["type"], "added", record["path"], None, record)
+            after = next(new_records, None)
+        else:
+            yield from _compare(before[1], after[1], chaos_delta)
+            before = next(old_records, None)
+            after = next(new_records, None)
+
+def _compare(old: Dict[str, Any], new: Dict[str, Any], chaos_delta: float) -> Iterator[SnapshotChange]:
+    kind, path = new["type"], new["path"]
+    if kind == "folder":
+        if abs(new["chaos"] - old["chaos"]) >= chaos_delta:
+            yield SnapshotChange(kind, "chaos", path, old, new)
+        return
+    if new["size"] > old["size"]:
+        yield SnapshotChange(kind, "grown", path, old, new)
+    elif new["size"] < old["size"]:
+        yield SnapshotChange(kind, "shrunk", path, old, new)
+    elif new["mtime"] != old["mtime"]:
+        yield SnapshotChange(kind, "modified", path, old, new)
+    if new["tags"] != old["tags"]:
+        yield SnapshotChange(kind, "retagged", path, old, new)
@@ -1,106 +1,299 @@
-import os
-import yaml
-from typing import List, TypedDict, Dict, Any
-from datetime import datetime
-
-class FileMetadata(TypedDict):
-    name: str
-    size: int
-    modified: datetime
-    tags: List[str]
-
-class DirectoryEntry(TypedDict):
-    path: str
-    folders: List[str]
-    files: List[FileMetadata]
-    tags: List[str]
-
-def load_settings() -> Dict[str, Any]:
-    """Load settings from config/settings.yaml"""
-    try:
-        with open("config/settings.yaml", "r") as f:
-            return yaml.safe_load(f) or {}
-    except FileNotFoundError:
-        return {"ignore_patterns": []}
-
-def should_ignore(path: str, ignore_patterns: List[str]) -> bool:
-    """Check if a path should be ignored based on patterns"""
-    for pattern in ignore_patterns:
-        if pattern in path:
-            return True
-    return False
-
-def walk_directory(path: str) -> List[DirectoryEntry]:
-    settings = load_settings()
-    ignore_patterns = settings.get("ignore_patterns", [])
-    
-    structure: List[DirectoryEntry] = []
-    for root, dirs, files in os.walk(path):
-        rel_root = os.path.relpath(root, path)
-
-        # Filter out ignored directories
-        dirs[:] = [d for d in dirs if not should_ignore(d, ignore_patterns)]
-
-        # Skip this directory if it should be ignored
-        if should_ignore(rel_root, ignore_patterns):
-            continue
-
-        # Tag folders
-        folder_tags: list[str] = []
-        if rel_root.startswith('.github') or rel_root.startswith('.github/workflows'):
-            folder_tags.append('#workflow')
-        if '__pycache__' in rel_root:
-            folder_tags.append('#cache')
-        if 'docs' in rel_root or any(f.endswith('.md') for f in files):
-            folder_tags.append('#documentation')
-        if 'test' in rel_root or any(f.startswith('test_') for f in files):
-            folder_tags.append('#validation_asset')
-        if 'config' in rel_root:
-            folder_tags.append('#config')
-
-        # Collect file metadata with tags
-        file_metadata: List[FileMetadata] = []
-        for file in files:
-            file_path = os.path.join(root, file)
-            tags: list[str] = []
-            fname = file.lower()
-            # Tagging logic
-            if rel_root.startswith('.github') or rel_root.startswith('.github/workflows') or fname.endswith(('.yml', '.yaml')):
-                tags.append('#workflow')
-            if fname.endswith('.pyc') or '__pycache__' in rel_root:
-                tags.append('#cache')
-            if fname.endswith('.md') or 'docs' in rel_root:
-                tags.append('#documentation')
-            if fname.startswith('test_') or 'test' in rel_root:
-                tags.append('#validation_asset')
-            if fname.endswith(('.yml', '.yaml', '.json', '.ini')) or 'config' in rel_root:
-                tags.append('#config')
-            # Composite action: utility functions (simple heuristic)
-            if 'util' in fname or 'helper' in fname or 'tool' in fname:
-                tags.append('#composite_action')
-
-            try:
-                stat = os.stat(file_path)
-                file_metadata.append({
-                    "name": file,
-                    "size": stat.st_size,
-                    "modified": datetime.fromtimestamp(stat.st_mtime),
-                    "tags": tags
-                })
-            except (OSError, IOError):
-                # If we can't stat the file, add it without metadata
-                file_metadata.append({
-                    "name": file,
-                    "size": 0,
-                    "modified": datetime.now(),
-                    "tags": tags
-                })
-
-        structure.append({
-            "path": rel_root,
-            "folders": dirs,
-            "files": file_metadata,
-            # Optionally, add folder tags for future use
-            "tags": folder_tags
-        })
-    return structure
+# FileSage Scanner Module
+# Handles directory traversal and structural analysis
+import os
+from typing import List, TypedDict, Dict, Any, Iterator, Optional, Tuple, TYPE_CHECKING
+from datetime import datetime
+
+from .ignore import IgnoreMatcher, compile_ignore_patterns
+from .metrics import METRICS
+from .rules import TagRules, compile_rules, default_rules
+from .settings import load_settings
+
+if TYPE_CHECKING:
+    from .scan_cache import ScanCache
+
+DEFAULT_SCAN_WORKERS = 8
+
+class ContentMetrics(TypedDict):
+    # Filled in by the optional content-analysis stage (scanner/content.py)
+    lines: int
+    imports: int
+    max_depth: int
+    todos: int
+    todo_density: float  # TODO/FIXME markers per 100 lines
+    truncated: bool  # only the first content_max_bytes were read
+
+class _FileMetadataBase(TypedDict):
+    name: str
+    size: int
+    modified: datetime
+    tags: List[str]
+
+class FileMetadata(_FileMetadataBase, total=False):
+    content: ContentMetrics
+
+class DirectoryEntry(TypedDict):
+    path: str
+    folders: List[str]
+    files: List[FileMetadata]
+    tags: List[str]
+
+class DirectoryListing(TypedDict):
+    # Raw, unfiltered contents of one folder as cached between runs
+    dirs: List[Tuple[str, bool]]  # (name, is_symlink)
+    files: List[str]
+    stats: Dict[str, Optional[Tuple[int, float]]]  # name -> (size, mtime); None if stat failed
+
+def should_ignore(path: str, ignore_patterns: List[str]) -> bool:
+    """Check if a path should be ignored based on patterns"""
+    return compile_ignore_patterns(tuple(ignore_patterns)).matches(path, is_dir=True)
+
+def build_ignore_matcher(settings: Dict[str, Any]) -> IgnoreMatcher:
+    """Compile ignore_patterns (and optionally .gitignore support) from settings"""
+    return compile_ignore_patterns(tuple(settings.get("ignore_patterns") or []),
+                                   bool(settings.get("use_gitignore", False)))
+
+def tag_folder(rel_root: str, files: List[str]) -> List[str]:
+    """Assign system tags to a folder from its relative path and file names"""
+    rules = default_rules().tags
+    return rules.folder_tags(rules.path_mask(rel_root), files)
+
+def tag_file(rel_root: str, file: str) -> List[str]:
+    """Assign system tags to a single file"""
+    rules = default_rules().tags
+    return rules.file_tags(rules.path_mask(rel_root), file)
+
+def build_file_metadata(file: str, tags: List[str], stat: Optional[Tuple[int, float]]) -> FileMetadata:
+    """Combine a file name, its tags and (possibly missing) ``(size, mtime)`` data"""
+    if stat is None:
+        # If we can't stat the file, add it without metadata
+        if METRICS.enabled:
+            METRICS.add_stat_failure()
+        return {"name": file, "size": 0, "modified": datetime.now(), "tags": tags}
+    return {
+        "name": file,
+        "size": stat[0],
+        "modified": datetime.fromtimestamp(stat[1]),
+        "tags": tags
+    }
+
+def walk_directory(path: str, engine: Optional[str] = None, workers: Optional[int] = None,
+                   cache: Optional["ScanCache"] = None) -> List[DirectoryEntry]:
+    """Walk a directory tree and collect tagged metadata for every folder.
+
+    ``engine`` selects the traversal strategy: ``"walk"`` (``os.walk``, the
+    default), ``"scandir"`` (``os.scandir`` with a thread pool of
+    ``workers`` threads), ``"async"`` (asyncio with up to ``workers``
+    listings and stats in flight, for high-latency mounts) or ``"process"``
+    (``workers`` processes sharing folders as they are found, for big skewed
+    trees). All return identical structures in the same order. When omitted,
+    ``scan_engine``, ``scan_workers``, ``scan_concurrency`` and
+    ``scan_processes`` from settings apply.
+
+    Passing a loaded ``ScanCache`` reuses the listings of folders whose
+    ``(inode, mtime)`` is unchanged; it runs on the scandir engine (``"walk"``
+    is switched to it, ``"async"`` and ``"process"`` raise ``ValueError``) and
+    the caller is responsible for calling ``cache.save()`` afterwards.
+    """
+    return list(iter_directory(path, engine, workers, cache))
+
+def iter_directory(path: str, engine: Optional[str] = None, workers: Optional[int] = None,
+                   cache: Optional["ScanCache"] = None) -> Iterator[DirectoryEntry]:
+    """Yield each folder's DirectoryEntry as soon as it has been scanned"""
+    settings = load_settings()
+    matcher = build_ignore_matcher(settings)
+    rules = compile_rules(settings).tags
+    engine = engine or settings.get("scan_engine", "walk")
+    if cache is not None and engine not in ("walk", "scandir"):
+        raise ValueError(f"The scan cache cannot be used with the {engine} engine")
+
+    if engine == "scandir" or cache is not None:
+        if workers is None:
+            workers = settings.get("scan_workers", DEFAULT_SCAN_WORKERS)
+        entries = _iter_scandir(path, matcher, workers, cache, rules)
+    elif engine == "walk":
+        entries = _iter_walk(path, matcher, rules)
+    elif engine == "async":
+        from .async_walker import DEFAULT_MOUNT_CONCURRENCY, DEFAULT_SCAN_CONCURRENCY, iter_async
+        if workers is None:
+            workers = settings.get("scan_concurrency", DEFAULT_SCAN_CONCURRENCY)
+        entries = iter_async(path, matcher, rules, workers,
+                             settings.get("scan_mount_concurrency", DEFAULT_MOUNT_CONCURRENCY))
+    elif engine == "process":
+        from .process_walker import iter_process
+        if workers is None:
+            workers = settings.get("scan_processes")
+        entries = iter_process(path, matcher, rules, workers)
+    else:
+        raise ValueError(f"Unknown scan engine: {engine}")
+    return METRICS.track("walk", entries) if METRICS.enabled else entries
+
+def _iter_walk(path: str, matcher: IgnoreMatcher, rules: TagRules) -> Iterator[DirectoryEntry]:
+    matchers = {'.': matcher}
+    for root, dirs, files in os.walk(path):
+        rel_root = os.path.relpath(root, path)
+        dir_matcher = matchers.pop(rel_root).for_directory(root, rel_root, files)
+
+        # Prune ignored directories before os.walk descends into them
+        dirs[:] = [d for d in dirs if not dir_matcher.matches(_join_rel(rel_root, d), True)]
+        for d in dirs:
+            matchers[_join_rel(rel_root, d)] = dir_matcher
+        files = [f for f in files if not dir_matcher.matches(_join_rel(rel_root, f), False)]
+
+        # Collect file metadata with tags
+        path_mask = rules.path_mask(rel_root)
+        file_metadata: List[FileMetadata] = []
+        for file in files:
+            try:
+                st = os.stat(os.path.join(root, file))
+                stat: Optional[Tuple[int, float]] = (st.st_size, st.st_mtime)
+            except (OSError, IOError):
+                stat = None
+            file_metadata.append(build_file_metadata(file, rules.file_tags(path_mask, file), stat))
+
+        yield {
+            "path": rel_root,
+            "folders": dirs,
+            "files": file_metadata,
+            # Optionally, add folder tags for future use
+            "tags": rules.folder_tags(path_mask, files)
+        }
+
+def _join_rel(rel_root: str, name: str) -> str:
+    return name if rel_root == '.' else os.path.join(rel_root, name)
+
+def list_directory(abs_dir: str) -> Optional[Tuple[DirectoryListing, Dict[str, os.DirEntry]]]:
+    """List a folder with os.scandir, returning its listing and file DirEntries"""
+    try:
+        with os.scandir(abs_dir) as it:
+            dir_entries = list(it)
+    except OSError:
+        return None
+
+    listing: DirectoryListing = {"dirs": [], "files": [], "stats": {}}
+    file_entries: Dict[str, os.DirEntry] = {}
+    for dir_entry in dir_entries:
+        try:
+            is_dir = dir_entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            try:
+                is_link = dir_entry.is_symlink()
+            except OSError:
+                is_link = False
+            listing["dirs"].append((dir_entry.name, is_link))
+        else:
+            listing["files"].append(dir_entry.name)
+            file_entries[dir_entry.name] = dir_entry
+    return listing, file_entries
+
+ScanResult = Tuple[DirectoryEntry, List[str], IgnoreMatcher]
+
+def scan_directory(root_path: str, rel_root: str, matcher: IgnoreMatcher,
+                   cache: Optional["ScanCache"] = None, rules: Optional[TagRules] = None) -> Optional[ScanResult]:
+    """Scan a single folder, reusing DirEntry type and stat data.
+
+    Returns ``(entry, subdirs, matcher)`` where ``subdirs`` are the folder
+    names to descend into and ``matcher`` is the ignore matcher that applies
+    below this folder, or None when the folder cannot be listed (as
+    ``os.walk`` silently skips it). With a ``cache``, folders whose
+    ``(inode, mtime)`` is unchanged are rebuilt from the cached listing
+    without listing the folder or stat'ing its files.
+    """
+    abs_dir = root_path if rel_root == '.' else os.path.join(root_path, rel_root)
+    listing: Optional[DirectoryListing] = None
+    file_entries: Dict[str, os.DirEntry] = {}
+    dir_stat: Optional[os.stat_result] = None
+    if cache is not None:
+        try:
+            dir_stat = os.stat(abs_dir)
+        except OSError:
+            return None
+        listing = cache.lookup(rel_root, dir_stat)
+    if listing is None:
+        listed = list_directory(abs_dir)
+        if listed is None:
+            return None
+        listing, file_entries = listed
+
+    matcher, dirs, subdirs, files = filter_listing(rel_root, listing, matcher.for_directory(
+        abs_dir, rel_root, listing["files"]))
+
+    # Only files that survive the ignore rules are stat'ed
+    stats = listing["stats"]
+    for file in files:
+        if file not in stats:
+            try:
+                dir_entry = file_entries.get(file)
+                st = dir_entry.stat() if dir_entry is not None else os.stat(os.path.join(abs_dir, file))
+                stats[file] = (st.st_size, st.st_mtime)
+            except OSError:
+                stats[file] = None
+
+    entry = build_entry(rel_root, dirs, files, stats, rules)
+    if cache is not None and dir_stat is not None:
+        cache.store(rel_root, dir_stat, listing)
+    return entry, subdirs, matcher
+
+def filter_listing(rel_root: str, listing: DirectoryListing,
+                   matcher: IgnoreMatcher) -> Tuple[IgnoreMatcher, List[str], List[str], List[str]]:
+    """Apply a folder's ignore matcher to its listing: ``(matcher, dirs, subdirs, files)``"""
+    dirs = [name for name, _ in listing["dirs"] if not matcher.matches(_join_rel(rel_root, name), True)]
+    # Symlinked folders are listed but never followed, matching os.walk
+    links = {name for name, is_link in listing["dirs"] if is_link}
+    subdirs = [d for d in dirs if d not in links] if links else dirs
+    files = [f for f in listing["files"] if not matcher.matches(_join_rel(rel_root, f), False)]
+    return matcher, dirs, subdirs, files
+
+def build_entry(rel_root: str, dirs: List[str], files: List[str], stats: Dict[str, Optional[Tuple[int, float]]],
+                rules: Optional[TagRules] = None) -> DirectoryEntry:
+    """Tag a filtered folder listing and its file stats into a DirectoryEntry"""
+    if rules is None:
+        rules = default_rules().tags
+    path_mask = rules.path_mask(rel_root)
+    return {
+        "path": rel_root,
+        "folders": dirs,
+        "files": [build_file_metadata(file, rules.file_tags(path_mask, file), stats[file]) for file in files],
+        "tags": rules.folder_tags(path_mask, files)
+    }
+
+def _iter_scandir(path: str, matcher: IgnoreMatcher, workers: int,
+                  cache: Optional["ScanCache"] = None, rules: Optional[TagRules] = None) -> Iterator[DirectoryEntry]:
+    """Yield directory entries top-down in os.walk order.
+
+    Folders are listed on a thread pool as soon as their parent has been
+    scanned, while results are consumed in pre-order so the output matches
+    the sequential walk exactly.
+    """
+    if workers <= 1:
+        stack = [('.', matcher)]
+        while stack:
+            rel_root, dir_matcher = stack.pop()
+            scanned = scan_directory(path, rel_root, dir_matcher, cache, rules)
+            if scanned is None:
+                continue
+            entry, subdirs, child_matcher = scanned
+            yield entry
+            stack.extend((_join_rel(rel_root, d), child_matcher) for d in reversed(subdirs))
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = {'.': pool.submit(scan_directory, path, '.', matcher, cache, rules)}
+        stack = ['.']
+        while stack:
+            rel_root = stack.pop()
+            scanned = pending.pop(rel_root).result()
+            if scanned is None:
+                continue
+            entry, subdirs, child_matcher = scanned
+            children = [_join_rel(rel_root, d) for d in subdirs]
+            for child in children:
+                pending[child] = pool.submit(scan_directory, path, child, child_matcher, cache, rules)
+            yield entry
+            stack.extend(reversed(children))
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
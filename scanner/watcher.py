@@ -0,0 +1,232 @@
+# FileSage Watcher
+# Reports which folders changed, via inotify on Linux or polling elsewhere
+import abc
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_MAX_WAIT = 5.0
+DEFAULT_POLL_INTERVAL = 2.0
+
+class FolderWatcher(abc.ABC):
+    """Common interface: track folders by root-relative path and report which changed"""
+
+    @abc.abstractmethod
+    def add(self, rel_dir: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def remove(self, rel_dir: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def poll(self, timeout: float) -> Set[str]:
+        """Folders whose listing or files changed, waiting up to ``timeout`` seconds"""
+
+    def close(self) -> None:
+        pass
+
+    def update(self, added: Iterable[str], removed: Iterable[str]) -> None:
+        for rel_dir in removed:
+            self.remove(rel_dir)
+        for rel_dir in added:
+            self.add(rel_dir)
+
+class InotifyWatcher(FolderWatcher):
+    """inotify through ctypes: one watch per folder, events mapped back to folders"""
+
+    def __init__(self, root: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.root = root
+        self._paths: Dict[int, str] = {}
+        self._wds: Dict[str, int] = {}
+
+    def add(self, rel_dir: str) -> None:
+        if rel_dir in self._wds:
+            return
+        abs_dir = self.root if rel_dir == "." else os.path.join(self.root, rel_dir)
+        wd = self._add_watch(self.fd, os.fsencode(abs_dir), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                # Out of watches: let the caller fall back to polling
+                raise OSError(err, "inotify watch limit reached (fs.inotify.max_user_watches)")
+            return  # The folder vanished or cannot be read; its parent's events still cover it
+        self._paths[wd] = rel_dir
+        self._wds[rel_dir] = wd
+
+    def remove(self, rel_dir: str) -> None:
+        wd = self._wds.pop(rel_dir, None)
+        if wd is not None:
+            self._paths.pop(wd, None)
+            self._rm_watch(self.fd, wd)
+
+    def poll(self, timeout: float) -> Set[str]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[str] = set()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: every folder may have changed
+                return set(self._wds)
+            rel_dir = self._paths.get(wd)
+            if rel_dir is None:
+                continue
+            if mask & IN_IGNORED:
+                self._paths.pop(wd, None)
+                self._wds.pop(rel_dir, None)
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                # Let the parent's rescan notice the folder is gone
+                parent = os.path.dirname(rel_dir) or "."
+                changed.add(parent)
+            else:
+                changed.add(rel_dir)
+        return changed
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+class PollingWatcher(FolderWatcher):
+    """Portable fallback: compares each folder's listing and file stats every ``interval`` seconds"""
+
+    def __init__(self, root: str, interval: float = DEFAULT_POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self._signatures: Dict[str, Optional[Tuple]] = {}
+        self._last_poll = time.monotonic()
+
+    def _signature(self, rel_dir: str) -> Optional[Tuple]:
+        abs_dir = self.root if rel_dir == "." else os.path.join(self.root, rel_dir)
+        try:
+            with os.scandir(abs_dir) as it:
+                items = []
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            # Only the name: a subfolder's own mtime changes belong to the subfolder
+                            items.append((entry.name, -1, 0))
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                        items.append((entry.name, st.st_size, st.st_mtime_ns))
+                    except OSError:
+                        items.append((entry.name, -1, -1))
+        except OSError:
+            return None
+        return tuple(sorted(items))
+
+    def add(self, rel_dir: str) -> None:
+        if rel_dir not in self._signatures:
+            self._signatures[rel_dir] = self._signature(rel_dir)
+
+    def remove(self, rel_dir: str) -> None:
+        self._signatures.pop(rel_dir, None)
+
+    def poll(self, timeout: float) -> Set[str]:
+        wait = self._last_poll + self.interval - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return set()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_poll = time.monotonic()
+
+        changed: Set[str] = set()
+        for rel_dir, old in list(self._signatures.items()):
+            new = self._signature(rel_dir)
+            if new != old:
+                self._signatures[rel_dir] = new
+                changed.add(rel_dir if new is not None else (os.path.dirname(rel_dir) or "."))
+        return changed
+
+def create_watcher(root: str, folders: Iterable[str], use_inotify: Optional[bool] = None,
+                   poll_interval: float = DEFAULT_POLL_INTERVAL) -> FolderWatcher:
+    """inotify on Linux when available (and within the watch limit), polling otherwise"""
+    folders = list(folders)
+    if use_inotify is not False and sys.platform.startswith("linux"):
+        watcher: Optional[InotifyWatcher] = None
+        try:
+            watcher = InotifyWatcher(root)
+            for rel_dir in folders:
+                watcher.add(rel_dir)
+            return watcher
+        except (OSError, AttributeError):
+            if watcher is not None:
+                watcher.close()
+            if use_inotify:
+                raise
+    polling = PollingWatcher(root, poll_interval)
+    for rel_dir in folders:
+        polling.add(rel_dir)
+    return polling
+
+def wait_for_changes(watcher: FolderWatcher, debounce: float = DEFAULT_DEBOUNCE,
+                     max_wait: float = DEFAULT_MAX_WAIT, timeout: Optional[float] = None) -> Set[str]:
+    """Block until something changes, then keep collecting until ``debounce`` seconds pass quietly.
+
+    A steady stream of events is cut off after ``max_wait`` seconds so the
+    report still refreshes during long builds. Returns an empty set if
+    ``timeout`` passes without any change.
+    """
+    started = time.monotonic()
+    changed: Set[str] = set()
+    while not changed:
+        remaining = None if timeout is None else timeout - (time.monotonic() - started)
+        if remaining is not None and remaining <= 0:
+            return changed
+        changed = watcher.poll(1.0 if remaining is None else min(1.0, remaining))
+
+    first = time.monotonic()
+    while time.monotonic() - first < max_wait:
+        more = watcher.poll(debounce)
+        if not more:
+            break
+        changed |= more
+    return changed
@@ -1,196 +1,1698 @@
-"""
-FileSage 2.0 Test Suite
-Basic functionality tests for cosmic directory analysis
-"""
-
-import unittest
-import tempfile
-import os
-from pathlib import Path
-from datetime import datetime
-from typing import List
-
-# Add parent directory to path for imports
-import sys
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
-from scanner.walker import walk_directory, FileMetadata
-from scanner.interpreter import interpret_structure, calculate_chaos_index, calculate_folder_summary, FileInfo, InterpretedEntry
-from writer.markdown_writer import write_markdown
-
-
-class TestWalker(unittest.TestCase):
-    """Test the cosmic directory walker"""
-    
-    def setUp(self):
-        """Create a temporary test directory structure"""
-        self.test_dir = tempfile.mkdtemp()
-        
-        # Create test structure
-        (Path(self.test_dir) / "test.py").write_text("print('hello')")
-        (Path(self.test_dir) / "README.md").write_text("# Test Project")
-        (Path(self.test_dir) / "config.yaml").write_text("setting: value")
-        
-        subdir = Path(self.test_dir) / "src"
-        subdir.mkdir()
-        (subdir / "main.py").write_text("# Main module")
-        
-    def tearDown(self):
-        """Clean up test directory"""
-        import shutil
-        shutil.rmtree(self.test_dir)
-    
-    def test_walk_directory(self):
-        """Test basic directory walking functionality"""
-        structure = walk_directory(self.test_dir)
-        
-        # Should find root directory and subdirectory
-        self.assertEqual(len(structure), 2)
-        
-        # Check root directory
-        root = next(entry for entry in structure if entry['path'] == '.')
-        self.assertEqual(len(root['files']), 3)  # test.py, README.md, config.yaml
-        
-        # Check that files have required fields including tags
-        for file in root['files']:
-            self.assertIn('name', file)
-            self.assertIn('size', file)
-            self.assertIn('modified', file)
-            self.assertIn('tags', file)
-
-
-class TestInterpreter(unittest.TestCase):
-    """Test the cosmic interpreter"""
-    
-    def test_chaos_index_calculation(self):
-        """Test chaos index calculation"""
-        
-        # Test file with low chaos
-        low_chaos_file: FileMetadata = {
-            'name': 'simple.py',
-            'size': 100,
-            'modified': datetime.now(),
-            'tags': ['#documentation']
-        }
-        chaos = calculate_chaos_index(low_chaos_file)
-        self.assertGreater(chaos, 0)
-        self.assertLess(chaos, 5)
-        
-        # Test file with high chaos
-        high_chaos_file: FileMetadata = {
-            'name': 'requirements.txt',
-            'size': 50000,
-            'modified': datetime.now(),
-            'tags': ['#config']
-        }
-        chaos = calculate_chaos_index(high_chaos_file)
-        self.assertGreater(chaos, 5)
-    
-    def test_folder_summary(self):
-        """Test folder summary calculation"""
-        
-        test_files: List[FileInfo] = [
-            {
-                'name': 'test1.py',
-                'description': 'Test file',
-                'size': 100,
-                'modified': datetime.now(),
-                'chaos_index': 2.0,
-                'tags': []
-            },
-            {
-                'name': 'test2.py',
-                'description': 'Another test',
-                'size': 200,
-                'modified': datetime.now(),
-                'chaos_index': 3.0,
-                'tags': []
-            }
-        ]
-        
-        summary = calculate_folder_summary(test_files)
-        self.assertEqual(summary['total_files'], 2)
-        self.assertEqual(summary['total_size'], 300)
-        self.assertEqual(summary['average_chaos'], 2.5)
-
-
-class TestMarkdownWriter(unittest.TestCase):
-    """Test the cosmic markdown writer"""
-    
-    def test_markdown_generation(self):
-        """Test basic markdown generation"""
-        
-        # Create test structure
-        test_structure: List[InterpretedEntry] = [{
-            'path': '.',
-            'description': 'Test directory',
-            'files': [{
-                'name': 'test.py',
-                'description': 'Test file',
-                'size': 100,
-                'modified': datetime.now(),
-                'chaos_index': 2.0,
-                'tags': ['#validation_asset']
-            }],
-            'folder_archetype': 'Test chamber of cosmic validation',
-            'tags': ['#validation_asset']
-        }]
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-            output_path = f.name
-        
-        try:
-            write_markdown(test_structure, output_path)
-            
-            # Verify file was created and has content
-            self.assertTrue(os.path.exists(output_path))
-            
-            with open(output_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                self.assertIn('FileSage Directory Architecture Report', content)
-                self.assertIn('test.py', content)
-                self.assertIn('#validation_asset', content)
-                
-        finally:
-            if os.path.exists(output_path):
-                os.unlink(output_path)
-
-
-class TestIntegration(unittest.TestCase):
-    """Test full FileSage integration"""
-    
-    def test_full_analysis_workflow(self):
-        """Test complete analysis workflow"""
-        # Create temporary directory with various file types
-        with tempfile.TemporaryDirectory() as test_dir:
-            # Create test files
-            (Path(test_dir) / "main.py").write_text("print('hello')")
-            (Path(test_dir) / "README.md").write_text("# Test")
-            (Path(test_dir) / "config.yaml").write_text("test: true")
-            (Path(test_dir) / "test_something.py").write_text("def test(): pass")
-            
-            # Create subdirectory
-            docs_dir = Path(test_dir) / "docs"
-            docs_dir.mkdir()
-            (docs_dir / "guide.md").write_text("# Guide")
-            
-            # Run full workflow
-            raw_structure = walk_directory(test_dir)
-            interpreted = interpret_structure(raw_structure)
-            
-            # Verify results
-            self.assertGreater(len(raw_structure), 0)
-            self.assertGreater(len(interpreted), 0)
-            
-            # Check that tags were assigned
-            root_files = next(entry for entry in interpreted if entry['path'] == '.')['files']
-            readme_file = next(f for f in root_files if f['name'] == 'README.md')
-            self.assertIn('#documentation', readme_file['tags'])
-            
-            test_file = next(f for f in root_files if f['name'] == 'test_something.py')
-            self.assertIn('#validation_asset', test_file['tags'])
-
-
-if __name__ == '__main__':
-    print("🧪 Running FileSage 2.0 Cosmic Test Suite")
-    unittest.main(verbosity=2)
+"""
+FileSage 2.0 Test Suite
+Basic functionality tests for cosmic directory analysis
+"""
+
+import json
+import shutil
+import unittest
+import tempfile
+import os
+import time
+from pathlib import Path
+from datetime import datetime
+from typing import List
+
+# Add parent directory to path for imports
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from scanner.walker import walk_directory, iter_directory, build_ignore_matcher, FileMetadata, _iter_walk
+from scanner.interpreter import interpret_structure, iter_interpret, calculate_chaos_index, calculate_folder_summary, FileInfo, InterpretedEntry, format_time_echo
+from scanner.ignore import IgnoreMatcher
+from scanner.rules import ChaosRules, age_in_days, compile_rules, DEFAULT_TAG_RULES, DEFAULT_CHAOS_RULES
+from scanner.compact import CompactScan, from_epoch_us, to_epoch_us, walk_directory_compact
+from scanner.async_walker import FileSystem, iter_async, mount_of
+from scanner.process_walker import ProcessWalker, interpret_directory
+from scanner import batch
+from scanner.metrics import METRICS, profiled
+from scanner.dedup import DuplicateFinder, find_duplicates
+from scanner.content import analyze_content, analyze_file, is_analysable, measure_content
+from scanner.edwardizer import edwardize, iter_edwardize
+from scanner.scan_cache import ScanCache, verify_cache, clear_cache
+from scanner.index_db import IndexWriter, ScanIndex, index_structure
+from scanner import index_db
+from scanner.rollup import compute_rollups, subtree_chaos
+from scanner.sampling import estimate_totals, sample_directory, t_quantile
+from scanner.snapshot import Snapshot, SnapshotError, SnapshotWriter, diff_snapshots, latest_snapshots, snapshot_path
+from scanner.settings import SettingsError, load_settings, validate_settings
+from scanner.watcher import FolderWatcher, PollingWatcher, create_watcher, wait_for_changes
+from writer.markdown_writer import write_markdown, write_markdown_stream
+from writer.report_stats import aggregate_report, ReportAccumulator, SUMMARY_ITEM_LIMIT
+from writer.leaderboards import TopK
+from writer.sharded_writer import write_markdown_sharded
+from writer.live_report import LiveReport
+from writer.batch_summary import report_paths
+from writer.fragment_cache import FragmentCache
+from writer.ndjson_writer import write_ndjson
+from writer.diff_writer import write_diff_markdown, write_diff_ndjson
+import main as filesage_main
+
+
+class TestWalker(unittest.TestCase):
+    """Test the cosmic directory walker"""
+    
+    def setUp(self):
+        """Create a temporary test directory structure"""
+        self.test_dir = tempfile.mkdtemp()
+        
+        # Create test structure
+        (Path(self.test_dir) / "test.py").write_text("print('hello')")
+        (Path(self.test_dir) / "README.md").write_text("# Test Project")
+        (Path(self.test_dir) / "config.yaml").write_text("setting: value")
+        
+        subdir = Path(self.test_dir) / "src"
+        subdir.mkdir()
+        (subdir / "main.py").write_text("# Main module")
+        
+    def tearDown(self):
+        """Clean up test directory"""
+        import shutil
+        shutil.rmtree(self.test_dir)
+    
+    def test_walk_directory(self):
+        """Test basic directory walking functionality"""
+        structure = walk_directory(self.test_dir)
+        
+        # Should find root directory and subdirectory
+        self.assertEqual(len(structure), 2)
+        
+        # Check root directory
+        root = next(entry for entry in structure if entry['path'] == '.')
+        self.assertEqual(len(root['files']), 3)  # test.py, README.md, config.yaml
+        
+        # Check that files have required fields including tags
+        for file in root['files']:
+            self.assertIn('name', file)
+            self.assertIn('size', file)
+            self.assertIn('modified', file)
+            self.assertIn('tags', file)
+
+    def test_scandir_engine_matches_walk(self):
+        """Test that the threaded scandir engine mirrors os.walk output"""
+        docs = Path(self.test_dir) / "src" / "docs"
+        docs.mkdir()
+        (docs / "guide.md").write_text("# Guide")
+        (Path(self.test_dir) / "src" / "test_utils.py").write_text("pass")
+        (Path(self.test_dir) / "node_modules").mkdir()
+        (Path(self.test_dir) / "node_modules" / "dep.js").write_text("")
+
+        expected = walk_directory(self.test_dir, engine="walk")
+        for workers in (1, 4):
+            actual = walk_directory(self.test_dir, engine="scandir", workers=workers)
+            self.assertEqual(expected, actual)
+
+    def test_unknown_engine_rejected(self):
+        """Test that an unknown traversal engine raises"""
+        with self.assertRaises(ValueError):
+            walk_directory(self.test_dir, engine="teleport")
+
+
+class TestSettings(unittest.TestCase):
+    """Test settings loading, caching and validation"""
+
+    def test_loaded_once_from_package(self):
+        """Test that settings resolve relative to the package and are parsed once per process"""
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as test_dir:
+            os.chdir(test_dir)
+            try:
+                settings = load_settings()
+            finally:
+                os.chdir(cwd)
+        self.assertIn("tag_rules", settings)
+        self.assertIs(load_settings(), settings)
+
+    def test_explicit_path_and_validation(self):
+        """Test loading another file and rejecting wrongly typed values"""
+        with tempfile.TemporaryDirectory() as test_dir:
+            path = Path(test_dir) / "settings.yaml"
+            path.write_text("scan_engine: scandir\nscan_workers: 3\n")
+            self.assertEqual(load_settings(str(path))["scan_workers"], 3)
+
+        with self.assertRaisesRegex(SettingsError, "'scan_workers' must be int"):
+            validate_settings({"scan_workers": True})
+        with self.assertRaisesRegex(SettingsError, "'output_mode' must be one of"):
+            validate_settings({"output_mode": "pdf"})
+        self.assertEqual(validate_settings({"content_workers": None, "custom": 1}),
+                         {"content_workers": None, "custom": 1})
+
+    def test_range_checks(self):
+        """Test that numbers outside their key's range are rejected"""
+        with self.assertRaisesRegex(SettingsError, r"'sample_fraction' must be in \(0, 1\], got 2"):
+            validate_settings({"sample_fraction": 2})
+        with self.assertRaisesRegex(SettingsError, r"'sample_fraction' must be in \(0, 1\], got 0"):
+            validate_settings({"sample_fraction": 0})
+        with self.assertRaisesRegex(SettingsError, "'scan_workers' must be at least 1, got 0"):
+            validate_settings({"scan_workers": 0})
+        with self.assertRaisesRegex(SettingsError, "'sample_max_seconds' must be above 0, got -1"):
+            validate_settings({"sample_max_seconds": -1})
+        self.assertEqual(validate_settings({"sample_fraction": 1, "scan_processes": None}),
+                         {"sample_fraction": 1, "scan_processes": None})
+
+    def test_null_ignore_patterns(self):
+        """Test that an empty ignore_patterns key scans with no patterns instead of crashing"""
+        self.assertEqual(validate_settings({"ignore_patterns": None}), {"ignore_patterns": None})
+        matcher = build_ignore_matcher({"ignore_patterns": None})
+        self.assertFalse(matcher.matches("node_modules", True))
+        with tempfile.TemporaryDirectory() as test_dir:
+            (Path(test_dir) / "a.txt").write_text("a")
+            entries = list(_iter_walk(test_dir, matcher, compile_rules({}).tags))
+        self.assertEqual([f["name"] for f in entries[0]["files"]], ["a.txt"])
+
+
+class TestIgnoreMatcher(unittest.TestCase):
+    """Test the compiled gitignore-style ignore matcher"""
+
+    def test_names_match_whole_components(self):
+        """Test that plain names no longer match as substrings"""
+        matcher = IgnoreMatcher.from_patterns(["env", ".git", "node_modules"])
+        self.assertTrue(matcher.matches("env", True))
+        self.assertTrue(matcher.matches("src/env", True))
+        self.assertFalse(matcher.matches("environment", True))
+        self.assertFalse(matcher.matches(".github", True))
+
+    def test_globs_anchoring_negation_and_dir_only(self):
+        """Test anchored globs, negation and directory-only rules"""
+        matcher = IgnoreMatcher.from_patterns([
+            "*.log", "!keep.log", "/build", "docs/**/*.tmp", "cache/", "[Tt]emp?"
+        ])
+        self.assertTrue(matcher.matches("a/b/debug.log", False))
+        self.assertFalse(matcher.matches("a/keep.log", False))
+        self.assertTrue(matcher.matches("build", True))
+        self.assertFalse(matcher.matches("src/build", True))
+        self.assertTrue(matcher.matches("docs/x/y/z.tmp", False))
+        self.assertTrue(matcher.matches("docs/z.tmp", False))
+        self.assertFalse(matcher.matches("src/z.tmp", False))
+        self.assertTrue(matcher.matches("src/cache", True))
+        self.assertFalse(matcher.matches("src/cache", False))
+        self.assertTrue(matcher.matches("Temp1", True))
+        self.assertFalse(matcher.matches("Temp12", True))
+
+    def test_wildcard_globs_by_literal(self):
+        """Test that globs indexed by suffix, prefix or inner text keep last-match-wins semantics"""
+        patterns = [f"*tmp{i}*" for i in range(300)] + ["cache_*_7", "*_old.bak", "*log?.txt", "!*tmp42*", "*"]
+        matcher = IgnoreMatcher.from_patterns(patterns[:-1])
+        self.assertTrue(matcher.matches("src/a_tmp123_b", False))
+        self.assertFalse(matcher.matches("src/a_tmp42_b", False))
+        self.assertTrue(matcher.matches("cache_x_7", True))
+        self.assertFalse(matcher.matches("cache_x_8", True))
+        self.assertTrue(matcher.matches("db_old.bak", False))
+        self.assertTrue(matcher.matches("log1.txt", False))
+        self.assertFalse(matcher.matches("log12.txt", False))
+        self.assertTrue(IgnoreMatcher.from_patterns(patterns).matches("a_tmp42_b", False))
+
+    def test_gitignore_prunes_subtrees(self):
+        """Test that .gitignore rules prune folders in both engines"""
+        from unittest import mock
+        with tempfile.TemporaryDirectory() as test_dir:
+            root = Path(test_dir)
+            (root / ".gitignore").write_text("dist/\n*.bak\n")
+            (root / "main.py").write_text("pass")
+            (root / "old.bak").write_text("")
+            (root / "dist").mkdir()
+            (root / "dist" / "bundle.js").write_text("")
+            (root / "pkg").mkdir()
+            (root / "pkg" / ".gitignore").write_text("generated/\n")
+            (root / "pkg" / "generated").mkdir()
+            (root / "pkg" / "generated" / "x.py").write_text("")
+            (root / "generated").mkdir()
+
+            settings = {"ignore_patterns": [], "use_gitignore": True}
+            with mock.patch("scanner.walker.load_settings", return_value=settings):
+                walked = walk_directory(test_dir, engine="walk")
+                scanned = walk_directory(test_dir, engine="scandir", workers=2)
+
+            self.assertEqual(walked, scanned)
+            self.assertEqual(sorted(entry['path'] for entry in walked), ['.', 'generated', 'pkg'])
+            root_entry = next(entry for entry in walked if entry['path'] == '.')
+            self.assertNotIn('old.bak', [f['name'] for f in root_entry['files']])
+
+
+class TestRuleEngine(unittest.TestCase):
+    """Test the data-driven tagging and chaos rule engine"""
+
+    def test_custom_tag_rule(self):
+        """Test that a tag added in settings is applied to files and folders"""
+        rules = compile_rules({
+            "tag_rules": DEFAULT_TAG_RULES + [{
+                "tag": "#rust_source",
+                "extensions": [".rs"],
+                "name_contains": ["cargo"],
+                "path_prefixes": ["crates"],
+                "folder_from_files": True
+            }]
+        }).tags
+        self.assertEqual(rules.file_tags(rules.path_mask("src"), "lib.rs"), ["#rust_source"])
+        self.assertEqual(rules.file_tags(rules.path_mask("."), "Cargo.toml"), ["#rust_source"])
+        self.assertEqual(rules.file_tags(rules.path_mask("crates/docs"), "notes.md"),
+                         ["#documentation", "#rust_source"])
+        self.assertEqual(rules.folder_tags(rules.path_mask("src"), ["main.rs", "README.md"]),
+                         ["#documentation", "#rust_source"])
+        self.assertEqual(rules.folder_tags(rules.path_mask("src"), ["main.py"]), [])
+
+    def test_folder_tags_match_file_names_case_sensitively(self):
+        """Test that folder tags from files keep the original case-sensitive matching while file tags fold case"""
+        rules = compile_rules({}).tags
+        self.assertEqual(rules.folder_tags(rules.path_mask("src"), ["README.MD", "Test_app.py"]), [])
+        self.assertEqual(rules.folder_tags(rules.path_mask("src"), ["README.md", "test_app.py"]),
+                         ["#documentation", "#validation_asset"])
+        self.assertEqual(rules.file_tags(rules.path_mask("src"), "README.MD"), ["#documentation"])
+        self.assertEqual(rules.file_tags(rules.path_mask("src"), "Test_app.py"), ["#validation_asset"])
+
+    def test_custom_chaos_rules(self):
+        """Test that chaos scoring follows the configured weights"""
+        chaos = compile_rules({
+            "chaos_rules": dict(DEFAULT_CHAOS_RULES, name_rules=[{"regex": [r"^draft"], "score": 5.0}],
+                                default_extension_weight=0.0)
+        }).chaos
+        self.assertEqual(chaos.score("draft_notes", 0, None, []), 6.0)
+        self.assertEqual(chaos.score("final_notes", 0, None, []), 1.0)
+        self.assertEqual(chaos.score("draft.pdf", 10 ** 6, None, ["#cache"]), 10.0)
+
+    def test_walker_uses_settings_rules(self):
+        """Test that walk_directory tags files with rules from settings"""
+        from unittest import mock
+        with tempfile.TemporaryDirectory() as test_dir:
+            (Path(test_dir) / "schema.proto").write_text("")
+            settings = {"ignore_patterns": [], "tag_rules": [{"tag": "#protocol", "extensions": [".proto"]}]}
+            with mock.patch("scanner.walker.load_settings", return_value=settings):
+                structure = walk_directory(test_dir)
+            self.assertEqual(structure[0]['files'][0]['tags'], ["#protocol"])
+
+
+class TestScanCache(unittest.TestCase):
+    """Test the persistent incremental scan cache"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        (Path(self.test_dir) / "README.md").write_text("# Test")
+        (Path(self.test_dir) / "src").mkdir()
+        (Path(self.test_dir) / "src" / "main.py").write_text("pass")
+        self._age_directories()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.cache_dir)
+
+    def _age_directories(self):
+        # Push folder mtimes outside the racy window so they are cacheable
+        old = datetime.now().timestamp() - 3600
+        for root, _, _ in os.walk(self.test_dir):
+            os.utime(root, (old, old))
+
+    def _scan(self):
+        cache = ScanCache(self.test_dir, cache_dir=self.cache_dir)
+        cache.load()
+        structure = walk_directory(self.test_dir, cache=cache)
+        cache.save()
+        return cache, structure
+
+    def test_unchanged_directories_are_reused(self):
+        """Test that a second run reuses every unchanged folder"""
+        first_cache, first = self._scan()
+        self.assertEqual(first_cache.hits, 0)
+
+        second_cache, second = self._scan()
+        self.assertEqual(second_cache.hits, 2)
+        self.assertEqual(second_cache.misses, 0)
+        self.assertEqual(first, second)
+
+    def test_changed_directory_is_relisted(self):
+        """Test that adding a file invalidates only its folder"""
+        self._scan()
+        (Path(self.test_dir) / "src" / "helper.py").write_text("pass")
+        cache, structure = self._scan()
+        self.assertEqual(cache.hits, 1)
+        src = next(entry for entry in structure if entry['path'] == 'src')
+        self.assertEqual(sorted(f['name'] for f in src['files']), ['helper.py', 'main.py'])
+
+    def test_restat_sees_in_place_edits(self):
+        """Test that in-place edits stay stale in the cache unless files are re-stat'ed"""
+        self._scan()
+        (Path(self.test_dir) / "src" / "main.py").write_text("x" * 5000)
+        cache, structure = self._scan()
+        self.assertEqual((cache.hits, cache.misses), (2, 0))
+        src = next(entry for entry in structure if entry['path'] == 'src')
+        self.assertEqual(src['files'][0]['size'], 4)
+
+        cache = ScanCache(self.test_dir, cache_dir=self.cache_dir, restat=True)
+        cache.load()
+        structure = walk_directory(self.test_dir, cache=cache)
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(structure, walk_directory(self.test_dir))
+        src = next(entry for entry in structure if entry['path'] == 'src')
+        self.assertEqual(src['files'][0]['size'], 5000)
+
+    def test_verify_and_clear(self):
+        """Test cache integrity checking and clearing"""
+        cache, _ = self._scan()
+        self.assertEqual([ok for _, ok, _ in verify_cache(self.cache_dir)], [True])
+
+        with open(cache.path, "r+", encoding="utf-8") as f:
+            content = f.read().replace("main.py", "evil.py")
+            f.seek(0)
+            f.write(content)
+        self.assertEqual([ok for _, ok, _ in verify_cache(self.cache_dir)], [False])
+        self.assertFalse(ScanCache(self.test_dir, cache_dir=self.cache_dir).load())
+
+        self.assertEqual(clear_cache(self.cache_dir), 1)
+        self.assertEqual(verify_cache(self.cache_dir), [])
+
+    def test_rejects_engines_without_cache_support(self):
+        """Test that the cache is never silently swapped onto the scandir engine"""
+        cache = ScanCache(self.test_dir, cache_dir=self.cache_dir)
+        for engine in ("async", "process"):
+            with self.assertRaises(ValueError):
+                walk_directory(self.test_dir, engine, cache=cache)
+
+
+class TestCompactScan(unittest.TestCase):
+    """Test the array-backed compact scan representation"""
+
+    def test_round_trip_through_adapter(self):
+        """Test that the adapter rebuilds the dict structure exactly, content metrics included"""
+        with tempfile.TemporaryDirectory() as test_dir:
+            (Path(test_dir) / "README.md").write_text("# Test")
+            (Path(test_dir) / "src").mkdir()
+            (Path(test_dir) / "src" / "test_utils.py").write_text("pass")
+            (Path(test_dir) / "empty").mkdir()
+
+            structure = walk_directory(test_dir)
+            scan = walk_directory_compact(test_dir)
+            self.assertEqual(len(scan), len(structure))
+            self.assertEqual(scan.file_count, 2)
+
+            self.assertEqual(list(scan), structure)
+            analysed = analyze_content(structure, test_dir)
+            self.assertEqual(list(CompactScan.from_structure(analysed)), analysed)
+            self.assertIn("content", analysed[1]["files"][0])
+
+    def test_adapter_feeds_interpreter_and_writer(self):
+        """Test that interpret_structure and write_markdown consume a CompactScan"""
+        structure = [{
+            'path': '.', 'folders': ['docs'], 'tags': ['#documentation'],
+            'files': [{'name': 'README.md', 'size': 10, 'modified': datetime(2020, 1, 1), 'tags': ['#documentation']}]
+        }, {'path': 'docs', 'folders': [], 'tags': [], 'files': []}]
+        scan = CompactScan.from_structure(structure)
+        interpreted = interpret_structure(scan)
+        self.assertEqual([entry['path'] for entry in interpreted], ['.', 'docs'])
+        self.assertEqual(interpreted[0]['files'][0]['chaos_index'],
+                         calculate_chaos_index(structure[0]['files'][0]))
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            output_path = os.path.join(out_dir, "report.md")
+            write_markdown(interpreted, output_path)
+            with open(output_path, encoding="utf-8") as f:
+                self.assertIn("README.md", f.read())
+
+
+class TestBatchScoring(unittest.TestCase):
+    """Test batch chaos index and folder summary computation"""
+
+    def setUp(self):
+        now = datetime(2024, 6, 1, 12, 0, 0)
+        names = ['README.md', 'requirements.txt', 'old_backup.py', 'core.pyc', 'big.pdf', 'notes', 'test_utils.py']
+        sizes = [10, 20000, 150000, 5, 300000, 0, 12000]
+        ages = [1, 100, 400, 2000, 30, 91, 366]
+        tag_sets = [['#documentation'], [], ['#composite_action'], ['#cache'], [], ['#config', '#workflow'],
+                    ['#validation_asset', '#composite_action']]
+        structure = [{'path': 'd%d' % d, 'folders': [], 'tags': [], 'files': [{
+            'name': names[i], 'size': sizes[i] * (d + 1),
+            'modified': datetime.fromtimestamp(int(now.timestamp()) - ages[i] * 86400 - d * 3600),
+            'tags': tag_sets[i]} for i in range(len(names)) if (i + d) % 3]} for d in range(4)]
+        structure.append({'path': 'empty', 'folders': [], 'tags': [], 'files': []})
+        self.now = now
+        self.scan = CompactScan.from_structure(structure)
+        self.interpreted = interpret_structure(self.scan)
+        self.expected = [calculate_chaos_index(f, now) for entry in self.scan for f in entry['files']]
+
+    def check_scores(self, use_numpy):
+        chaos, summaries = batch.score_compact_scan(self.scan, self.now, use_numpy=use_numpy)
+        self.assertEqual([float(c) for c in chaos], self.expected)
+        for dir_index, entry in enumerate(self.interpreted):
+            files = [dict(f, chaos_index=self.expected[i]) for i, f in
+                     zip(self.scan.file_range(dir_index), entry['files'])]
+            self.assertEqual(summaries[dir_index], calculate_folder_summary(files))
+
+    def test_pure_python_matches_scalar(self):
+        """Test that the fallback path reproduces the per-file scores exactly"""
+        self.check_scores(use_numpy=False)
+
+    @unittest.skipIf(batch.np is None, "NumPy not installed")
+    def test_numpy_matches_scalar(self):
+        """Test that the vectorized path reproduces the per-file scores exactly"""
+        self.check_scores(use_numpy=True)
+
+    def test_interpret_compact(self):
+        """Test that the batch interpreter yields interpret_structure output"""
+        interpreted = list(batch.iter_interpret_compact(self.scan, self.now))
+        self.assertEqual([f['chaos_index'] for e in interpreted for f in e['files']], self.expected)
+        for entry in interpreted + self.interpreted:
+            for file in entry['files']:
+                del file['chaos_index']
+        self.assertEqual(interpreted, self.interpreted)
+
+    def test_content_scores_match_scalar(self):
+        """Test that content metrics add the same term in both paths"""
+        structure = [{'path': '.', 'folders': [], 'tags': [], 'files': [
+            {'name': 'plain.txt', 'size': 10, 'modified': self.now, 'tags': []},
+            {'name': 'busy.py', 'size': 10, 'modified': self.now, 'tags': [],
+             'content': {'lines': 5000, 'todo_density': 3.0}}]}]
+        scan = CompactScan.from_structure(structure)
+        expected = [calculate_chaos_index(f, self.now) for f in structure[0]['files']]
+        self.assertGreater(expected[1], expected[0])
+        for use_numpy in (False, True):
+            chaos, _ = batch.score_compact_scan(scan, self.now, use_numpy=use_numpy)
+            self.assertEqual([float(c) for c in chaos], expected)
+
+    @unittest.skipUnless(hasattr(time, 'tzset'), "time.tzset not available")
+    def test_ages_match_scalar_across_dst(self):
+        """Test that wall-clock ages agree with the scalar rules when DST starts between mtime and now"""
+        saved = os.environ.get('TZ')
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+        try:
+            now = datetime(2024, 3, 10, 12, 0, 0)  # 23 real hours after the same time the day before
+            chaos = ChaosRules({'base': 0.0, 'age_thresholds': [{'above_days': 0, 'score': 1.0}]})
+            modified = [datetime(2024, 3, 9, 12, 0, 0), datetime(2024, 3, 9, 12, 30, 0),
+                        datetime(2024, 3, 9, 11, 30, 0), datetime(2024, 3, 10, 1, 59, 59, 999999)]
+            expected = [chaos.score('f', 0, m, [], now) for m in modified]
+            self.assertEqual(expected, [1.0, 0.0, 1.0, 0.0])
+            mtimes = [to_epoch_us(m) for m in modified]
+            for use_numpy in (False, True):
+                scores = batch.batch_chaos_indexes(['f'] * 4, [0] * 4, mtimes, [0] * 4, [], now=now,
+                                                   rules=chaos, use_numpy=use_numpy)
+                self.assertEqual([float(s) for s in scores], expected)
+
+            # Every 7h for over a year covers both switches and both sides of each, at every hour of the day
+            start = to_epoch_us(datetime(2023, 1, 1))
+            mtimes = [start + step * 7 * 3_600_000_000 + step for step in range(1500)]
+            ages = [age_in_days(from_epoch_us(m), now) for m in mtimes]
+            for use_numpy in (False, True):
+                self.assertEqual([int(age) for age in batch.batch_ages(mtimes, now, use_numpy)], ages)
+        finally:
+            if saved is None:
+                del os.environ['TZ']
+            else:
+                os.environ['TZ'] = saved
+            time.tzset()
+
+
+class TestMetrics(unittest.TestCase):
+    """Test per-stage pipeline instrumentation"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.out_dir = tempfile.mkdtemp()
+        (Path(self.test_dir) / "README.md").write_text("# Test")
+        (Path(self.test_dir) / "src").mkdir()
+        (Path(self.test_dir) / "src" / "main.py").write_text("print('hi')")
+        os.symlink(os.path.join(self.test_dir, "missing"), os.path.join(self.test_dir, "src", "dangling.py"))
+        METRICS.enable()
+
+    def tearDown(self):
+        METRICS.disable()
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.out_dir)
+
+    def check_stages(self, report_path):
+        stages = METRICS.to_dict()["stages"]
+        for name in ("walk", "interpret", "edwardize", "write"):
+            self.assertEqual((stages[name]["dirs"], stages[name]["files"]), (2, 3), name)
+            self.assertGreaterEqual(stages[name]["seconds"], 0.0)
+        self.assertEqual(stages["walk"]["stat_failures"], 1)
+        self.assertEqual(stages["write"]["bytes_written"], os.path.getsize(report_path))
+
+    def test_batch_pipeline(self):
+        """Test that every batch stage records its folders, files and output"""
+        report_path = os.path.join(self.out_dir, "report.md")
+        write_markdown(edwardize(interpret_structure(walk_directory(self.test_dir))), report_path)
+        self.check_stages(report_path)
+
+    def test_streaming_pipeline_and_sidecars(self):
+        """Test stage accounting through nested generators, plus the JSON and profile dumps"""
+        report_path = os.path.join(self.out_dir, "report.md")
+        profile_path = os.path.join(self.out_dir, "report.prof")
+        with profiled(profile_path):
+            write_markdown_stream(iter_edwardize(iter_interpret(iter_directory(self.test_dir))), report_path)
+        self.check_stages(report_path)
+        self.assertTrue(os.path.getsize(profile_path) > 0)
+
+        metrics_path = os.path.join(self.out_dir, "report.metrics.json")
+        METRICS.write_json(metrics_path)
+        with open(metrics_path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["stages"]["walk"]["files"], 3)
+
+    def test_disabled_is_passthrough(self):
+        """Test that nothing is recorded while metrics are off"""
+        METRICS.disable()
+        before = METRICS.to_dict()["stages"]["walk"]["files"]
+        interpret_structure(walk_directory(self.test_dir))
+        self.assertEqual(METRICS.to_dict()["stages"]["walk"]["files"], before)
+
+
+class TestDuplicateFinder(unittest.TestCase):
+    """Test staged duplicate detection"""
+
+    def test_staged_detection(self):
+        """Test size, partial-hash and full-hash stages, and that hard links are not duplicates"""
+        with tempfile.TemporaryDirectory() as test_dir:
+            root = Path(test_dir)
+            (root / "sub").mkdir()
+            (root / "a.txt").write_text("same words")
+            (root / "sub" / "b.txt").write_text("same words")
+            (root / "c.txt").write_text("diff words")
+            (root / "unique.txt").write_text("one of a kind")
+            # Same first and last block, different middle: only the full hash tells them apart
+            (root / "big1.bin").write_bytes(b"H" * 8 + b"x" * 20 + b"T" * 8)
+            (root / "big2.bin").write_bytes(b"H" * 8 + b"y" * 20 + b"T" * 8)
+            (root / "big3.bin").write_bytes(b"H" * 8 + b"x" * 20 + b"T" * 8)
+            os.link(root / "a.txt", root / "a_link.txt")
+            (root / "empty1").write_text("")
+            (root / "empty2").write_text("")
+
+            finder = DuplicateFinder(test_dir, workers=2, block=8)
+            for entry in walk_directory(test_dir):
+                finder.add(entry)
+            groups = finder.find()
+
+            self.assertEqual([group['paths'] for group in groups],
+                             [['big1.bin', 'big3.bin'], ['a.txt', os.path.join('sub', 'b.txt')]])
+            self.assertEqual(groups[0]['reclaimable'], 36)
+            # unique.txt and the empty files are never hashed and the hard link is collapsed first;
+            # the 10-byte files fit in two blocks, so only the big files need a full hash
+            self.assertEqual(finder.files_hashed, 3 + 3 + 3)
+
+    def test_report_section(self):
+        """Test the duplicates section in the markdown report"""
+        with tempfile.TemporaryDirectory() as test_dir, tempfile.TemporaryDirectory() as out_dir:
+            (Path(test_dir) / "one.py").write_text("print('echo')")
+            (Path(test_dir) / "two.py").write_text("print('echo')")
+            structure = edwardize(interpret_structure(walk_directory(test_dir)))
+            self.assertEqual(len(find_duplicates(test_dir, structure)), 1)
+
+            output_path = os.path.join(out_dir, "report.md")
+            write_markdown(structure, output_path, dedup=DuplicateFinder(test_dir))
+            with open(output_path, encoding="utf-8") as f:
+                content = f.read()
+            self.assertIn("## ♻️ Duplicate Artifacts", content)
+            self.assertIn("| Reclaimable Space | 13B |", content)
+
+
+class TestContentAnalysis(unittest.TestCase):
+    """Test content-aware metrics"""
+
+    SOURCE = (
+        "import os\n"
+        "from typing import List\n"
+        "\n"
+        "def walk(paths):\n"
+        "    for path in paths:\n"
+        "        if path:\n"
+        "            # TODO: handle symlinks\n"
+        "            print(path)\n"
+    )
+
+    def test_measure_content(self):
+        """Test line, import, nesting and TODO counts for indentation and bracket languages"""
+        metrics = measure_content(self.SOURCE.encode(), ".py")
+        self.assertEqual((metrics['lines'], metrics['imports'], metrics['max_depth'], metrics['todos']), (8, 2, 3, 1))
+        self.assertEqual(metrics['todo_density'], 12.5)
+
+        js = b"const fs = require('fs');\nfunction f() { if (a) { return [1, 2]; } }"
+        metrics = measure_content(js, ".js")
+        self.assertEqual((metrics['lines'], metrics['imports'], metrics['max_depth']), (2, 1, 3))
+
+    def test_skips_binary_large_and_unknown_files(self):
+        """Test the cheap pre-filter, binary sniffing and bounded reads"""
+        self.assertFalse(is_analysable("image.png", 100))
+        self.assertFalse(is_analysable("huge.py", 10 ** 9))
+        self.assertFalse(is_analysable("empty.py", 0))
+        self.assertTrue(is_analysable("Makefile", 10))
+        with tempfile.TemporaryDirectory() as test_dir:
+            binary = os.path.join(test_dir, "blob.py")
+            Path(binary).write_bytes(b"abc\0def")
+            self.assertIsNone(analyze_file(binary))
+
+            source = os.path.join(test_dir, "long.py")
+            Path(source).write_text(self.SOURCE * 10)
+            metrics = analyze_file(source, max_bytes=len(self.SOURCE))
+            self.assertTrue(metrics['truncated'])
+            self.assertEqual(metrics['lines'], 8)
+
+    def test_pool_feeds_chaos_index(self):
+        """Test that pooled and in-process analysis agree and raise the chaos index"""
+        with tempfile.TemporaryDirectory() as test_dir:
+            (Path(test_dir) / "pkg").mkdir()
+            (Path(test_dir) / "pkg" / "messy.py").write_text("# TODO\n" * 50 + "import os\n" * 30)
+            (Path(test_dir) / "logo.png").write_bytes(b"\x89PNG\0")
+
+            in_process = analyze_content(walk_directory(test_dir), test_dir, workers=1)
+            pooled = analyze_content(walk_directory(test_dir), test_dir, workers=2)
+            self.assertEqual(in_process, pooled)
+
+            messy = next(f for entry in pooled for f in entry['files'] if f['name'] == 'messy.py')
+            self.assertEqual(messy['content']['imports'], 30)
+            self.assertNotIn('content', next(f for entry in pooled for f in entry['files'] if f['name'] == 'logo.png'))
+            plain = {key: value for key, value in messy.items() if key != 'content'}
+            self.assertAlmostEqual(calculate_chaos_index(messy) - calculate_chaos_index(plain), 0.8 + 1.0)
+
+
+class TestFragmentCache(unittest.TestCase):
+    """Test reuse of rendered folder sections between runs"""
+
+    def _render(self, test_dir, cache_dir, output_path):
+        fragments = FragmentCache(test_dir, cache_dir)
+        fragments.load()
+        write_markdown(edwardize(interpret_structure(walk_directory(test_dir))), output_path, fragments=fragments)
+        fragments.save()
+        with open(output_path, encoding="utf-8") as f:
+            content = f.read()
+        breakdown = content[content.index("## 📂"):content.index("## 🧬")]
+        return fragments, breakdown
+
+    def test_unchanged_folders_reused(self):
+        """Test that unchanged folders come from the cache and changed ones are re-rendered"""
+        with tempfile.TemporaryDirectory() as test_dir, tempfile.TemporaryDirectory() as out_dir:
+            (Path(test_dir) / "docs").mkdir()
+            (Path(test_dir) / "main.py").write_text("print('hi')")
+            (Path(test_dir) / "docs" / "guide.md").write_text("# guide")
+            cache_dir = os.path.join(out_dir, "cache")
+            output_path = os.path.join(out_dir, "report.md")
+
+            first, breakdown = self._render(test_dir, cache_dir, output_path)
+            self.assertEqual((first.hits, first.misses), (0, 2))
+
+            # Edward's commentary is random, yet the cached sections come back verbatim
+            second, again = self._render(test_dir, cache_dir, output_path)
+            self.assertEqual((second.hits, second.misses), (2, 0))
+            self.assertEqual(again, breakdown)
+
+            (Path(test_dir) / "docs" / "guide.md").write_text("# a longer guide")
+            third, _ = self._render(test_dir, cache_dir, output_path)
+            self.assertEqual((third.hits, third.misses), (1, 1))
+            self.assertEqual(verify_cache(cache_dir), [])  # fragment files are not scan caches
+
+    def test_time_buckets(self):
+        """Test that relative-time text, and the cache key, only change when the bucket does"""
+        modified = datetime(2024, 1, 1, 12, 0)
+        self.assertEqual(format_time_echo(modified, datetime(2024, 1, 4, 12, 0)),
+                         "modified 3 days ago — reverberating in the digital aether")
+        self.assertEqual(format_time_echo(modified, datetime(2024, 1, 16)),
+                         "altered 2 weeks past — distant cosmic whispers")
+        self.assertEqual(format_time_echo(modified, datetime(2024, 3, 5)),
+                         "crafted 2 months ago — ancient digital archaeology")
+
+        entry = {"path": ".", "tags": [], "folder_archetype": "Root", "files": [
+            {"name": "a.py", "size": 1, "modified": modified, "tags": [], "chaos_index": 1.0}]}
+        keys = [FragmentCache(".", now=now).key(entry)
+                for now in (datetime(2024, 1, 16), datetime(2024, 1, 19), datetime(2024, 1, 23))]
+        self.assertEqual(keys[0], keys[1])  # both "2 weeks"
+        self.assertNotEqual(keys[1], keys[2])  # "3 weeks"
+
+
+class TestWatchMode(unittest.TestCase):
+    """Test change detection and incremental report refreshes"""
+
+    def test_watcher_interface_is_abstract(self):
+        """Test that a watcher missing part of the interface cannot be created"""
+        class AddOnly(FolderWatcher):
+            def add(self, rel_dir):
+                pass
+
+        with self.assertRaises(TypeError):
+            AddOnly()
+
+    def test_polling_watcher(self):
+        """Test that polling reports the folders whose files or listings changed"""
+        with tempfile.TemporaryDirectory() as test_dir:
+            (Path(test_dir) / "sub").mkdir()
+            (Path(test_dir) / "other").mkdir()
+            watcher = PollingWatcher(test_dir, interval=0)
+            for folder in (".", "sub", "other"):
+                watcher.add(folder)
+            self.assertEqual(watcher.poll(0), set())
+
+            (Path(test_dir) / "sub" / "new.py").write_text("x = 1")
+            self.assertEqual(wait_for_changes(watcher, debounce=0, timeout=1), {"sub"})
+
+    def test_inotify_watcher(self):
+        """Test that inotify events are mapped back to the changed folder"""
+        with tempfile.TemporaryDirectory() as test_dir:
+            (Path(test_dir) / "sub").mkdir()
+            try:
+                watcher = create_watcher(test_dir, [".", "sub"], use_inotify=True)
+            except OSError:
+                self.skipTest("inotify is not available")
+            try:
+                (Path(test_dir) / "sub" / "new.py").write_text("x = 1")
+                self.assertEqual(wait_for_changes(watcher, debounce=0.05, timeout=2), {"sub"})
+            finally:
+                watcher.close()
+
+    def test_incremental_refresh(self):
+        """Test that refreshing changed folders matches a full rescan and leaves other sections alone"""
+        with tempfile.TemporaryDirectory() as test_dir, tempfile.TemporaryDirectory() as out_dir:
+            root = Path(test_dir)
+            for folder in ("docs", "src", "src/deep", "old"):
+                (root / folder).mkdir()
+            (root / "README.md").write_text("# hi")
+            (root / "docs" / "guide.md").write_text("guide")
+            (root / "src" / "app.py").write_text("print('app')")
+            (root / "old" / "legacy.py").write_text("pass")
+
+            report = LiveReport(test_dir, os.path.join(out_dir, "report.md"))
+            report.build()
+            report.write()
+            untouched = report._sections["docs"]
+
+            (root / "src" / "app.py").write_text("print('a bigger app')")
+            (root / "src" / "deep" / "fresh").mkdir()
+            shutil.rmtree(root / "old")
+            (root / "new").mkdir()
+            (root / "new" / "test_new.py").write_text("assert True")
+            report.rendered = 0
+            added, removed = report.refresh({".", "src"})
+
+            self.assertEqual(report.rendered, 3)  # root, src and the new folder
+            self.assertEqual(added, ["new"])
+            self.assertEqual(removed, ["old"])
+            self.assertIs(report._sections["docs"], untouched)
+            self.assertNotIn(os.path.join("src", "deep", "fresh"), report.order)  # src/deep was not rescanned
+
+            report.refresh({os.path.join("src", "deep")})
+            structure = interpret_structure(walk_directory(test_dir))
+            self.assertEqual(report.order, [entry["path"] for entry in structure])
+            expected = aggregate_report(structure)
+            report.write()
+            self.assertEqual((report.totals.total_folders, report.totals.total_files, report.totals.total_size),
+                             (expected.total_folders, expected.total_files, expected.total_size))
+            self.assertEqual(report.totals.tag_counts, expected.tag_counts)
+            self.assertEqual(report.totals.category_items, expected.category_items)
+            with open(report.output_path, encoding="utf-8") as f:
+                content = f.read()
+            self.assertIn("### 📁 `new`", content)
+            self.assertNotIn("legacy.py", content)
+
+
+class TestBatchCLI(unittest.TestCase):
+    """Test the argument-driven, multi-root CLI"""
+
+    def test_roots_file_and_report_names(self):
+        """Test that roots files are merged with positional roots and same-named roots get distinct reports"""
+        with tempfile.TemporaryDirectory() as test_dir:
+            roots_file = Path(test_dir) / "roots.txt"
+            roots_file.write_text("# nightly roots\n/srv/a/app\n\n/srv/b/app  # second copy\n")
+            args = filesage_main.parse_args(["/srv/lib", "--roots-file", str(roots_file), "-j", "3"])
+            self.assertEqual(args.directories, ["/srv/lib", "/srv/a/app", "/srv/b/app"])
+            self.assertEqual(args.jobs, 3)
+            self.assertEqual(report_paths(args.directories, "out"),
+                             [os.path.join("out", name) for name in
+                              ("lib_structure.md", "app_1_structure.md", "app_2_structure.md")])
+
+    def test_engine_flag_overrides_setting(self):
+        """Test that --engine picks the traversal engine for a scan and is rejected with --watch"""
+        from unittest import mock
+        import contextlib
+        import io
+        import scanner.walker
+        with tempfile.TemporaryDirectory() as test_dir, tempfile.TemporaryDirectory() as out_dir:
+            (Path(test_dir) / "README.md").write_text("# hi")
+            with mock.patch("scanner.walker._iter_scandir", wraps=scanner.walker._iter_scandir) as scandir, \
+                    contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(filesage_main.main([test_dir, "-o", out_dir, "--engine", "scandir"]), 0)
+            self.assertTrue(scandir.called)
+            self.assertEqual(os.listdir(out_dir), [os.path.basename(test_dir) + "_structure.md"])
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            filesage_main.parse_args(["/srv/lib", "--watch", "--engine", "async"])
+
+    def test_batch_isolates_failures(self):
+        """Test that every good root gets a report and a bad root is recorded without stopping the batch"""
+        with tempfile.TemporaryDirectory() as test_dir, tempfile.TemporaryDirectory() as out_dir:
+            for name in ("alpha", "beta"):
+                (Path(test_dir) / name).mkdir()
+                (Path(test_dir) / name / "README.md").write_text(f"# {name}")
+            roots = [os.path.join(test_dir, "alpha"), os.path.join(test_dir, "missing"),
+                     os.path.join(test_dir, "beta")]
+
+            results = filesage_main.run_batch(roots, out_dir, jobs=2)
+
+            self.assertEqual([result.root for result in results], roots)
+            self.assertEqual([result.ok for result in results], [True, False, True])
+            self.assertEqual(results[0].files, 1)
+            self.assertTrue(os.path.exists(os.path.join(out_dir, "beta_structure.md")))
+            with open(os.path.join(out_dir, "batch_summary.json"), encoding="utf-8") as f:
+                summary = json.load(f)
+            self.assertEqual(summary[1]["error"], "not a directory")
+            with open(os.path.join(out_dir, "batch_summary.md"), encoding="utf-8") as f:
+                self.assertIn("| Roots Scanned | 2 of 3 |", f.read())
+
+
+class TestScanIndex(unittest.TestCase):
+    """Test the SQLite scan index and its queries"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.test_dir, "project")
+        self.db_path = os.path.join(self.test_dir, "index.sqlite")
+        cache_dir = Path(self.root) / "build"
+        cache_dir.mkdir(parents=True)
+        (cache_dir / "old.pyc").write_bytes(b"x" * 400)
+        (cache_dir / "new.pyc").write_bytes(b"x" * 900)
+        (Path(self.root) / "README.md").write_text("# Project")
+        year_ago = datetime.now().timestamp() - 400 * 86400
+        os.utime(cache_dir / "old.pyc", (year_ago, year_ago))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _index(self):
+        return index_structure(self.root, interpret_structure(walk_directory(self.root)), self.db_path)
+
+    def test_queries_answer_from_index(self):
+        """Test tag, age and chaos filters without touching the filesystem"""
+        self.assertEqual(self._index(), 3)
+        shutil.rmtree(self.root)
+        index = ScanIndex(self.db_path)
+        try:
+            caches = index.files(tag="#cache", order="size")
+            self.assertEqual([row["path"] for row in caches],
+                             [os.path.join("build", "new.pyc"), os.path.join("build", "old.pyc")])
+            stale = index.files(tag="#cache", older_than_days=365)
+            self.assertEqual([row["size"] for row in stale], [400])
+            chaotic = index.folders(min_chaos=0)
+            self.assertIn("build", [row["path"] for row in chaotic])
+            self.assertEqual(index.roots()[0]["files"], 3)
+        finally:
+            index.close()
+
+    def test_failed_scan_is_discarded(self):
+        """Test that a scan raising part way leaves no rows and keeps the previous scan current"""
+        import sqlite3
+        self._index()
+
+        def failing(structure):
+            yield from structure[:1]
+            raise OSError("disk vanished")
+
+        writer = IndexWriter(self.root, self.db_path)
+        with self.assertRaises(OSError):
+            for _ in writer.track(failing(interpret_structure(walk_directory(self.root)))):
+                writer.flush()  # the first folder's rows reach the database before the failure
+        connection = sqlite3.connect(self.db_path)
+        try:
+            self.assertEqual(connection.execute("SELECT COUNT(*) FROM scans WHERE finished IS NULL").fetchone()[0], 0)
+            self.assertEqual(connection.execute("SELECT COUNT(*) FROM folders WHERE scan_id = ?",
+                                                (writer.scan_id,)).fetchone()[0], 0)
+        finally:
+            connection.close()
+        index = ScanIndex(self.db_path)
+        try:
+            self.assertEqual(index.roots()[0]["files"], 3)
+        finally:
+            index.close()
+
+    def test_rescan_replaces_previous_scan(self):
+        """Test that indexing a root again swaps in the new scan instead of duplicating rows"""
+        self._index()
+        (Path(self.root) / "notes.md").write_text("# Notes")
+        self._index()
+        index = ScanIndex(self.db_path)
+        try:
+            self.assertEqual(len(index.roots()), 1)
+            self.assertEqual(len(index.files(limit=None)), 4)
+            scans = index.connection.execute("SELECT COUNT(*) FROM scans").fetchone()[0]
+            self.assertEqual(scans, 1)
+        finally:
+            index.close()
+
+    def test_query_command(self):
+        """Test the query subcommand's JSON output and its missing-index message"""
+        self._index()
+        from unittest.mock import patch
+        with patch("builtins.print") as printed:
+            self.assertEqual(filesage_main.main(["query", "--db", self.db_path, "files", "--tag", "#cache",
+                                                 "--older-than", "365", "--json"]), 0)
+        rows = json.loads(printed.call_args[0][0])
+        self.assertEqual([row["size"] for row in rows], [400])
+        with patch("builtins.print"):
+            self.assertEqual(index_db.main(["--db", os.path.join(self.test_dir, "none.sqlite"), "roots"]), 1)
+
+
+class TestSnapshotDiff(unittest.TestCase):
+    """Test path-sorted snapshots and the merge-join diff"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.test_dir, "project")
+        for folder in ("src", "docs", "build"):
+            os.makedirs(os.path.join(self.root, folder))
+        (Path(self.root) / "src" / "app.py").write_text("print('hi')")
+        (Path(self.root) / "docs" / "guide.md").write_text("# Guide")
+        (Path(self.root) / "build" / "out.txt").write_text("out")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _snapshot(self, name, chunk_size=1000):
+        writer = SnapshotWriter(self.root, os.path.join(self.test_dir, name), chunk_size)
+        for entry in interpret_structure(walk_directory(self.root)):
+            writer.add(entry)
+        return writer.finish()
+
+    def test_spilled_chunks_merge_in_order(self):
+        """Test that a snapshot sorted through spilled chunks matches one sorted in memory"""
+        in_memory = self._snapshot("memory.ndjson")
+        spilled = self._snapshot("spilled.ndjson", chunk_size=2)
+        with Snapshot(in_memory) as a, Snapshot(spilled) as b:
+            self.assertEqual([key for key, _ in a], [key for key, _ in b])
+            self.assertEqual(b.header["files"], 3)
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ["memory.ndjson", "project", "spilled.ndjson"])
+
+    def test_failed_scan_leaves_no_chunks(self):
+        """Test that a scan failing part way through track() deletes its spilled chunks"""
+        writer = SnapshotWriter(self.root, os.path.join(self.test_dir, "failed.ndjson"), chunk_size=1)
+
+        def failing():
+            yield from interpret_structure(walk_directory(self.root))
+            raise OSError("scan interrupted")
+
+        with self.assertRaises(OSError):
+            for _ in writer.track(failing()):
+                pass
+        self.assertEqual(os.listdir(self.test_dir), ["project"])
+
+    def test_snapshots_in_the_same_second_are_kept(self):
+        """Test that snapshots named in the same instant get distinct files, newest sorting last"""
+        directory = os.path.join(self.test_dir, "snapshots")
+        moment = time.mktime((2024, 5, 1, 12, 0, 0, 0, 0, -1)) + 0.25
+        name = os.path.basename(snapshot_path(self.root, directory, moment))
+        self.assertNotEqual(name, os.path.basename(snapshot_path(self.root, directory, moment + 0.5)))
+        paths = [self._snapshot(os.path.join("snapshots", name)) for _ in range(3)]
+        self.assertEqual(len(set(paths)), 3)
+        self.assertTrue(paths[0].endswith("120000-250000.snapshot.ndjson"))
+        self.assertEqual(latest_snapshots(self.root, directory, count=3), paths)
+        self.assertEqual(sorted(os.listdir(directory)), sorted(os.path.basename(path) for path in paths))
+
+    def test_diff_reports_changes(self):
+        """Test added, removed, grown and retagged files and shifted folder chaos"""
+        old_path = self._snapshot("old.ndjson")
+        (Path(self.root) / "src" / "app.py").write_text("print('hello, cosmos')")
+        os.remove(os.path.join(self.root, "build", "out.txt"))
+        (Path(self.root) / "src" / "test_app.py").write_text("pass")
+        os.rename(os.path.join(self.root, "docs", "guide.md"), os.path.join(self.root, "docs", "guide.txt"))
+        new_path = self._snapshot("new.ndjson")
+
+        with Snapshot(old_path) as old, Snapshot(new_path) as new:
+            changes = list(diff_snapshots(old, new, chaos_delta=0.1))
+        found = {(change.kind, change.change, change.path) for change in changes}
+        self.assertIn(("file", "grown", os.path.join("src", "app.py")), found)
+        self.assertIn(("file", "removed", os.path.join("build", "out.txt")), found)
+        self.assertIn(("file", "added", os.path.join("src", "test_app.py")), found)
+        self.assertIn(("file", "added", os.path.join("docs", "guide.txt")), found)
+        self.assertIn(("folder", "chaos", "build"), found)
+        self.assertEqual([change.path for change in changes], sorted(change.path for change in changes))
+
+        report = os.path.join(self.test_dir, "diff.md")
+        with Snapshot(old_path) as old, Snapshot(new_path) as new:
+            stats = write_diff_markdown(diff_snapshots(old, new), report, old.header, new.header, limit=1)
+        with open(report, encoding="utf-8") as f:
+            text = f.read()
+        self.assertIn("### 🌱 Files Added (2)", text)
+        self.assertIn("- *...and 1 more*", text)
+        self.assertEqual(len(stats.items[("file", "added")]), 1)
+
+        records = os.path.join(self.test_dir, "diff.ndjson")
+        with Snapshot(old_path) as old, Snapshot(new_path) as new:
+            write_diff_ndjson(diff_snapshots(old, new), records, old.header, new.header)
+        with open(records, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(lines[-1]["changes"]["file"]["added"], 2)
+        self.assertTrue(all(line["type"] == "change" for line in lines[:-1]))
+
+    def test_retag_and_unsorted_input(self):
+        """Test that tag changes are reported and out-of-order snapshots are rejected"""
+        old = [("a.py\0file", {"type": "file", "path": "a.py", "size": 1, "mtime": 5, "tags": []})]
+        new = [("a.py\0file", {"type": "file", "path": "a.py", "size": 1, "mtime": 5, "tags": ["#core"]})]
+        self.assertEqual([change.change for change in diff_snapshots(old, new)], ["retagged"])
+
+        path = os.path.join(self.test_dir, "bad.ndjson")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"type": "snapshot", "version": 1}) + "\n")
+            f.write(json.dumps({"type": "file", "path": "b"}) + "\n")
+            f.write(json.dumps({"type": "file", "path": "a"}) + "\n")
+        with Snapshot(path) as snapshot, self.assertRaises(SnapshotError):
+            list(snapshot)
+
+
+class LatencyFileSystem(FileSystem):
+    """Local files behind a fixed per-call delay, tracking how many calls overlap per mount"""
+
+    def __init__(self, latency, mounts=()):
+        import threading
+        self.latency = latency
+        self.mounts = set(mounts)
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.peak = {}
+        self.peak_total = 0
+
+    def _delayed(self, path, call, *args):
+        import time
+        mount = mount_of(path, self.mounts)
+        with self.lock:
+            self.in_flight[mount] = self.in_flight.get(mount, 0) + 1
+            self.peak[mount] = max(self.peak.get(mount, 0), self.in_flight[mount])
+            self.peak_total = max(self.peak_total, sum(self.in_flight.values()))
+        try:
+            time.sleep(self.latency)
+            return call(self, *args)
+        finally:
+            with self.lock:
+                self.in_flight[mount] -= 1
+
+    def list_directory(self, abs_dir):
+        return self._delayed(abs_dir, FileSystem.list_directory, abs_dir)
+
+    def stat(self, path):
+        return self._delayed(path, FileSystem.stat, path)
+
+    def mount_points(self):
+        return self.mounts
+
+
+class TestAsyncWalker(unittest.TestCase):
+    """Test the asyncio engine against a filesystem layer with injected latency"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for folder in ("nfs_a", "nfs_b", os.path.join("nfs_a", "deep")):
+            os.makedirs(os.path.join(self.test_dir, folder))
+            for i in range(12):
+                (Path(self.test_dir) / folder / f"file_{i}.py").write_text("x" * i)
+        (Path(self.test_dir) / "README.md").write_text("# Remote")
+        self.matcher = IgnoreMatcher.from_patterns([])
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_matches_walk_engine(self):
+        """Test that the async engine returns the os.walk structure in the same order"""
+        self.assertEqual(walk_directory(self.test_dir, engine="async", workers=8),
+                         walk_directory(self.test_dir, engine="walk"))
+
+    def test_throughput_grows_with_concurrency(self):
+        """Test that more requests in flight hide per-call latency"""
+        import time
+        timings = {}
+        for concurrency in (1, 16):
+            fs = LatencyFileSystem(0.005)
+            started = time.perf_counter()
+            entries = list(iter_async(self.test_dir, self.matcher, concurrency=concurrency,
+                                      mount_concurrency=concurrency, fs=fs))
+            timings[concurrency] = time.perf_counter() - started
+            self.assertEqual(sum(len(entry["files"]) for entry in entries), 37)
+            self.assertLessEqual(fs.peak_total, concurrency)
+        self.assertLess(timings[16] * 3, timings[1])
+
+    def test_per_mount_limit(self):
+        """Test that each mount stays within its own limit while mounts proceed side by side"""
+        mounts = [os.path.join(self.test_dir, "nfs_a"), os.path.join(self.test_dir, "nfs_b")]
+        fs = LatencyFileSystem(0.005, mounts)
+        list(iter_async(self.test_dir, self.matcher, concurrency=8, mount_concurrency=2, fs=fs))
+        self.assertEqual(max(fs.peak[mount] for mount in mounts), 2)
+        self.assertGreater(fs.peak_total, 2)
+        self.assertLessEqual(fs.peak_total, 8)
+
+    def test_relative_root_uses_its_mounts(self):
+        """Test that a relative root is matched against the absolute mount points"""
+        mounts = [os.path.join(self.test_dir, "nfs_a"), os.path.join(self.test_dir, "nfs_b")]
+        fs = LatencyFileSystem(0.005, mounts)
+        entries = list(iter_async(os.path.relpath(self.test_dir), self.matcher, concurrency=8, mount_concurrency=2,
+                                  fs=fs))
+        self.assertEqual(len(entries), 4)
+        self.assertGreater(fs.peak_total, 2)
+
+    def test_slow_consumer_bounds_buffer(self):
+        """Test that the walker waits for a slow consumer and an early exit does not hang"""
+        from unittest import mock
+        with mock.patch("scanner.async_walker.ASYNC_RESULT_BUFFER", 1):
+            entries = iter_async(self.test_dir, self.matcher, concurrency=4)
+            self.assertEqual(next(entries)["path"], ".")
+            entries.close()
+            self.assertEqual(len(list(iter_async(self.test_dir, self.matcher, concurrency=4))), 4)
+
+
+class TestProcessWalker(unittest.TestCase):
+    """Test the process-pool engine on a skewed tree"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        # One deep, wide subtree next to a handful of tiny ones
+        for i in range(6):
+            for j in range(4):
+                folder = Path(self.test_dir) / "node_modules" / f"pkg_{i}" / f"lib_{j}"
+                folder.mkdir(parents=True)
+                (folder / "index.js").write_text("x" * (i + j))
+        for i in range(3):
+            (Path(self.test_dir) / f"small_{i}").mkdir()
+            (Path(self.test_dir) / f"small_{i}" / "notes.md").write_text("# hi")
+        (Path(self.test_dir) / ".git").mkdir()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_matches_walk_engine(self):
+        """Test that folders shared between workers come back in os.walk order"""
+        expected = walk_directory(self.test_dir, engine="walk")
+        self.assertEqual(walk_directory(self.test_dir, engine="process", workers=3), expected)
+        # One folder per message makes out-of-turn results as likely as possible
+        settings = load_settings()
+        walker = ProcessWalker(self.test_dir, build_ignore_matcher(settings), compile_rules(settings).tags,
+                               workers=3, batch_size=1)
+        self.assertEqual(list(walker.entries()), expected)
+
+    def test_full_buffer_pauses_sharing(self):
+        """Test that a buffer cap of one folder still completes the scan in os.walk order"""
+        settings = load_settings()
+        walker = ProcessWalker(self.test_dir, build_ignore_matcher(settings), compile_rules(settings).tags,
+                               workers=3, batch_size=1, max_buffered=1)
+        self.assertEqual(list(walker.entries()), walk_directory(self.test_dir, engine="walk"))
+
+    def test_interpret_in_workers(self):
+        """Test that scoring in the workers or on a pool matches interpreting in this process"""
+        def scored(structure):
+            return [(entry["path"], entry["folder_archetype"], [(f["name"], f["chaos_index"]) for f in entry["files"]])
+                    for entry in structure]
+        serial = interpret_structure(walk_directory(self.test_dir))
+        self.assertEqual(scored(interpret_directory(self.test_dir, workers=2)), scored(serial))
+        self.assertEqual(scored(interpret_structure(walk_directory(self.test_dir), workers=2)), scored(serial))
+
+    def test_early_close_stops_workers(self):
+        """Test that abandoning the scan shuts the worker processes down"""
+        import multiprocessing
+        entries = ProcessWalker(self.test_dir, IgnoreMatcher.from_patterns([]), workers=2).entries()
+        self.assertEqual(next(entries)["path"], ".")
+        entries.close()
+        self.assertEqual([child for child in multiprocessing.active_children()
+                          if child.name.startswith("filesage-scan")], [])
+
+
+class TestSampling(unittest.TestCase):
+    """Test the seeded sampling scan and its estimates"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for group in range(6):
+            for leaf in range(4):
+                folder = Path(self.test_dir) / f"group_{group}" / f"leaf_{leaf}"
+                folder.mkdir(parents=True)
+                for i in range(5):
+                    (folder / f"module_{i}.py").write_text("x" * 100)
+        (Path(self.test_dir) / "README.md").write_text("# Archive")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _estimate(self, fraction, seed=0, **budget):
+        structure, design = sample_directory(self.test_dir, fraction, seed, **budget)
+        return structure, estimate_totals(interpret_structure(structure), design)
+
+    def test_full_sample_is_exact(self):
+        """Test that sampling every folder reproduces the full scan with a zero-width interval"""
+        structure, estimate = self._estimate(1.0)
+        self.assertEqual(len(structure), 31)
+        self.assertEqual(estimate.files, (121, 121, 121))
+        self.assertEqual(estimate.size.value, 12000 + len("# Archive"))
+        self.assertEqual(estimate.tag_counts["#documentation"], 1)
+        self.assertEqual(estimate.degraded_folders, 0)
+
+    def test_seeded_sample_scales_up(self):
+        """Test that a seed picks the same folders every run and the estimate scales them up"""
+        first, estimate = self._estimate(0.25, seed=7)
+        second, _ = self._estimate(0.25, seed=7)
+        self.assertEqual([entry["path"] for entry in first], [entry["path"] for entry in second])
+        # Two of six groups, then two of four leaves in each
+        self.assertEqual(len(first), 1 + 2 + 4)
+        self.assertEqual(estimate.sampled_files, 21)
+        self.assertAlmostEqual(estimate.files.value, 121)
+        self.assertAlmostEqual(estimate.folders.value, 31)
+        self.assertLessEqual(estimate.files.low, 121)
+        # The root and both groups measured their spread from two subfolders each
+        self.assertEqual(estimate.thin_folders, 3)
+
+    def test_t_quantile(self):
+        """Test that few sampled siblings widen intervals well past the normal quantile"""
+        self.assertEqual(t_quantile(1), 12.706)
+        self.assertAlmostEqual(t_quantile(31), 2.040, places=2)
+        self.assertAlmostEqual(t_quantile(10_000), 1.96, places=3)
+
+    def test_budget_and_report_marking(self):
+        """Test that the file budget stops the scan and the report says it is an estimate"""
+        structure, estimate = self._estimate(0.5, max_files=6)
+        self.assertEqual(estimate.budget_hit, "6 files")
+        self.assertGreater(estimate.unreached, 0)
+        self.assertEqual(estimate.sampled_files, 6)
+        # The root and the one group read each got through a single subfolder before the budget ran out
+        self.assertEqual(estimate.degraded_folders, 2)
+        self.assertGreater(estimate.files.high, estimate.files.value)
+
+        output_path = os.path.join(self.test_dir, "out", "report.md")
+        write_markdown(interpret_structure(structure), output_path, estimate=estimate)
+        with open(output_path, encoding="utf-8") as f:
+            report = f.read()
+        self.assertIn("ESTIMATE — sampled scan", report)
+        self.assertIn("Root Directory Overview (Estimated)", report)
+        self.assertIn("6 files budget ran out", report)
+        self.assertIn("2 folders had fewer than two subfolders read", report)
+
+
+class TestLeaderboards(unittest.TestCase):
+    """Test the bounded top-K leaderboards"""
+
+    def _entry(self, path, files):
+        return {"path": path, "folders": [], "tags": [], "folder_archetype": "", "description": "",
+                "files": [{"name": name, "size": size, "modified": datetime.fromtimestamp(mtime), "tags": [],
+                           "chaos_index": chaos, "description": ""} for name, size, mtime, chaos in files]}
+
+    def test_topk_stays_bounded(self):
+        """Test that only K items are kept, best first, with the earliest winning ties"""
+        board = TopK(3)
+        for i, score in enumerate([5, 1, 9, 5, 7, 2, 9]):
+            board.push(score, {"path": f"item_{i}"})
+            self.assertLessEqual(len(board), 3)
+        self.assertEqual([item["path"] for item in board.items()], ["item_2", "item_6", "item_4"])
+        self.assertFalse(board.accepts(7))
+        self.assertFalse(TopK(0).accepts(100))
+
+    def test_boards_match_across_merge(self):
+        """Test the four boards, and that merging per-folder accumulators matches a single pass"""
+        entries = [
+            self._entry(".", [("huge.iso", 900, 1_700_000_000, 1.0), ("notes.txt", 10, 1_000_000_000, 2.0)]),
+            self._entry("src", [("app.py", 50, 1_600_000_000, 9.5), ("util.py", 40, 1_650_000_000, 3.0)]),
+            self._entry("vendor", [("blob.bin", 700, 1_200_000_000, 4.0)]),
+        ]
+        sizes = {"largest_files": 2, "oldest_files": 2, "chaotic_files": 1, "largest_folders": 2}
+        single = ReportAccumulator(leaderboard_sizes=sizes)
+        merged = ReportAccumulator(leaderboard_sizes=sizes)
+        for entry in entries:
+            single.add(entry)
+            folder = ReportAccumulator(leaderboard_sizes=sizes)
+            folder.add(entry)
+            merged.merge(folder)
+
+        for stats in (single, merged):
+            boards = {key: [item["path"] for item in board.items()] for key, board in stats.leaderboards.boards.items()}
+            self.assertEqual(boards["largest_files"], ["huge.iso", os.path.join("vendor", "blob.bin")])
+            self.assertEqual(boards["oldest_files"], ["notes.txt", os.path.join("vendor", "blob.bin")])
+            self.assertEqual(boards["chaotic_files"], [os.path.join("src", "app.py")])
+            self.assertEqual(boards["largest_folders"], [".", "vendor"])
+
+    def test_report_section(self):
+        """Test that the markdown report opens with the leaderboards"""
+        with tempfile.TemporaryDirectory() as test_dir:
+            (Path(test_dir) / "big.log").write_text("x" * 5000)
+            (Path(test_dir) / "small.py").write_text("pass")
+            output_path = os.path.join(test_dir, "out", "report.md")
+            write_markdown(interpret_structure(walk_directory(test_dir)), output_path)
+            with open(output_path, encoding="utf-8") as f:
+                report = f.read()
+            self.assertLess(report.index("## 🏆 Leaderboards"), report.index("## 📂 Folder-by-Folder Analysis"))
+            self.assertIn("| 1 | `big.log` | 4.9KB |", report)
+
+
+class TestSubtreeRollups(unittest.TestCase):
+    """Test the one-pass recursive subtree totals"""
+
+    def _entry(self, path, files):
+        return {"path": path, "folders": [], "tags": [], "folder_archetype": "", "description": "",
+                "files": [{"name": name, "size": size, "modified": datetime.fromtimestamp(1_700_000_000),
+                           "tags": tags, "chaos_index": chaos, "description": ""}
+                          for name, size, chaos, tags in files]}
+
+    def test_rollups_in_du_order(self):
+        """Test that every folder sums its whole subtree and subtrees complete deepest first"""
+        a, b, c = "a", os.path.join("a", "b"), "c"
+        structure = [
+            self._entry(".", [("root.txt", 100, 1.0, [])]),
+            self._entry(a, [("a.py", 300, 2.0, ["#code"])]),
+            self._entry(b, [("b.py", 100, 6.0, ["#code"]), ("empty.md", 0, 9.0, ["#docs"])]),
+            self._entry(c, []),
+        ]
+        rollups = compute_rollups(structure)
+        self.assertEqual(list(rollups), [b, a, c, "."])
+        self.assertEqual([(r["folders"], r["files"], r["size"]) for r in rollups.values()],
+                         [(1, 2, 100), (2, 3, 400), (1, 0, 0), (4, 4, 500)])
+        self.assertEqual(rollups["."]["tag_counts"], {"#code": 2, "#docs": 1})
+        # Weighted by bytes: (100*1 + 300*2 + 100*6) / 500, the empty file carries no weight
+        self.assertEqual(subtree_chaos(rollups["."]), 2.6)
+        self.assertEqual(subtree_chaos(rollups[c]), 0.0)
+
+        stats = aggregate_report(structure)
+        self.assertEqual([(r["path"], r["size"]) for r in stats.rollups], [(p, r["size"]) for p, r in rollups.items()])
+        heaviest = stats.leaderboards.boards["heaviest_subtrees"].items()
+        self.assertEqual([item["path"] for item in heaviest], [".", a, b, c])
+
+    def test_live_report_rerolls(self):
+        """Test that the live report's subtree table follows a refresh"""
+        with tempfile.TemporaryDirectory() as test_dir:
+            root = Path(test_dir) / "project"
+            (root / "src" / "core").mkdir(parents=True)
+            (root / "src" / "core" / "engine.py").write_text("x" * 2048)
+            output_path = os.path.join(test_dir, "report.md")
+            report = LiveReport(str(root), output_path)
+            report.build()
+            report.write()
+            with open(output_path, encoding="utf-8") as f:
+                self.assertIn("| 2.0KB | 1 | 2 |", f.read())
+
+            (root / "src" / "core" / "engine.py").write_text("x" * 4096)
+            report.refresh({os.path.join("src", "core")})
+            report.write()
+            with open(output_path, encoding="utf-8") as f:
+                content = f.read()
+            self.assertIn("### 🧮 Subtree Usage", content)
+            self.assertIn("| 4.0KB | 1 | 2 |", content)
+            self.assertIn("| 3 | `Root` | 4.0KB | 1 | 3 | 1.5 |", content)
+
+    def test_live_report_rerolls_only_changed_ancestors(self):
+        """Test that a refresh re-rolls just the changed folders' ancestors and still matches a fresh build"""
+        with tempfile.TemporaryDirectory() as test_dir:
+            root = Path(test_dir) / "project"
+            for folder in ("src/core", "src/util", "docs", "old/attic"):
+                (root / folder).mkdir(parents=True)
+            for rel, size in (("src/core/engine.py", 4096), ("src/util/helpers.py", 512), ("docs/guide.md", 64),
+                              ("old/attic/legacy.py", 8192), ("setup.py", 128)):
+                (root / rel).write_text("x" * size)
+            output_path = os.path.join(test_dir, "report.md")
+            report = LiveReport(str(root), output_path)
+            report.build()
+            report.write()
+            docs_rollup = report._subtrees["docs"]
+
+            (root / "src" / "util" / "helpers.py").write_text("x" * 9000)
+            shutil.rmtree(root / "old" / "attic")
+            report.refresh({os.path.join("src", "util"), "old"})
+            self.assertEqual(report._stale, {os.path.join("src", "util"), "src", "old", "."})
+            report.write()
+            self.assertIs(report._subtrees["docs"], docs_rollup)
+
+            fresh_path = os.path.join(test_dir, "fresh.md")
+            fresh = LiveReport(str(root), fresh_path)
+            fresh.build()
+            fresh.write()
+            # Folder sections carry random flavour text; the leaderboards and subtree table must agree exactly
+            with open(output_path, encoding="utf-8") as f, open(fresh_path, encoding="utf-8") as g:
+                ranked = [content[content.index("## 🏆 Leaderboards"):content.index("### 📁")]
+                          for content in (f.read(), g.read())]
+            self.assertIn("🧮 Subtree Usage", ranked[0])
+            self.assertEqual(ranked[0], ranked[1])
+
+    def test_live_report_reranks_heaviest_subtrees(self):
+        """Test that the heaviest-subtrees board survives changes below it and is rebuilt when one can move it"""
+        with tempfile.TemporaryDirectory() as test_dir:
+            root = Path(test_dir) / "project"
+            for name, size in (("a", 1000), ("b", 500), ("c", 100)):
+                (root / name).mkdir(parents=True)
+                (root / name / "data.bin").write_text("x" * size)
+            settings = dict(load_settings(), leaderboard_sizes={"heaviest_subtrees": 2})
+
+            def heaviest(report):
+                report.write()
+                return [item["path"] for item in report.totals.leaderboards.boards["heaviest_subtrees"].items()]
+
+            report = LiveReport(str(root), os.path.join(test_dir, "report.md"), settings)
+            report.build()
+            self.assertEqual(heaviest(report), [".", "a"])
+
+            # c never ranked, so re-ranking the board's entries with the re-rolled folders is enough
+            (root / "c" / "data.bin").write_text("x" * 200)
+            report.refresh({"c"})
+            report._reroll()
+            self.assertIsNotNone(report._heaviest)
+            self.assertEqual(heaviest(report), [".", "a"])
+            self.assertEqual(report._heaviest.boards["heaviest_subtrees"].scored()[0][0], 1700)
+
+            # a falls below b, which only a rebuild can find
+            (root / "a" / "data.bin").write_text("x" * 50)
+            report.refresh({"a"})
+            report._reroll()
+            self.assertIsNone(report._heaviest)
+            self.assertEqual(heaviest(report), [".", "b"])
+
+class TestInterpreter(unittest.TestCase):
+    """Test the cosmic interpreter"""
+    
+    def test_chaos_index_calculation(self):
+        """Test chaos index calculation"""
+        
+        # Test file with low chaos
+        low_chaos_file: FileMetadata = {
+            'name': 'simple.py',
+            'size': 100,
+            'modified': datetime.now(),
+            'tags': ['#documentation']
+        }
+        chaos = calculate_chaos_index(low_chaos_file)
+        self.assertGreater(chaos, 0)
+        self.assertLess(chaos, 5)
+        
+        # Test file with high chaos
+        high_chaos_file: FileMetadata = {
+            'name': 'requirements.txt',
+            'size': 50000,
+            'modified': datetime.now(),
+            'tags': ['#config']
+        }
+        chaos = calculate_chaos_index(high_chaos_file)
+        self.assertGreater(chaos, 5)
+    
+    def test_folder_summary(self):
+        """Test folder summary calculation"""
+        
+        test_files: List[FileInfo] = [
+            {
+                'name': 'test1.py',
+                'description': 'Test file',
+                'size': 100,
+                'modified': datetime.now(),
+                'chaos_index': 2.0,
+                'tags': []
+            },
+            {
+                'name': 'test2.py',
+                'description': 'Another test',
+                'size': 200,
+                'modified': datetime.now(),
+                'chaos_index': 3.0,
+                'tags': []
+            }
+        ]
+        
+        summary = calculate_folder_summary(test_files)
+        self.assertEqual(summary['total_files'], 2)
+        self.assertEqual(summary['total_size'], 300)
+        self.assertEqual(summary['average_chaos'], 2.5)
+
+
+class TestMarkdownWriter(unittest.TestCase):
+    """Test the cosmic markdown writer"""
+    
+    def test_markdown_generation(self):
+        """Test basic markdown generation"""
+        
+        # Create test structure
+        test_structure: List[InterpretedEntry] = [{
+            'path': '.',
+            'description': 'Test directory',
+            'files': [{
+                'name': 'test.py',
+                'description': 'Test file',
+                'size': 100,
+                'modified': datetime.now(),
+                'chaos_index': 2.0,
+                'tags': ['#validation_asset']
+            }],
+            'folder_archetype': 'Test chamber of cosmic validation',
+            'tags': ['#validation_asset']
+        }]
+        
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
+            output_path = f.name
+        
+        try:
+            write_markdown(test_structure, output_path)
+            
+            # Verify file was created and has content
+            self.assertTrue(os.path.exists(output_path))
+            
+            with open(output_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+                self.assertIn('FileSage Directory Architecture Report', content)
+                self.assertIn('test.py', content)
+                self.assertIn('#validation_asset', content)
+                
+        finally:
+            if os.path.exists(output_path):
+                os.unlink(output_path)
+
+    def test_aggregate_report(self):
+        """Test that one aggregation pass yields totals, tag counts, categories and folder summaries"""
+        def file(name, size, chaos, tags):
+            return {'name': name, 'description': f'{name} — detail', 'size': size,
+                    'modified': datetime.now(), 'chaos_index': chaos, 'tags': tags}
+        structure = [
+            {'path': '.', 'description': 'Root', 'folder_archetype': '', 'tags': ['#documentation'],
+             'files': [file('README.md', 100, 2.3, ['#documentation']), file('a.py', 50, 1.5, [])]},
+            {'path': 'docs', 'description': 'Docs', 'folder_archetype': '', 'tags': [],
+             'files': [file(f'p{i}.md', 10, 2.0, ['#documentation']) for i in range(SUMMARY_ITEM_LIMIT + 2)]},
+            {'path': 'empty', 'description': 'Empty', 'folder_archetype': '', 'tags': [], 'files': []}
+        ]
+        stats = aggregate_report(structure)
+
+        self.assertEqual(stats.total_folders, 3)
+        self.assertEqual(stats.total_files, SUMMARY_ITEM_LIMIT + 4)
+        self.assertEqual(stats.total_size, 150 + 10 * (SUMMARY_ITEM_LIMIT + 2))
+        self.assertEqual(stats.tag_counts, {'#documentation': SUMMARY_ITEM_LIMIT + 4})
+        self.assertEqual(stats.category_counts['#documentation'], SUMMARY_ITEM_LIMIT + 3)
+        self.assertEqual(len(stats.category_items['#documentation']), SUMMARY_ITEM_LIMIT)
+        self.assertEqual(stats.category_items['#documentation'][0],
+                         {'path': '.', 'name': 'README.md', 'description': 'README.md'})
+        self.assertEqual(stats.folder_summaries,
+                         [calculate_folder_summary(entry['files']) for entry in structure])
+
+    def test_ndjson_output(self):
+        """Test folder and file NDJSON records with epoch timestamps and a closing summary"""
+        with tempfile.TemporaryDirectory() as test_dir, tempfile.TemporaryDirectory() as out_dir:
+            (Path(test_dir) / "docs").mkdir()
+            (Path(test_dir) / "main.py").write_text("print('hi')")
+            (Path(test_dir) / "docs" / "guide.md").write_text("# guide")
+            os.utime(Path(test_dir) / "main.py", (1700000000, 1700000000))
+            output_path = os.path.join(out_dir, "report.ndjson")
+
+            write_ndjson(iter_edwardize(iter_interpret(iter_directory(test_dir))), output_path)
+            with open(output_path, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual([(record["type"], record.get("path")) for record in records],
+                             [("folder", "."), ("folder", "docs"), ("subtree", "docs"), ("subtree", "."),
+                              ("summary", None)])
+            self.assertEqual((records[3]["subtree_folders"], records[3]["subtree_files"], records[3]["subtree_size"]),
+                             (2, 2, records[0]["size"] + records[1]["size"]))
+            self.assertEqual(records[0]["files"][0]["mtime"], 1700000000)
+            self.assertEqual(records[1]["files"][0]["path"], os.path.join("docs", "guide.md"))
+            self.assertEqual((records[-1]["total_folders"], records[-1]["total_files"]), (2, 2))
+
+            write_ndjson(edwardize(interpret_structure(walk_directory(test_dir))), output_path, records="file")
+            with open(output_path, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual([(record["type"], record.get("folder")) for record in records],
+                             [("file", "."), ("file", "docs"), ("subtree", None), ("subtree", None),
+                              ("summary", None)])
+            self.assertIn("#documentation", records[1]["tags"])
+
+    def test_sharded_output(self):
+        """Test that sharded output writes linked pages per subtree and truncates long listings"""
+        def entry(path, file_count):
+            return {'path': path, 'description': path, 'folder_archetype': '', 'tags': [],
+                    'files': [{'name': f'f{i}.txt', 'description': 'A file', 'size': 10,
+                               'modified': datetime.now(), 'chaos_index': 1.0, 'tags': []}
+                              for i in range(file_count)]}
+        structure = [entry('.', 1), entry('src', 2), entry(os.path.join('src', 'core'), 12),
+                     entry('docs', 1), entry(os.path.join('docs', 'api'), 1), entry(os.path.join('docs', 'guide'), 1)]
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            index_path = os.path.join(out_dir, "proj_structure.md")
+            pages = write_markdown_sharded(iter(structure), index_path, folders_per_page=2, max_files_per_folder=10)
+            self.assertEqual([page['title'] for page in pages], ['.', 'src', 'docs', 'docs (part 2)'])
+            self.assertEqual(sum(page['files'] for page in pages), 18)
+
+            with open(index_path, encoding="utf-8") as f:
+                index = f.read()
+            self.assertIn("| 📄 **Total Files** | 18 |", index)
+            for page in pages:
+                self.assertIn(f"(proj_structure/{page['filename']})", index)
+                self.assertTrue(os.path.exists(os.path.join(out_dir, "proj_structure", page['filename'])))
+
+            with open(os.path.join(out_dir, "proj_structure", pages[1]['filename']), encoding="utf-8") as f:
+                src_page = f.read()
+            self.assertIn("](../proj_structure.md)", src_page)
+            self.assertIn(f"[⬅️ Previous]({pages[0]['filename']})", src_page)
+            self.assertIn(f"[Next ➡️]({pages[2]['filename']})", src_page)
+            self.assertIn("f9.txt", src_page)
+            self.assertNotIn("f10.txt", src_page)
+            self.assertIn("...and 2 more files", src_page)
+
+            self.assertIn("(proj_structure/subtree-usage.md)", index)
+            with open(os.path.join(out_dir, "proj_structure", "subtree-usage.md"), encoding="utf-8") as f:
+                usage_page = f.read()
+            self.assertIn("| 180B | 18 | 6 | 1.0 | — | `Root` |", usage_page)
+            self.assertIn("| 140B | 14 | 2 | 1.0 | — | `src` |", usage_page)
+
+            with self.assertRaises(ValueError):
+                write_markdown_sharded(structure, index_path, shard_by="alphabet")
+
+
+class TestIntegration(unittest.TestCase):
+    """Test full FileSage integration"""
+    
+    def test_full_analysis_workflow(self):
+        """Test complete analysis workflow"""
+        # Create temporary directory with various file types
+        with tempfile.TemporaryDirectory() as test_dir:
+            # Create test files
+            (Path(test_dir) / "main.py").write_text("print('hello')")
+            (Path(test_dir) / "README.md").write_text("# Test")
+            (Path(test_dir) / "config.yaml").write_text("test: true")
+            (Path(test_dir) / "test_something.py").write_text("def test(): pass")
+            
+            # Create subdirectory
+            docs_dir = Path(test_dir) / "docs"
+            docs_dir.mkdir()
+            (docs_dir / "guide.md").write_text("# Guide")
+            
+            # Run full workflow
+            raw_structure = walk_directory(test_dir)
+            interpreted = interpret_structure(raw_structure)
+            
+            # Verify results
+            self.assertGreater(len(raw_structure), 0)
+            self.assertGreater(len(interpreted), 0)
+            
+            # Check that tags were assigned
+            root_files = next(entry for entry in interpreted if entry['path'] == '.')['files']
+            readme_file = next(f for f in root_files if f['name'] == 'README.md')
+            self.assertIn('#documentation', readme_file['tags'])
+            
+            test_file = next(f for f in root_files if f['name'] == 'test_something.py')
+            self.assertIn('#validation_asset', test_file['tags'])
+
+    def test_streaming_pipeline_matches_batch(self):
+        """Test that the streaming writer produces the same report as the batch writer"""
+        with tempfile.TemporaryDirectory() as test_dir, tempfile.TemporaryDirectory() as out_dir:
+            (Path(test_dir) / "main.py").write_text("print('hello')")
+            (Path(test_dir) / "README.md").write_text("# Test")
+            for i in range(7):
+                (Path(test_dir) / f"test_{i}.py").write_text("pass")
+            docs_dir = Path(test_dir) / "docs"
+            docs_dir.mkdir()
+            (docs_dir / "guide.md").write_text("# Guide")
+
+            batch_path = os.path.join(out_dir, "batch.md")
+            stream_path = os.path.join(out_dir, "stream.md")
+            write_markdown(interpret_structure(walk_directory(test_dir)), batch_path)
+            write_markdown_stream(iter_interpret(iter_directory(test_dir)), stream_path)
+
+            with open(batch_path, encoding="utf-8") as f:
+                batch = [line for line in f if "Generated" not in line]
+            with open(stream_path, encoding="utf-8") as f:
+                stream = [line for line in f if "Generated" not in line]
+            self.assertEqual(batch, stream)
+            self.assertIn("- *...and 2 more files*\n", stream)
+
+
+if __name__ == '__main__':
+    print("🧪 Running FileSage 2.0 Cosmic Test Suite")
+    unittest.main(verbosity=2)
@@ -1,2 +1,2 @@
-# FileSage Writer Module
-# Handles output generation and formatting
+# FileSage Writer Module
+# Handles output generation and formatting
@@ -0,0 +1,74 @@
+# FileSage Batch Summary
+# Combined report for a multi-root batch run
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+class RootResult(NamedTuple):
+    root: str
+    output_path: str
+    folders: int = 0
+    files: int = 0
+    size: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def report_paths(roots: List[str], output_dir: str, extension: str = ".md") -> List[str]:
+    """One ``<project>_structure.md`` per root, numbered when two roots share a folder name"""
+    names = [os.path.basename(os.path.abspath(root)) or "root" for root in roots]
+    paths = []
+    seen: Dict[str, int] = {}
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        suffix = f"_{seen[name]}" if names.count(name) > 1 else ""
+        paths.append(os.path.join(output_dir, f"{name}{suffix}_structure{extension}"))
+    return paths
+
+def write_batch_summary(results: List[RootResult], output_path: str) -> None:
+    """Write the combined markdown summary, plus the same data as JSON next to it"""
+    from writer.markdown_writer import format_folder_size, write_footer
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    succeeded = [result for result in results if result.ok]
+    failed = [result for result in results if not result.ok]
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("# 🌌 FileSage Batch Summary\n\n")
+        f.write(f"📅 **Generated:** {datetime.now().strftime('%B %d, %Y at %I:%M %p')}\n\n")
+        f.write("| Metric | Value |\n")
+        f.write("|--------|-------|\n")
+        f.write(f"| Roots Scanned | {len(succeeded)} of {len(results)} |\n")
+        f.write(f"| Total Folders | {sum(result.folders for result in succeeded)} |\n")
+        f.write(f"| Total Files | {sum(result.files for result in succeeded)} |\n")
+        f.write(f"| Total Size | {format_folder_size(sum(result.size for result in succeeded))} |\n\n")
+        f.write("---\n\n")
+
+        f.write("## 🪐 Roots\n\n")
+        f.write("| Root | Report | Folders | Files | Size | Time |\n")
+        f.write("|------|--------|---------|-------|------|------|\n")
+        for result in succeeded:
+            report = os.path.relpath(result.output_path, directory or ".")
+            f.write(f"| `{result.root}` | [{os.path.basename(report)}]({report}) | {result.folders} | "
+                    f"{result.files} | {format_folder_size(result.size)} | {result.seconds:.2f}s |\n")
+        f.write("\n---\n\n")
+
+        if failed:
+            f.write("## 💥 Failed Roots\n\n")
+            for result in failed:
+                f.write(f"- `{result.root}` — {result.error}\n")
+            f.write("\n---\n\n")
+        write_footer(f)
+
+    with open(os.path.splitext(output_path)[0] + ".json", "w", encoding="utf-8") as f:
+        json.dump([_result_dict(result) for result in results], f, indent=2)
+
+def _result_dict(result: RootResult) -> Dict[str, Any]:
+    data = result._asdict()
+    data["seconds"] = round(result.seconds, 3)
+    return data
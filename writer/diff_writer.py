@@ -0,0 +1,192 @@
+# FileSage Diff Writer
+# Reports what changed between two scan snapshots, as markdown or NDJSON
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, TextIO, Tuple
+from scanner.interpreter import format_file_size
+from scanner.snapshot import (DEFAULT_CHAOS_DELTA, DEFAULT_SNAPSHOT_DIR, Snapshot, SnapshotChange, diff_snapshots,
+                              latest_snapshots)
+from writer.markdown_writer import format_folder_size, write_footer
+
+DIFF_VERSION = 1
+# Changes listed per group in the markdown report; all of them are counted
+DIFF_LIST_LIMIT = 25
+
+DIFF_GROUPS: List[Tuple[str, str, str]] = [
+    ("file", "added", "🌱 Files Added"),
+    ("file", "removed", "🕳️ Files Removed"),
+    ("file", "grown", "📈 Files Grown"),
+    ("file", "shrunk", "📉 Files Shrunk"),
+    ("file", "modified", "✏️ Files Modified"),
+    ("file", "retagged", "🏷️ Files Retagged"),
+    ("folder", "added", "🪐 Folders Added"),
+    ("folder", "removed", "🌑 Folders Removed"),
+    ("folder", "chaos", "🌀 Folder Chaos Shifts"),
+]
+
+class DiffStats:
+    """Counts every change and keeps the first ``limit`` of each group for display"""
+
+    def __init__(self, limit: Optional[int] = DIFF_LIST_LIMIT):
+        self.limit = limit
+        self.counts: Dict[Tuple[str, str], int] = {(kind, change): 0 for kind, change, _ in DIFF_GROUPS}
+        self.items: Dict[Tuple[str, str], List[SnapshotChange]] = {group: [] for group in self.counts}
+
+    def add(self, change: SnapshotChange) -> None:
+        group = (change.kind, change.change)
+        self.counts[group] += 1
+        if self.limit is None or len(self.items[group]) < self.limit:
+            self.items[group].append(change)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def as_dict(self) -> Dict[str, Dict[str, int]]:
+        counts: Dict[str, Dict[str, int]] = {}
+        for (kind, change), count in self.counts.items():
+            counts.setdefault(kind, {})[change] = count
+        return counts
+
+def write_diff_section(f: TextIO, stats: DiffStats, old: Dict[str, Any], new: Dict[str, Any]) -> None:
+    """Write the changes between two snapshots, given their headers"""
+    f.write("## 🔭 Changes Between Scans\n\n")
+
+    f.write("| Metric | Before | After | Change |\n")
+    f.write("|--------|--------|-------|--------|\n")
+    f.write(f"| Scanned | {_scanned(old)} | {_scanned(new)} | |\n")
+    f.write(f"| Folders | {old['folders']} | {new['folders']} | {new['folders'] - old['folders']:+d} |\n")
+    f.write(f"| Files | {old['files']} | {new['files']} | {new['files'] - old['files']:+d} |\n")
+    f.write(f"| Size | {format_folder_size(old['size'])} | {format_folder_size(new['size'])} | "
+            f"{_signed_size(new['size'] - old['size'])} |\n\n")
+
+    if not stats.total:
+        f.write("*✨ Nothing stirred between these scans — the cosmos held perfectly still.*\n\n---\n\n")
+        return
+
+    for kind, change, title in DIFF_GROUPS:
+        count = stats.counts[(kind, change)]
+        if not count:
+            continue
+        f.write(f"### {title} ({count})\n\n")
+        for item in stats.items[(kind, change)]:
+            f.write(f"- `{item.path}` — {_describe(item)}\n")
+        shown = len(stats.items[(kind, change)])
+        if count > shown:
+            f.write(f"- *...and {count - shown} more*\n")
+        f.write("\n")
+
+    f.write("---\n\n")
+
+def _scanned(header: Dict[str, Any]) -> str:
+    return datetime.fromtimestamp(header["created"]).strftime("%B %d, %Y at %I:%M %p")
+
+def _signed_size(delta: int) -> str:
+    return f"{'+' if delta >= 0 else '-'}{format_folder_size(abs(delta))}"
+
+def _tags(tags: List[str]) -> str:
+    return " ".join(f"`{tag}`" for tag in tags) or "*untagged*"
+
+def _describe(item: SnapshotChange) -> str:
+    old, new = item.old, item.new
+    if item.kind == "folder":
+        record = new or old
+        if item.change == "chaos":
+            return f"chaos {old['chaos']:.1f} → {new['chaos']:.1f}"
+        return f"{record['files']} files, {format_folder_size(record['size'])}"
+    if item.change in ("added", "removed"):
+        record = new or old
+        return f"{format_file_size(record['size'])} {_tags(record['tags'])}"
+    if item.change in ("grown", "shrunk"):
+        return (f"{format_file_size(old['size'])} → {format_file_size(new['size'])} "
+                f"({_signed_size(new['size'] - old['size'])})")
+    if item.change == "modified":
+        return f"rewritten {datetime.fromtimestamp(new['mtime']).strftime('%B %d, %Y')}, same size"
+    return f"{_tags(old['tags'])} → {_tags(new['tags'])}"
+
+def write_diff_markdown(changes: Iterable[SnapshotChange], output_path: str, old: Dict[str, Any],
+                        new: Dict[str, Any], limit: Optional[int] = DIFF_LIST_LIMIT) -> DiffStats:
+    """Write a standalone diff report; only the first ``limit`` changes per group are kept in memory"""
+    stats = DiffStats(limit)
+    for change in changes:
+        stats.add(change)
+    _make_parent(output_path)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("# 🔭 FileSage Scan Diff\n\n")
+        f.write(f"📂 **Root:** `{new['root']}`\n\n")
+        f.write(f"📅 **Generated:** {datetime.now().strftime('%B %d, %Y at %I:%M %p')}\n\n")
+        f.write("---\n\n")
+        write_diff_section(f, stats, old, new)
+        write_footer(f)
+    return stats
+
+def write_diff_ndjson(changes: Iterable[SnapshotChange], output_path: str, old: Dict[str, Any],
+                      new: Dict[str, Any]) -> DiffStats:
+    """Write one ``change`` record per change as it is found, then a ``summary`` record"""
+    stats = DiffStats(limit=0)
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    _make_parent(output_path)
+    with open(output_path, "w", encoding="utf-8") as f:
+        for change in changes:
+            stats.add(change)
+            f.write(encoder.encode({"type": "change", **change._asdict()}))
+            f.write("\n")
+        f.write(encoder.encode({"type": "summary", "version": DIFF_VERSION, "old": old, "new": new,
+                                "changes": stats.as_dict()}))
+        f.write("\n")
+    return stats
+
+def _make_parent(path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two FileSage scan snapshots")
+    parser.add_argument("snapshots", nargs="*", metavar="SNAPSHOT", help="older and newer snapshot files")
+    parser.add_argument("--root", help="compare the two newest snapshots of this directory instead")
+    parser.add_argument("--snapshot-dir", default=None,
+                        help="where --root looks for snapshots (default: snapshot_dir setting)")
+    parser.add_argument("-o", "--output", help="report path (default: output/<project>_diff.md or .ndjson under the current directory)")
+    parser.add_argument("-f", "--format", choices=("markdown", "ndjson"), default="markdown")
+    parser.add_argument("--chaos-delta", type=float, default=DEFAULT_CHAOS_DELTA,
+                        help=f"smallest folder chaos change reported (default: {DEFAULT_CHAOS_DELTA})")
+    parser.add_argument("--limit", type=int, default=DIFF_LIST_LIMIT, help="changes listed per group in markdown")
+    args = parser.parse_args(argv)
+
+    if args.root:
+        from scanner.settings import load_settings
+        directory = args.snapshot_dir or load_settings().get("snapshot_dir") or DEFAULT_SNAPSHOT_DIR
+        paths = latest_snapshots(args.root, directory)
+        if len(paths) < 2:
+            print(f"🌌 Need two snapshots of {args.root} in {directory}, found {len(paths)}")
+            return 1
+    elif len(args.snapshots) == 2:
+        paths = args.snapshots
+    else:
+        parser.error("give two snapshot files, or --root DIR")
+
+    started = time.perf_counter()
+    try:
+        with Snapshot(paths[0]) as old, Snapshot(paths[1]) as new:
+            name = os.path.basename(new.header["root"]) or "root"
+            extension = ".ndjson" if args.format == "ndjson" else ".md"
+            output_path = args.output or os.path.join("output", f"{name}_diff{extension}")
+            changes = diff_snapshots(old, new, args.chaos_delta)
+            if args.format == "ndjson":
+                stats = write_diff_ndjson(changes, output_path, old.header, new.header)
+            else:
+                stats = write_diff_markdown(changes, output_path, old.header, new.header, args.limit)
+    except (OSError, ValueError) as e:  # SnapshotError included
+        print(f"💥 {e}")
+        return 1
+    print(f"* {stats.total} changes between {os.path.basename(paths[0])} and {os.path.basename(paths[1])} "
+          f"({time.perf_counter() - started:.2f}s)")
+    print(f"* Diff {'records' if args.format == 'ndjson' else 'report'} generated: {output_path}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
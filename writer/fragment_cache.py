@@ -0,0 +1,85 @@
+# FileSage Fragment Cache
+# Reuses rendered folder sections between runs when nothing they show has changed
+import hashlib
+import io
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional, TextIO
+from scanner.interpreter import InterpretedEntry, time_echo_bucket
+from scanner.scan_cache import DEFAULT_CACHE_DIR
+from writer.markdown_writer import write_folder_section
+
+FRAGMENT_CACHE_VERSION = 1
+# Bump whenever write_folder_section's output changes, so old markdown is never reused
+FRAGMENT_FORMAT = 1
+
+class FragmentCache:
+    """Rendered folder sections from the previous run, keyed by what they display.
+
+    The key is a digest of the render options, the folder's path, tags and
+    archetype, and each file's name, size, mtime, tags, chaos index, content
+    metrics and temporal-echo bucket. Edward's commentary is left out of the
+    key, so it does not cause misses. A folder whose key is unchanged is
+    written straight from the cached markdown. "Modified N days ago" text
+    therefore only forces a re-render once a file moves into another bucket.
+    """
+
+    def __init__(self, root: str, cache_dir: str = DEFAULT_CACHE_DIR, now: Optional[datetime] = None):
+        self.root = os.path.abspath(root)
+        digest = hashlib.sha1(self.root.encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(cache_dir, f"{digest}.fragments.json")
+        self.now = now or datetime.now()
+        self.previous: Dict[str, str] = {}
+        self.current: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def load(self) -> bool:
+        """Load the previous run's fragments; a missing or invalid file starts empty"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(data, dict) or data.get("version") != FRAGMENT_CACHE_VERSION or \
+                data.get("root") != self.root or not isinstance(data.get("fragments"), dict):
+            return False
+        self.previous = data["fragments"]
+        return True
+
+    def save(self) -> None:
+        """Persist the fragments rendered or reused during this run, dropping the rest"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": FRAGMENT_CACHE_VERSION, "root": self.root, "fragments": self.current}, f,
+                      separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def key(self, entry: InterpretedEntry, max_files: Optional[int] = None) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{FRAGMENT_FORMAT}\0{max_files}\0{entry['path']}\0{entry.get('tags')}\0"
+                      f"{entry['folder_archetype']}\n".encode("utf-8"))
+        now = self.now
+        for file in entry["files"]:
+            content = file.get("content")
+            digest.update(f"{file['name']}\0{file['size']}\0{file['modified'].timestamp()}\0{file.get('tags')}\0"
+                          f"{file['chaos_index']}\0{time_echo_bucket(file['modified'], now)}\0"
+                          f"{json.dumps(content, sort_keys=True) if content else ''}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def write_section(self, f: TextIO, entry: InterpretedEntry, folder_summary: Optional[Dict[str, Any]] = None,
+                      max_files: Optional[int] = None) -> None:
+        """write_folder_section, served from the cache when the folder is unchanged"""
+        key = self.key(entry, max_files)
+        text = self.previous.get(key)
+        if text is None:
+            self.misses += 1
+            section = io.StringIO()
+            write_folder_section(section, entry, folder_summary, max_files)
+            text = section.getvalue()
+        else:
+            self.hits += 1
+        self.current[key] = text
+        f.write(text)
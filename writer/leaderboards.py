@@ -0,0 +1,120 @@
+# FileSage Leaderboards
+# Keeps the top K largest, oldest and most chaotic artifacts while folders stream past
+import heapq
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, TypedDict
+from scanner.interpreter import InterpretedEntry
+from scanner.rollup import SubtreeRollup, subtree_chaos
+
+DEFAULT_LEADERBOARD_SIZE = 10
+
+# (key, heading, description) for each leaderboard, in report order
+LEADERBOARDS: List[Tuple[str, str, str]] = [
+    ("largest_files", "🐘 Largest Files", "The heaviest artifacts in the cosmos"),
+    ("oldest_files", "🦴 Oldest Files", "Fossils untouched the longest"),
+    ("chaotic_files", "🌀 Highest Chaos", "Artifacts radiating the most entropy"),
+    ("largest_folders", "🏔️ Largest Folders", "Chambers holding the most bytes directly"),
+    ("heaviest_subtrees", "🏋️ Heaviest Subtrees", "Folders weighed with everything beneath them")
+]
+
+class LeaderboardItem(TypedDict, total=False):
+    path: str
+    size: int
+    modified: datetime
+    chaos_index: float
+    files: int
+    folders: int
+
+class TopK:
+    """The ``k`` highest-scoring items seen so far, in a min-heap of size ``k``.
+
+    ``accepts`` is a single comparison against the heap's smallest score, so
+    callers can skip building an item that would be rejected anyway. Among
+    equal scores the item seen first wins.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[Tuple[float, int, LeaderboardItem]] = []
+        self._seen = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def accepts(self, score: float) -> bool:
+        return len(self._heap) < self.k or (self.k > 0 and score > self._heap[0][0])
+
+    def push(self, score: float, item: LeaderboardItem) -> None:
+        self._seen += 1
+        # -seen: an earlier item outranks a later one with the same score
+        entry = (score, -self._seen, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif self.k > 0 and entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def contends(self, score: float) -> bool:
+        """Whether an item with this score would change the board, counting ties with the lowest entry"""
+        return len(self._heap) < self.k or (self.k > 0 and score >= self._heap[0][0])
+
+    def items(self) -> List[LeaderboardItem]:
+        """Best first"""
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def scored(self) -> List[Tuple[float, LeaderboardItem]]:
+        return [(score, item) for score, _, item in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+def leaderboard_sizes(settings: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+    """K for every leaderboard: ``leaderboard_sizes`` from settings over DEFAULT_LEADERBOARD_SIZE (0 hides one)"""
+    if settings is None:
+        from scanner.settings import load_settings
+        settings = load_settings()
+    configured = settings.get("leaderboard_sizes") or {}
+    return {key: int(configured.get(key, DEFAULT_LEADERBOARD_SIZE)) for key, _, _ in LEADERBOARDS}
+
+class Leaderboards:
+    """One TopK per leaderboard, fed a folder at a time; memory is O(K) whatever the tree size"""
+
+    def __init__(self, sizes: Optional[Dict[str, int]] = None):
+        self.sizes = sizes if sizes is not None else leaderboard_sizes()
+        self.boards: Dict[str, TopK] = {key: TopK(self.sizes.get(key, DEFAULT_LEADERBOARD_SIZE))
+                                        for key, _, _ in LEADERBOARDS}
+
+    def add(self, entry: InterpretedEntry, folder_size: int) -> None:
+        largest = self.boards["largest_files"]
+        oldest = self.boards["oldest_files"]
+        chaotic = self.boards["chaotic_files"]
+        folder = entry["path"]
+        for file in entry["files"]:
+            size = file["size"]
+            age = -file["modified"].timestamp()
+            chaos = file["chaos_index"]
+            if largest.accepts(size) or oldest.accepts(age) or chaotic.accepts(chaos):
+                item: LeaderboardItem = {
+                    "path": file["name"] if folder == "." else os.path.join(folder, file["name"]),
+                    "size": size,
+                    "modified": file["modified"],
+                    "chaos_index": chaos
+                }
+                largest.push(size, item)
+                oldest.push(age, item)
+                chaotic.push(chaos, item)
+        folders = self.boards["largest_folders"]
+        if folders.accepts(folder_size):
+            folders.push(folder_size, {"path": folder, "size": folder_size, "files": len(entry["files"])})
+
+    def add_subtree(self, rollup: SubtreeRollup) -> None:
+        """Rank a completed subtree by its recursive size"""
+        heaviest = self.boards["heaviest_subtrees"]
+        if heaviest.accepts(rollup["size"]):
+            heaviest.push(rollup["size"], {"path": rollup["path"], "size": rollup["size"], "files": rollup["files"],
+                                           "folders": rollup["folders"], "chaos_index": subtree_chaos(rollup)})
+
+    def merge(self, other: "Leaderboards") -> None:
+        for key, board in other.boards.items():
+            mine = self.boards[key]
+            for score, item in board.scored():
+                if not mine.accepts(score):
+                    break
+                mine.push(score, item)
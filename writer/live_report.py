@@ -0,0 +1,320 @@
+# FileSage Live Report
+# Keeps a single-file report current by re-rendering only the folders that change
+import io
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from scanner.content import iter_analyze_content
+from scanner.edwardizer import edwardize_entry
+from scanner.ignore import IgnoreMatcher
+from scanner.interpreter import interpret_entry
+from scanner.metrics import METRICS
+from scanner.rollup import SubtreeRollup, add_rollup
+from scanner.rules import compile_rules
+from scanner.walker import DirectoryEntry, _join_rel, build_ignore_matcher, load_settings, scan_directory
+from writer.leaderboards import Leaderboards, TopK, leaderboard_sizes
+from writer.markdown_writer import (format_rollup_row, write_extensibility_forecast, write_folder_section,
+                                    write_footer, write_header, write_leaderboards, write_modular_summary,
+                                    write_root_overview, write_subtree_usage_header)
+from writer.report_stats import ReportAccumulator, SUMMARY_ITEM_LIMIT
+
+class LiveReport:
+    """A report that can be refreshed folder by folder for ``--watch`` mode.
+
+    The initial ``build`` scans the tree once, keeping for each folder its
+    rendered section, its statistics and the ignore matcher it was scanned
+    with. ``refresh`` rescans only the folders it is given (plus any new
+    subtrees they reveal), re-renders just those sections and adjusts the
+    report totals by the difference. ``write`` then stitches the cached
+    sections together, so the scanning and rendering work of an update
+    follows the size of the change rather than the size of the tree.
+
+    Subtree rollups are cached too: a change marks the folder and its
+    ancestors stale, and only those are re-rolled from their children's
+    cached totals. The merged leaderboards are kept until a changed folder
+    held one of their entries or now has an item that would rank; the
+    heaviest subtrees are re-ranked from the board's entries and the
+    re-rolled folders, and only rebuilt when an unchanged folder could rank.
+    """
+
+    def __init__(self, root: str, output_path: str, settings: Optional[Dict[str, Any]] = None,
+                 content_options: Optional[Dict[str, Any]] = None):
+        settings = settings if settings is not None else load_settings()
+        self.root = root
+        self.output_path = output_path
+        self.content_options = content_options
+        self.base_matcher = build_ignore_matcher(settings)
+        self.rules = compile_rules(settings).tags
+        self.leaderboard_sizes = leaderboard_sizes(settings)
+        self.totals = ReportAccumulator(leaderboard_sizes=self.leaderboard_sizes)
+        self.order: List[str] = []
+        self._sections: Dict[str, str] = {}
+        self._stats: Dict[str, ReportAccumulator] = {}
+        self._subdirs: Dict[str, List[str]] = {}
+        self._matchers: Dict[str, IgnoreMatcher] = {}  # matcher a folder is scanned with
+        self._child_matchers: Dict[str, IgnoreMatcher] = {}  # matcher its subfolders are scanned with
+        self._subtrees: Dict[str, SubtreeRollup] = {}  # recursive totals, valid unless the folder is stale
+        self._rollup_rows: Dict[str, str] = {}
+        self._stale: Set[str] = set()
+        self._du_order: List[str] = []
+        self._du_index: Dict[str, int] = {}
+        self._boards: Optional[Leaderboards] = None  # every folder's boards merged, without heaviest subtrees
+        self._heaviest: Optional[Leaderboards] = None  # just the heaviest subtrees, ranked from the rollups
+        self._categories: Optional[Dict[str, List[Any]]] = None  # summary items, kept while no listed folder changes
+        self.rendered = 0
+
+    def folders(self) -> List[str]:
+        return list(self.order)
+
+    def build(self) -> None:
+        """Scan and render the whole tree"""
+        self._scan_subtree(".", self.base_matcher)
+        self._reorder()
+
+    def refresh(self, changed: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """Rescan the given folders and return the folders (added, removed) from the report"""
+        added: List[str] = []
+        removed: List[str] = []
+        # Parents first, so a rescanned parent can drop or rebuild its children before they are visited
+        for rel_root in sorted(set(changed), key=lambda path: (path.count(os.sep), path)):
+            if rel_root not in self._sections:
+                continue  # Already removed, ignored, or picked up by its parent's subtree scan
+            scanned = scan_directory(self.root, rel_root, self._matchers[rel_root], rules=self.rules)
+            if scanned is None:
+                removed += self._drop_subtree(rel_root)
+                continue
+            entry, subdirs, child_matcher = scanned
+            old_subdirs = self._subdirs[rel_root]
+            if child_matcher.rules != self._child_matchers[rel_root].rules:
+                # A .gitignore here changed: everything below may be in or out now
+                for name in old_subdirs:
+                    removed += self._drop_subtree(_join_rel(rel_root, name))
+                old_subdirs = []
+            self._store(rel_root, entry, subdirs, child_matcher)
+            for name in old_subdirs:
+                if name not in subdirs:
+                    removed += self._drop_subtree(_join_rel(rel_root, name))
+            for name in subdirs:
+                if name not in old_subdirs:
+                    added += self._scan_subtree(_join_rel(rel_root, name), child_matcher)
+        if added or removed:
+            self._reorder()
+        return added, removed
+
+    def write(self) -> None:
+        """Write the report from the cached sections, replacing the previous file atomically"""
+        output_dir = os.path.dirname(self.output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self.totals.category_items = self._category_items()
+        self._reroll()
+        self.totals.leaderboards = self._leaderboards()
+        temp_path = self.output_path + ".tmp"
+        with METRICS.timed("write"):
+            with open(temp_path, "w", encoding="utf-8") as f:
+                write_header(f)
+                write_root_overview(f, self.totals)
+                write_leaderboards(f, self.totals)
+                f.write("## 📂 Folder-by-Folder Analysis\n\n")
+                if self._du_order:
+                    write_subtree_usage_header(f)
+                    for rel_dir in self._du_order:
+                        f.write(self._rollup_rows[rel_dir])
+                    f.write("\n")
+                for rel_root in self.order:
+                    f.write(self._sections[rel_root])
+                write_modular_summary(f, self.totals)
+                write_extensibility_forecast(f)
+                write_footer(f)
+            os.replace(temp_path, self.output_path)
+        self.rendered = 0
+
+    def _scan_subtree(self, rel_root: str, matcher: IgnoreMatcher) -> List[str]:
+        scanned_paths: List[str] = []
+        stack = [(rel_root, matcher)]
+        while stack:
+            rel_dir, dir_matcher = stack.pop()
+            scanned = scan_directory(self.root, rel_dir, dir_matcher, rules=self.rules)
+            if scanned is None:
+                continue
+            entry, subdirs, child_matcher = scanned
+            self._matchers[rel_dir] = dir_matcher
+            self._store(rel_dir, entry, subdirs, child_matcher)
+            scanned_paths.append(rel_dir)
+            stack.extend((_join_rel(rel_dir, d), child_matcher) for d in reversed(subdirs))
+        return scanned_paths
+
+    def _store(self, rel_root: str, entry: DirectoryEntry, subdirs: List[str], child_matcher: IgnoreMatcher) -> None:
+        if self.content_options is not None:
+            entry = next(iter_analyze_content([entry], self.root, **{**self.content_options, "workers": 1}))
+        cosmic = edwardize_entry(interpret_entry(entry))
+        stats = ReportAccumulator(leaderboard_sizes=self.leaderboard_sizes, keep_rollups=True)
+        summary = stats.add(cosmic)
+        stats.finish()
+        section = io.StringIO()
+        write_folder_section(section, cosmic, summary)
+
+        previous = self._stats.get(rel_root)
+        if previous is not None:
+            self.totals.discard(previous)
+        self.totals.merge(stats)
+        self._changed(rel_root, previous, stats)
+        self._stats[rel_root] = stats
+        self._sections[rel_root] = section.getvalue()
+        self._subdirs[rel_root] = subdirs
+        self._child_matchers[rel_root] = child_matcher
+        self.rendered += 1
+
+    def _drop_subtree(self, rel_root: str) -> List[str]:
+        dropped: List[str] = []
+        stack = [rel_root]
+        while stack:
+            rel_dir = stack.pop()
+            stats = self._stats.pop(rel_dir, None)
+            if stats is None:
+                continue
+            self.totals.discard(stats)
+            self._changed(rel_dir, stats, None)
+            del self._sections[rel_dir]
+            self._subtrees.pop(rel_dir, None)
+            self._rollup_rows.pop(rel_dir, None)
+            self._stale.discard(rel_dir)
+            self._matchers.pop(rel_dir, None)
+            self._child_matchers.pop(rel_dir, None)
+            stack.extend(_join_rel(rel_dir, d) for d in self._subdirs.pop(rel_dir, []))
+            dropped.append(rel_dir)
+        return dropped
+
+    def _reorder(self) -> None:
+        """Pre-order folder list, the order a full scan would report them in"""
+        order: List[str] = []
+        stack = ["."] if "." in self._sections else []
+        while stack:
+            rel_dir = stack.pop()
+            order.append(rel_dir)
+            stack.extend(child for child in (_join_rel(rel_dir, d) for d in reversed(self._subdirs[rel_dir]))
+                         if child in self._sections)
+        self.order = order
+        # du order is post-order: the reverse of a pre-order walk that takes the last subfolder first
+        du_order: List[str] = []
+        stack = order[:1]
+        while stack:
+            rel_dir = stack.pop()
+            du_order.append(rel_dir)
+            stack.extend(child for child in (_join_rel(rel_dir, d) for d in self._subdirs[rel_dir])
+                         if child in self._sections)
+        du_order.reverse()
+        self._du_order = du_order
+        self._du_index = {rel_dir: position for position, rel_dir in enumerate(du_order)}
+
+    def _changed(self, rel_root: str, old: Optional[ReportAccumulator], new: Optional[ReportAccumulator]) -> None:
+        """Mark the rollups from a folder up to the root stale, and drop the merged boards if this can move them"""
+        rel_dir = rel_root
+        while rel_dir not in self._stale:
+            self._stale.add(rel_dir)
+            if rel_dir == ".":
+                break
+            rel_dir = os.path.dirname(rel_dir) or "."
+        if any(stats is not None and any(stats.category_counts.values()) for stats in (old, new)):
+            self._categories = None
+        if self._boards is None:
+            return
+        for key, board in self._boards.boards.items():
+            if key == "heaviest_subtrees":
+                continue
+            if old is not None:
+                held = {id(item) for item in board.items()}
+                if any(id(item) in held for item in old.leaderboards.boards[key].items()):
+                    self._boards = None
+                    return
+            if new is not None and any(board.contends(score) for score, _ in new.leaderboards.boards[key].scored()):
+                # Ties rank by report order, which only a rebuild gets right
+                self._boards = None
+                return
+
+    def _category_items(self) -> Dict[str, List[Any]]:
+        """First few items per summary category in report order; stops once every category is complete.
+
+        The result is cached until a folder with summary items changes, is added or is removed.
+        """
+        if self._categories is None:
+            self._categories = self._collect_category_items()
+        # Copies, since the report totals keep extending theirs
+        return {tag: list(items) for tag, items in self._categories.items()}
+
+    def _collect_category_items(self) -> Dict[str, List[Any]]:
+        items: Dict[str, List[Any]] = {tag: [] for tag in self.totals.category_items}
+        wanted = {tag: min(count, SUMMARY_ITEM_LIMIT) for tag, count in self.totals.category_counts.items() if count}
+        for rel_dir in self.order:
+            if not wanted:
+                break
+            for tag, folder_items in self._stats[rel_dir].category_items.items():
+                if tag in wanted:
+                    collected = items[tag]
+                    collected.extend(folder_items[:wanted[tag] - len(collected)])
+                    if len(collected) >= wanted[tag]:
+                        del wanted[tag]
+        return items
+
+    def _reroll(self) -> None:
+        """Recompute the stale subtree rollups, deepest first so every child is current before its parent"""
+        stale = [rel_dir for rel_dir in self._stale if rel_dir in self._sections]
+        stale.sort(key=lambda path: -1 if path == "." else path.count(os.sep), reverse=True)
+        for rel_dir in stale:
+            # A folder's own accumulator holds just that folder, so its one rollup is its own totals
+            own = self._stats[rel_dir].rollups[0]
+            rollup: SubtreeRollup = {**own, "tag_counts": dict(own["tag_counts"])}
+            for name in self._subdirs[rel_dir]:
+                child = self._subtrees.get(_join_rel(rel_dir, name))
+                if child is not None:
+                    add_rollup(rollup, child)
+            self._subtrees[rel_dir] = rollup
+            self._rollup_rows[rel_dir] = format_rollup_row(rollup)
+        self._stale.clear()
+        if self._heaviest is not None:
+            self._rerank(stale)
+
+    def _rerank(self, rerolled: List[str]) -> None:
+        """Re-rank the heaviest subtrees from the board's entries and the re-rolled folders.
+
+        Every other folder kept its rollup and ranked below the old board's
+        lowest entry (by size, then du order), so the result stands if it is
+        full and its own lowest entry does not rank below that one (or the
+        old board was not full, i.e. held every folder). Otherwise it is
+        dropped for ``_leaderboards`` to rebuild.
+        """
+        old = self._heaviest.boards["heaviest_subtrees"]
+        candidates = {item["path"] for item in old.items()}.union(rerolled)
+        ranked = Leaderboards(self.leaderboard_sizes)
+        # Pushed in du order, so ties rank as they would in a full rebuild
+        for rel_dir in sorted((path for path in candidates if path in self._subtrees), key=self._du_index.__getitem__):
+            ranked.add_subtree(self._subtrees[rel_dir])
+        board = ranked.boards["heaviest_subtrees"]
+        if old.k == 0 or len(old) < old.k:
+            self._heaviest = ranked
+            return
+        floor_score, floor = old.scored()[-1]
+        floor_index = self._du_index.get(floor["path"])
+        clear = False
+        if len(board) == board.k:
+            lowest_score, lowest = board.scored()[-1]
+            clear = lowest_score > floor_score or (lowest_score == floor_score and floor_index is not None
+                                                   and self._du_index[lowest["path"]] <= floor_index)
+        self._heaviest = ranked if clear else None
+
+    def _leaderboards(self) -> Leaderboards:
+        """The cached merge of every folder's own boards, plus subtrees ranked from the current rollups"""
+        if self._boards is None:
+            self._boards = Leaderboards(self.leaderboard_sizes)
+            for rel_dir in self.order:
+                self._boards.merge(self._stats[rel_dir].leaderboards)
+            # Per-folder boards only saw single folders; subtrees are ranked separately
+            self._boards.boards["heaviest_subtrees"] = TopK(self._boards.boards["heaviest_subtrees"].k)
+        if self._heaviest is None:
+            self._heaviest = Leaderboards(self.leaderboard_sizes)
+            for rel_dir in self._du_order:
+                self._heaviest.add_subtree(self._subtrees[rel_dir])
+        # A copy, since the report totals keep merging folders into theirs
+        boards = Leaderboards(self.leaderboard_sizes)
+        boards.merge(self._boards)
+        boards.merge(self._heaviest)
+        return boards
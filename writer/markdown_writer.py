@@ -1,238 +1,395 @@
-import os
-from typing import List, TextIO, Set, Tuple, Any
-from scanner.interpreter import InterpretedEntry, calculate_folder_summary
-from datetime import datetime, timedelta
-
-def write_markdown(structure: List[InterpretedEntry], output_path: str) -> None:
-    # Ensure output directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
-    with open(output_path, "w", encoding="utf-8") as f:
-        write_header(f)
-        write_root_overview(f, structure)
-        write_folder_breakdown(f, structure)
-        write_modular_summary(f, structure)
-        write_extensibility_forecast(f)
-        write_footer(f)
-
-def write_header(f: TextIO) -> None:
-    """Write the enhanced header with metadata"""
-    f.write("# 🏛️ FileSage Directory Architecture Report\n\n")
-    f.write("*A comprehensive transmission from the digital cosmos, decoded by Edward's enhanced neural networks.*\n\n")
-    f.write(f"📅 **Generated:** {datetime.now().strftime('%B %d, %Y at %I:%M %p')}\n")
-    f.write("🔮 **Version:** FileSage 2.0 - Enhanced Structure Analysis\n\n")
-    f.write("---\n\n")
-
-def write_root_overview(f: TextIO, structure: List[InterpretedEntry]) -> None:
-    """Write root directory overview with high-level metrics"""
-    f.write("## 🌟 Root Directory Overview\n\n")
-    
-    # Calculate total metrics
-    total_folders = len(structure)
-    total_files = sum(len(entry["files"]) for entry in structure)
-    total_size = sum(sum(file["size"] for file in entry["files"]) for entry in structure)
-    
-    # Gather all tags
-    all_file_tags: Set[str] = set()
-    all_folder_tags: Set[str] = set()
-    for entry in structure:
-        all_folder_tags.update(entry.get("tags", []))
-        for file in entry["files"]:
-            all_file_tags.update(file.get("tags", []))
-    
-    f.write("| Metric | Value | Cosmic Significance |\n")
-    f.write("|--------|-------|--------------------|\n")
-    f.write(f"| � **Total Folders** | {total_folders} | Chambers of organized digital reality |\n")
-    f.write(f"| 📄 **Total Files** | {total_files} | Artifacts of computational archaeology |\n")
-    f.write(f"| 💾 **Total Size** | {format_folder_size(total_size)} | Digital mass in the virtual cosmos |\n")
-    f.write(f"| 🏷️ **Unique Tags** | {len(all_file_tags | all_folder_tags)} | Categorical dimensions discovered |\n\n")
-    
-    # Show tag distribution
-    if all_file_tags or all_folder_tags:
-        f.write("### 🔖 System Tag Distribution\n\n")
-        all_tags: Set[str] = all_file_tags | all_folder_tags
-        for tag in sorted(all_tags):
-            tag_count = sum(1 for entry in structure for file in entry["files"] if tag in file.get("tags", []))
-            tag_count += sum(1 for entry in structure if tag in entry.get("tags", []))
-            f.write(f"- `{tag}` — {tag_count} occurrences\n")
-        f.write("\n")
-    
-    f.write("---\n\n")
-
-def write_folder_breakdown(f: TextIO, structure: List[InterpretedEntry]) -> None:
-    """Write detailed folder-by-folder breakdown"""
-    f.write("## 📂 Folder-by-Folder Analysis\n\n")
-    
-    for entry in structure:
-        folder_summary = calculate_folder_summary(entry["files"])
-        
-        f.write(f"### 📁 `{entry['path'] if entry['path'] != '.' else 'Root'}`\n\n")
-        
-        # Folder tags
-        if entry.get("tags"):
-            tag_str = " ".join(f"`{tag}`" for tag in entry["tags"])
-            f.write(f"**Tags:** {tag_str}\n\n")
-        
-        # Archetype and description
-        f.write(f"**Archetype:** *{entry['folder_archetype']}*\n\n")
-        f.write(f"**Purpose:** {entry['description']}\n\n")
-        
-        # Folder metrics table
-        folder_display = entry["path"] if entry["path"] != "." else "Root"
-        f.write(f"#### 📊 {folder_display} Metrics\n\n")
-        f.write("| Metric | Value |\n")
-        f.write("|--------|-------|\n")
-        f.write(f"| Files | {folder_summary['total_files']} |\n")
-        f.write(f"| Size | {folder_summary['size_formatted']} |\n")
-        f.write(f"| Avg. Chaos | {folder_summary['average_chaos']}/10.0 |\n\n")
-        
-        # List files with enhanced metadata
-        if entry["files"]:
-            folder_display = entry["path"] if entry["path"] != "." else "Root"
-            f.write(f"#### 📄 {folder_display} Files\n\n")
-            for file in entry["files"]:
-                tags_str = ""
-                if file.get("tags"):
-                    tags_str = " " + " ".join(f"`{tag}`" for tag in file["tags"])
-                
-                f.write(f"**`{file['name']}`**{tags_str}\n\n")
-                f.write(f"- {file['description']}\n")
-                f.write(f"- Size: {format_file_size(file['size'])} | Chaos: {file['chaos_index']:.1f}/10.0\n")
-                f.write(f"- Modified: {format_time_echo(file['modified'])}\n\n")
-        else:
-            f.write("*🌌 An empty void, waiting to be filled with digital dreams.*\n\n")
-        
-        f.write("---\n\n")
-
-def write_modular_summary(f: TextIO, structure: List[InterpretedEntry]) -> None:
-    """Write system-wide modular summary"""
-    f.write("## 🧬 Modular System Summary\n\n")
-    
-    # Categorize by tags
-    workflows: List[Any] = []
-    documentation: List[Any] = []
-    configs: List[Any] = []
-    validation: List[Any] = []
-    cache: List[Any] = []
-    utilities: List[Any] = []
-    
-    for entry in structure:
-        for file_info in entry["files"]:
-            file_entry: Any = {"path": entry["path"], "file": file_info}
-            tags = file_info.get("tags", [])
-            
-            if "#workflow" in tags:
-                workflows.append(file_entry)
-            if "#documentation" in tags:
-                documentation.append(file_entry)
-            if "#config" in tags:
-                configs.append(file_entry)
-            if "#validation_asset" in tags:
-                validation.append(file_entry)
-            if "#cache" in tags:
-                cache.append(file_entry)
-            if "#composite_action" in tags:
-                utilities.append(file_entry)
-    
-    categories: List[Tuple[str, List[Any], str]] = [
-        ("🔄 Workflow & CI/CD", workflows, "Automation and continuous integration orchestration"),
-        ("📚 Documentation", documentation, "Knowledge repositories and explanatory artifacts"),
-        ("⚙️ Configuration", configs, "Behavioral parameters and system settings"),
-        ("🧪 Validation & Testing", validation, "Quality assurance and verification protocols"),
-        ("💾 Cache & Compiled", cache, "Optimization artifacts and compiled bytecode"),
-        ("🛠️ Utilities & Tools", utilities, "Helper functions and composite actions")
-    ]
-    
-    for title, items, description in categories:
-        if items:
-            f.write(f"### {title}\n\n")
-            f.write(f"{description}\n\n")
-            for item in items[:5]:  # Limit to 5 items per category
-                path_display = f"{item['path']}/" if item['path'] != '.' else ""
-                f.write(f"- `{path_display}{item['file']['name']}` — {item['file']['description'].split(' — ')[0]}\n")
-            if len(items) > 5:
-                f.write(f"- *...and {len(items) - 5} more files*\n")
-            f.write("\n")
-    
-    f.write("---\n\n")
-
-def write_extensibility_forecast(f: TextIO) -> None:
-    """Write extensibility and future expansion notes"""
-    f.write("## 🚀 Galactic Expansion Forecast\n\n")
-    f.write("*Guidelines for extending FileSage's cosmic reach and analytical powers.*\n\n")
-    
-    f.write("### 🏗️ Adding New Modules\n\n")
-    f.write("- **Scanner Enhancements:** Add new file type detection in `scanner/walker.py`\n")
-    f.write("- **Interpreter Extensions:** Expand archetype generation in `scanner/interpreter.py`\n")
-    f.write("- **Writer Formats:** Create new output formats in `writer/` directory\n\n")
-    
-    f.write("### 📁 Recommended Folder Conventions\n\n")
-    f.write("```text\n")
-    f.write("project_root/\n")
-    f.write("├── .github/workflows/     # CI/CD automation\n")
-    f.write("├── config/               # Configuration files\n")
-    f.write("├── docs/                 # Documentation\n")
-    f.write("├── scanner/              # Core analysis engine\n")
-    f.write("├── writer/               # Output formatters\n")
-    f.write("├── utils/                # Utility functions\n")
-    f.write("├── tests/                # Validation assets\n")
-    f.write("└── output/               # Generated reports\n")
-    f.write("```\n\n")
-    
-    f.write("### 🔮 Future Enhancements\n\n")
-    f.write("- **Semantic Analysis:** Import relationship mapping\n")
-    f.write("- **Dependency Visualization:** ASCII or Mermaid diagrams\n")
-    f.write("- **Code Quality Metrics:** Cyclomatic complexity analysis\n")
-    f.write("- **Interactive Filtering:** Tag-based report customization\n\n")
-    
-    f.write("---\n\n")
-
-def write_footer(f: TextIO) -> None:
-    """Write footer with metadata"""
-    f.write("## 🌌 Transmission Complete\n\n")
-    f.write("*This report was generated by FileSage's enhanced analytical engine.*\n")
-    f.write("*May your directories remain structured and your chaos indices balanced.*\n\n")
-    f.write("---\n\n")
-    f.write(f"*Report generated on {datetime.now().strftime('%B %d, %Y')} by FileSage 2.0*\n")
-
-def format_folder_size(total_size: int) -> str:
-    """Format total folder size"""
-    if total_size < 1024:
-        return f"{total_size}B"
-    elif total_size < 1024 * 1024:
-        return f"{total_size/1024:.1f}KB"
-    elif total_size < 1024 * 1024 * 1024:
-        return f"{total_size/(1024*1024):.1f}MB"
-    else:
-        return f"{total_size/(1024*1024*1024):.1f}GB"
-
-def format_file_size(size: int) -> str:
-    """Format file size in a cosmic way"""
-    if size == 0:
-        return "void-sized"
-    elif size < 1024:
-        return f"{size}B"
-    elif size < 1024 * 1024:
-        return f"{size/1024:.1f}KB"
-    elif size < 1024 * 1024 * 1024:
-        return f"{size/(1024*1024):.1f}MB"
-    else:
-        return f"{size/(1024*1024*1024):.1f}GB"
-
-def format_time_echo(modified: datetime) -> str:
-    """Format modification time as temporal echo"""
-    now = datetime.now()
-    delta: timedelta = now - modified
-    
-    if delta.days == 0:
-        return "still humming in the void"
-    elif delta.days == 1:
-        return "last touched yesterday — echoing through time"
-    elif delta.days < 7:
-        return f"modified {delta.days} days ago — reverberating in the digital aether"
-    elif delta.days < 30:
-        weeks: int = delta.days // 7
-        return f"altered {weeks} week{'s' if weeks > 1 else ''} past — distant cosmic whispers"
-    else:
-        months: int = delta.days // 30
-        return f"crafted {months} month{'s' if months > 1 else ''} ago — ancient digital archaeology"
+import os
+from typing import Any, Dict, Iterable, List, Optional, TextIO, TYPE_CHECKING
+from scanner.interpreter import InterpretedEntry, calculate_folder_summary, format_file_size, format_time_echo
+from scanner.metrics import METRICS
+from scanner.rollup import SubtreeRollup, subtree_chaos
+from writer.leaderboards import LEADERBOARDS
+from writer.report_stats import ReportAccumulator, SUMMARY_CATEGORIES, SUMMARY_ITEM_LIMIT, aggregate_report
+from datetime import datetime
+
+if TYPE_CHECKING:
+    from scanner.dedup import DuplicateFinder, DuplicateGroup
+    from scanner.sampling import Estimate, SampleEstimate
+    from writer.fragment_cache import FragmentCache
+
+DUPLICATE_GROUP_LIMIT = 10
+DUPLICATE_PATH_LIMIT = 5
+SUBTREE_TAG_LIMIT = 3
+
+def write_markdown(structure: List[InterpretedEntry], output_path: str,
+                   dedup: Optional["DuplicateFinder"] = None,
+                   fragments: Optional["FragmentCache"] = None,
+                   estimate: Optional["SampleEstimate"] = None) -> ReportAccumulator:
+    # Ensure output directory exists
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    
+    with METRICS.timed("write"):
+        # One pass over every file gathers all report statistics
+        stats = aggregate_report(structure)
+        
+        with open(output_path, "w", encoding="utf-8") as f:
+            write_header(f, estimate)
+            write_root_overview(f, stats, estimate)
+            write_leaderboards(f, stats)
+            write_folder_breakdown(f, structure, stats.folder_summaries, fragments, stats.rollups)
+            write_modular_summary(f, stats)
+            if dedup is not None:
+                for entry in structure:
+                    dedup.add(entry)
+                write_duplicates_section(f, dedup.find())
+            write_extensibility_forecast(f)
+            write_footer(f)
+    
+    if METRICS.enabled:
+        METRICS.record_write("write", stats.total_folders, stats.total_files, output_path)
+    return stats
+
+def write_markdown_stream(entries: Iterable[InterpretedEntry], output_path: str,
+                          dedup: Optional["DuplicateFinder"] = None,
+                          fragments: Optional["FragmentCache"] = None) -> ReportAccumulator:
+    """Write the report while folders are still being scanned.
+
+    Each folder section is spooled to a temporary file the moment its entry
+    arrives and then discarded; the root overview and modular summary are
+    built from a ReportAccumulator and stitched around the spooled sections
+    at the end, so the finished report matches ``write_markdown``. Subtree
+    usage rows are spooled the same way as each subtree completes. Returns
+    the report statistics.
+    """
+    import shutil
+    import tempfile
+    output_dir = os.path.dirname(output_path)
+    os.makedirs(output_dir, exist_ok=True)
+    stats = ReportAccumulator()
+
+    with METRICS.timed("write"), \
+            tempfile.TemporaryFile("w+", encoding="utf-8", dir=output_dir or None) as sections, \
+            tempfile.TemporaryFile("w+", encoding="utf-8", dir=output_dir or None) as usage:
+        stats.on_rollup = lambda rollup: usage.write(format_rollup_row(rollup))
+        for entry in entries:
+            if fragments is not None:
+                fragments.write_section(sections, entry, stats.add(entry))
+            else:
+                write_folder_section(sections, entry, stats.add(entry))
+            if dedup is not None:
+                dedup.add(entry)
+        stats.finish()
+        sections.seek(0)
+        usage.seek(0)
+
+        with open(output_path, "w", encoding="utf-8") as f:
+            write_header(f)
+            write_root_overview(f, stats)
+            write_leaderboards(f, stats)
+            f.write("## 📂 Folder-by-Folder Analysis\n\n")
+            if stats.total_folders:
+                write_subtree_usage_header(f)
+                shutil.copyfileobj(usage, f)
+                f.write("\n")
+            shutil.copyfileobj(sections, f)
+            write_modular_summary(f, stats)
+            if dedup is not None:
+                write_duplicates_section(f, dedup.find())
+            write_extensibility_forecast(f)
+            write_footer(f)
+
+    if METRICS.enabled:
+        METRICS.record_write("write", stats.total_folders, stats.total_files, output_path)
+    return stats
+
+def write_header(f: TextIO, estimate: Optional["SampleEstimate"] = None) -> None:
+    """Write the enhanced header with metadata"""
+    f.write("# 🏛️ FileSage Directory Architecture Report\n\n")
+    f.write("*A comprehensive transmission from the digital cosmos, decoded by Edward's enhanced neural networks.*\n\n")
+    f.write(f"📅 **Generated:** {datetime.now().strftime('%B %d, %Y at %I:%M %p')}\n")
+    f.write("🔮 **Version:** FileSage 2.0 - Enhanced Structure Analysis\n\n")
+    if estimate is not None:
+        f.write(f"> ⚠️ **ESTIMATE — sampled scan.** {estimate.fraction:.0%} of subfolders were sampled at each level "
+                f"(seed {estimate.seed}): {estimate.sampled_folders} folders and {estimate.sampled_files} files were "
+                f"read. Totals below are scaled-up estimates with 95% confidence intervals; the folder analysis "
+                f"lists only the sampled folders.\n")
+        if estimate.budget_hit:
+            f.write(f">\n> ⏳ The {estimate.budget_hit} budget ran out with {estimate.unreached} sampled folders "
+                    f"still unread, so the estimates lean low.\n")
+        if estimate.degraded_folders:
+            f.write(f">\n> 🩹 {estimate.degraded_folders} folders had fewer than two subfolders read, so their spread "
+                    f"could not be measured; the intervals there assume it and are rough.\n")
+        if estimate.thin_folders:
+            f.write(f">\n> 🩹 {estimate.thin_folders} folders had their spread measured from fewer than five sampled "
+                    f"subfolders; their intervals are widened for it but remain rough, and can be zero when "
+                    f"the sampled subfolders happen to match.\n")
+        f.write("\n")
+    f.write("---\n\n")
+
+def write_folder_breakdown(f: TextIO, structure: List[InterpretedEntry],
+                           folder_summaries: Optional[List[Dict[str, Any]]] = None,
+                           fragments: Optional["FragmentCache"] = None,
+                           rollups: Optional[List[SubtreeRollup]] = None) -> None:
+    """Write detailed folder-by-folder breakdown, reusing cached sections of unchanged folders"""
+    f.write("## 📂 Folder-by-Folder Analysis\n\n")
+    if rollups:
+        write_subtree_usage(f, rollups)
+    
+    write_section = fragments.write_section if fragments is not None else write_folder_section
+    for index, entry in enumerate(structure):
+        write_section(f, entry, folder_summaries[index] if folder_summaries else None)
+
+def write_subtree_usage(f: TextIO, rollups: Iterable[SubtreeRollup]) -> None:
+    """Write du-style recursive totals, deepest folders first and the root last"""
+    write_subtree_usage_header(f)
+    for rollup in rollups:
+        f.write(format_rollup_row(rollup))
+    f.write("\n")
+
+def write_subtree_usage_header(f: TextIO) -> None:
+    f.write("### 🧮 Subtree Usage\n\n")
+    f.write("Every folder weighed with everything beneath it, in `du` order\n\n")
+    f.write("| Subtree Size | Files | Folders | Chaos | Top Tags | Folder |\n")
+    f.write("|--------------|-------|---------|-------|----------|--------|\n")
+
+def format_rollup_row(rollup: SubtreeRollup) -> str:
+    path_display = "Root" if rollup["path"] == "." else rollup["path"]
+    top_tags = sorted(rollup["tag_counts"].items(), key=lambda item: (-item[1], item[0]))[:SUBTREE_TAG_LIMIT]
+    tags = ", ".join(f"`{tag}` ×{count}" for tag, count in top_tags) or "—"
+    return (f"| {format_folder_size(rollup['size'])} | {rollup['files']} | {rollup['folders']} | "
+            f"{subtree_chaos(rollup)} | {tags} | `{path_display}` |\n")
+
+def write_folder_section(f: TextIO, entry: InterpretedEntry, folder_summary: Optional[Dict[str, Any]] = None,
+                         max_files: Optional[int] = None) -> None:
+    """Write the breakdown section for a single folder, listing at most ``max_files`` files"""
+    if folder_summary is None:
+        folder_summary = calculate_folder_summary(entry["files"])
+    
+    f.write(f"### 📁 `{entry['path'] if entry['path'] != '.' else 'Root'}`\n\n")
+    
+    # Folder tags
+    if entry.get("tags"):
+        tag_str = " ".join(f"`{tag}`" for tag in entry["tags"])
+        f.write(f"**Tags:** {tag_str}\n\n")
+    
+    # Archetype and description
+    f.write(f"**Archetype:** *{entry['folder_archetype']}*\n\n")
+    f.write(f"**Purpose:** {entry['description']}\n\n")
+    
+    # Folder metrics table
+    folder_display = entry["path"] if entry["path"] != "." else "Root"
+    f.write(f"#### 📊 {folder_display} Metrics\n\n")
+    f.write("| Metric | Value |\n")
+    f.write("|--------|-------|\n")
+    f.write(f"| Files | {folder_summary['total_files']} |\n")
+    f.write(f"| Size | {folder_summary['size_formatted']} |\n")
+    f.write(f"| Avg. Chaos | {folder_summary['average_chaos']}/10.0 |\n\n")
+    
+    # List files with enhanced metadata
+    if entry["files"]:
+        f.write(f"#### 📄 {folder_display} Files\n\n")
+        files = entry["files"] if max_files is None else entry["files"][:max_files]
+        for file in files:
+            tags_str = ""
+            if file.get("tags"):
+                tags_str = " " + " ".join(f"`{tag}`" for tag in file["tags"])
+            
+            f.write(f"**`{file['name']}`**{tags_str}\n\n")
+            f.write(f"- {file['description']}\n")
+            size_str = file.get("size_formatted") or format_file_size(file["size"])
+            f.write(f"- Size: {size_str} | Chaos: {file['chaos_index']:.1f}/10.0\n")
+            if file.get("content"):
+                content = file["content"]
+                f.write(f"- Content: {content['lines']} lines{'+' if content['truncated'] else ''} | "
+                        f"{content['imports']} imports | depth {content['max_depth']} | "
+                        f"{content['todos']} TODOs\n")
+            f.write(f"- Modified: {file.get('time_echo') or format_time_echo(file['modified'])}\n\n")
+        
+        hidden = entry["files"][len(files):]
+        if hidden:
+            hidden_size = sum(file["size"] for file in hidden)
+            hidden_chaos = sum(file["chaos_index"] for file in hidden) / len(hidden)
+            f.write(f"*...and {len(hidden)} more files ({format_folder_size(hidden_size)}, "
+                    f"avg. chaos {hidden_chaos:.1f}/10.0) beyond the listing limit*\n\n")
+    else:
+        f.write("*🌌 An empty void, waiting to be filled with digital dreams.*\n\n")
+    
+    f.write("---\n\n")
+
+def write_root_overview(f: TextIO, stats: ReportAccumulator, estimate: Optional["SampleEstimate"] = None) -> None:
+    """Write root directory overview with high-level metrics"""
+    if estimate is not None:
+        write_estimated_overview(f, stats, estimate)
+        return
+    f.write("## 🌟 Root Directory Overview\n\n")
+    
+    f.write("| Metric | Value | Cosmic Significance |\n")
+    f.write("|--------|-------|--------------------|\n")
+    f.write(f"| � **Total Folders** | {stats.total_folders} | Chambers of organized digital reality |\n")
+    f.write(f"| 📄 **Total Files** | {stats.total_files} | Artifacts of computational archaeology |\n")
+    f.write(f"| 💾 **Total Size** | {format_folder_size(stats.total_size)} | Digital mass in the virtual cosmos |\n")
+    f.write(f"| 🏷️ **Unique Tags** | {len(stats.tag_counts)} | Categorical dimensions discovered |\n\n")
+    
+    if stats.tag_counts:
+        f.write("### 🔖 System Tag Distribution\n\n")
+        for tag in sorted(stats.tag_counts):
+            f.write(f"- `{tag}` — {stats.tag_counts[tag]} occurrences\n")
+        f.write("\n")
+    
+    f.write("---\n\n")
+
+def write_estimated_overview(f: TextIO, stats: ReportAccumulator, estimate: "SampleEstimate") -> None:
+    """Write the root overview of a sampled scan: estimates, their intervals and what was actually read"""
+    f.write("## 🌟 Root Directory Overview (Estimated)\n\n")
+
+    f.write("| Metric | Estimate | 95% Interval | Sampled |\n")
+    f.write("|--------|----------|--------------|---------|\n")
+    f.write(f"| 📁 **Total Folders** | ≈{estimate.folders.value:,.0f} | {_estimate_range(estimate.folders)} | "
+            f"{stats.total_folders} |\n")
+    f.write(f"| 📄 **Total Files** | ≈{estimate.files.value:,.0f} | {_estimate_range(estimate.files)} | "
+            f"{stats.total_files} |\n")
+    f.write(f"| 💾 **Total Size** | ≈{format_folder_size(round(estimate.size.value))} | "
+            f"{_estimate_range(estimate.size, format_folder_size)} | {format_folder_size(stats.total_size)} |\n")
+    f.write(f"| 🌀 **Average Chaos** | ≈{estimate.average_chaos.value:.2f} | "
+            f"{estimate.average_chaos.low:.2f} – {estimate.average_chaos.high:.2f} | |\n\n")
+
+    if estimate.tag_counts:
+        f.write("### 🔖 Estimated Tag Distribution\n\n")
+        for tag, count in estimate.tag_counts.items():
+            f.write(f"- `{tag}` — ≈{count:,} occurrences ({stats.tag_counts.get(tag, 0)} sampled)\n")
+        f.write("\n")
+
+    f.write("---\n\n")
+
+def _estimate_range(estimate: "Estimate", formatter: Any = None) -> str:
+    if formatter is None:
+        return f"{estimate.low:,.0f} – {estimate.high:,.0f}"
+    return f"{formatter(round(estimate.low))} – {formatter(round(estimate.high))}"
+
+def write_leaderboards(f: TextIO, stats: ReportAccumulator) -> None:
+    """Write the top-K largest, oldest and most chaotic files and the largest folders"""
+    boards = [(title, description, stats.leaderboards.boards[key].items(), key)
+              for key, title, description in LEADERBOARDS]
+    if not any(items for _, _, items, _ in boards):
+        return
+    f.write("## 🏆 Leaderboards\n\n")
+
+    for title, description, items, key in boards:
+        if not items:
+            continue
+        f.write(f"### {title}\n\n")
+        f.write(f"{description}\n\n")
+        if key == "heaviest_subtrees":
+            f.write("| # | Subtree | Size | Files | Folders | Chaos |\n")
+            f.write("|---|---------|------|-------|---------|-------|\n")
+            for rank, item in enumerate(items, start=1):
+                path_display = "Root" if item["path"] == "." else item["path"]
+                f.write(f"| {rank} | `{path_display}` | {format_folder_size(item['size'])} | {item['files']} | "
+                        f"{item['folders']} | {item['chaos_index']} |\n")
+        elif key == "largest_folders":
+            f.write("| # | Folder | Size | Files |\n")
+            f.write("|---|--------|------|-------|\n")
+            for rank, item in enumerate(items, start=1):
+                path_display = "Root" if item["path"] == "." else item["path"]
+                f.write(f"| {rank} | `{path_display}` | {format_folder_size(item['size'])} | {item['files']} |\n")
+        else:
+            f.write("| # | Artifact | Size | Modified | Chaos |\n")
+            f.write("|---|----------|------|----------|-------|\n")
+            for rank, item in enumerate(items, start=1):
+                f.write(f"| {rank} | `{item['path']}` | {format_file_size(item['size'])} | "
+                        f"{item['modified'].strftime('%Y-%m-%d')} | {item['chaos_index']} |\n")
+        f.write("\n")
+
+    f.write("---\n\n")
+
+def write_modular_summary(f: TextIO, stats: ReportAccumulator) -> None:
+    """Write system-wide modular summary"""
+    f.write("## 🧬 Modular System Summary\n\n")
+    
+    for tag, title, description in SUMMARY_CATEGORIES:
+        count = stats.category_counts[tag]
+        if count:
+            f.write(f"### {title}\n\n")
+            f.write(f"{description}\n\n")
+            for item in stats.category_items[tag]:
+                path_display = f"{item['path']}/" if item['path'] != '.' else ""
+                f.write(f"- `{path_display}{item['name']}` — {item['description']}\n")
+            if count > SUMMARY_ITEM_LIMIT:
+                f.write(f"- *...and {count - SUMMARY_ITEM_LIMIT} more files*\n")
+            f.write("\n")
+    
+    f.write("---\n\n")
+
+def write_duplicates_section(f: TextIO, duplicates: List["DuplicateGroup"]) -> None:
+    """Write duplicate file groups and the space they could free"""
+    f.write("## ♻️ Duplicate Artifacts\n\n")
+    
+    if not duplicates:
+        f.write("*✨ Every artifact is unique — no echoes found in this cosmos.*\n\n---\n\n")
+        return
+    
+    reclaimable = sum(group["reclaimable"] for group in duplicates)
+    copies = sum(len(group["paths"]) - 1 for group in duplicates)
+    f.write("| Metric | Value |\n")
+    f.write("|--------|-------|\n")
+    f.write(f"| Duplicate Groups | {len(duplicates)} |\n")
+    f.write(f"| Redundant Copies | {copies} |\n")
+    f.write(f"| Reclaimable Space | {format_folder_size(reclaimable)} |\n\n")
+    
+    for group in duplicates[:DUPLICATE_GROUP_LIMIT]:
+        f.write(f"### `{os.path.basename(group['paths'][0])}` ×{len(group['paths'])} — "
+                f"{format_folder_size(group['reclaimable'])} reclaimable\n\n")
+        for path in group["paths"][:DUPLICATE_PATH_LIMIT]:
+            f.write(f"- `{path}` ({format_file_size(group['size'])})\n")
+        if len(group["paths"]) > DUPLICATE_PATH_LIMIT:
+            f.write(f"- *...and {len(group['paths']) - DUPLICATE_PATH_LIMIT} more copies*\n")
+        f.write("\n")
+    if len(duplicates) > DUPLICATE_GROUP_LIMIT:
+        f.write(f"*...and {len(duplicates) - DUPLICATE_GROUP_LIMIT} more duplicate groups*\n\n")
+    
+    f.write("---\n\n")
+
+def write_extensibility_forecast(f: TextIO) -> None:
+    """Write extensibility and future expansion notes"""
+    f.write("## 🚀 Galactic Expansion Forecast\n\n")
+    f.write("*Guidelines for extending FileSage's cosmic reach and analytical powers.*\n\n")
+    
+    f.write("### 🏗️ Adding New Modules\n\n")
+    f.write("- **Scanner Enhancements:** Add new file type detection in `scanner/walker.py`\n")
+    f.write("- **Interpreter Extensions:** Expand archetype generation in `scanner/interpreter.py`\n")
+    f.write("- **Writer Formats:** Create new output formats in `writer/` directory\n\n")
+    
+    f.write("### 📁 Recommended Folder Conventions\n\n")
+    f.write("```text\n")
+    f.write("project_root/\n")
+    f.write("├── .github/workflows/     # CI/CD automation\n")
+    f.write("├── config/               # Configuration files\n")
+    f.write("├── docs/                 # Documentation\n")
+    f.write("├── scanner/              # Core analysis engine\n")
+    f.write("├── writer/               # Output formatters\n")
+    f.write("├── utils/                # Utility functions\n")
+    f.write("├── tests/                # Validation assets\n")
+    f.write("└── output/               # Generated reports\n")
+    f.write("```\n\n")
+    
+    f.write("### 🔮 Future Enhancements\n\n")
+    f.write("- **Semantic Analysis:** Import relationship mapping\n")
+    f.write("- **Dependency Visualization:** ASCII or Mermaid diagrams\n")
+    f.write("- **Code Quality Metrics:** Cyclomatic complexity analysis\n")
+    f.write("- **Interactive Filtering:** Tag-based report customization\n\n")
+    
+    f.write("---\n\n")
+
+def write_footer(f: TextIO) -> None:
+    """Write footer with metadata"""
+    f.write("## 🌌 Transmission Complete\n\n")
+    f.write("*This report was generated by FileSage's enhanced analytical engine.*\n")
+    f.write("*May your directories remain structured and your chaos indices balanced.*\n\n")
+    f.write("---\n\n")
+    f.write(f"*Report generated on {datetime.now().strftime('%B %d, %Y')} by FileSage 2.0*\n")
+
+def format_folder_size(total_size: int) -> str:
+    """Format total folder size"""
+    if total_size < 1024:
+        return f"{total_size}B"
+    elif total_size < 1024 * 1024:
+        return f"{total_size/1024:.1f}KB"
+    elif total_size < 1024 * 1024 * 1024:
+        return f"{total_size/(1024*1024):.1f}MB"
+    else:
+        return f"{total_size/(1024*1024*1024):.1f}GB"
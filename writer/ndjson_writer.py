@@ -0,0 +1,133 @@
+# FileSage NDJSON Writer
+# Streams the interpreted structure as newline-delimited JSON for dashboards and scripts
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, TextIO, TYPE_CHECKING
+from scanner.interpreter import FileInfo, InterpretedEntry
+from scanner.metrics import METRICS
+from scanner.rollup import SubtreeRollup, subtree_chaos
+from writer.report_stats import ReportAccumulator
+
+if TYPE_CHECKING:
+    from scanner.dedup import DuplicateFinder
+    from scanner.sampling import SampleEstimate
+
+NDJSON_VERSION = 1
+RECORD_MODES = ("folder", "file")
+DEFAULT_WRITE_BUFFER = 64 * 1024
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+def epoch(moment: datetime) -> int:
+    return int(moment.timestamp())
+
+def file_record(folder: str, file: FileInfo) -> Dict[str, Any]:
+    record: Dict[str, Any] = {
+        "name": file["name"],
+        "path": file["name"] if folder == "." else os.path.join(folder, file["name"]),
+        "size": file["size"],
+        "mtime": epoch(file["modified"]),
+        "tags": file.get("tags", []),
+        "chaos_index": file["chaos_index"],
+        "description": file["description"]
+    }
+    if "content" in file:
+        record["content"] = file["content"]
+    return record
+
+def folder_record(entry: InterpretedEntry, summary: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": "folder",
+        "path": entry["path"],
+        "tags": entry.get("tags", []),
+        "archetype": entry["folder_archetype"],
+        "description": entry["description"],
+        "file_count": summary["total_files"],
+        "size": summary["total_size"],
+        "average_chaos": summary["average_chaos"],
+        "files": [file_record(entry["path"], file) for file in entry["files"]]
+    }
+
+def subtree_record(rollup: SubtreeRollup) -> Dict[str, Any]:
+    return {
+        "type": "subtree",
+        "path": rollup["path"],
+        "subtree_folders": rollup["folders"],
+        "subtree_files": rollup["files"],
+        "subtree_size": rollup["size"],
+        "subtree_chaos": subtree_chaos(rollup),
+        "tag_counts": dict(sorted(rollup["tag_counts"].items()))
+    }
+
+def leaderboard_records(stats: ReportAccumulator) -> Dict[str, Any]:
+    boards: Dict[str, Any] = {}
+    for key, board in stats.leaderboards.boards.items():
+        boards[key] = [{**item, "modified": epoch(item["modified"])} if "modified" in item else dict(item)
+                       for item in board.items()]
+    return boards
+
+def _emit(f: TextIO, record: Dict[str, Any]) -> None:
+    f.write(_encoder.encode(record))
+    f.write("\n")
+
+def write_ndjson(entries: Iterable[InterpretedEntry], output_path: str, records: str = "folder",
+                 dedup: Optional["DuplicateFinder"] = None,
+                 buffer_size: int = DEFAULT_WRITE_BUFFER,
+                 estimate: Optional["SampleEstimate"] = None) -> ReportAccumulator:
+    """Write one JSON object per line as folders stream in, ending with a summary record.
+
+    ``records="folder"`` writes a ``folder`` record per folder with its files
+    nested. ``records="file"`` writes a flat ``file`` record per file that
+    names its folder. Timestamps are epoch seconds. A folder's recursive
+    totals are only known once the walk leaves it, so they follow as a
+    ``subtree`` record per folder in ``du`` order. Only the current folder,
+    its open ancestors and the running totals are held in memory, so this
+    works on the streaming pipeline. With a ``dedup`` finder, a
+    ``duplicate`` record per group precedes the summary, and a sampled
+    scan's ``estimate`` is added to it. Returns the report statistics.
+    """
+    if records not in RECORD_MODES:
+        raise ValueError(f"Unknown NDJSON record mode '{records}', expected one of: {', '.join(RECORD_MODES)}")
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    stats = ReportAccumulator()
+
+    with METRICS.timed("write"), open(output_path, "w", encoding="utf-8", buffering=buffer_size) as f:
+        stats.on_rollup = lambda rollup: _emit(f, subtree_record(rollup))
+        for entry in entries:
+            summary = stats.add(entry)
+            if records == "folder":
+                _emit(f, folder_record(entry, summary))
+            else:
+                for file in entry["files"]:
+                    record = file_record(entry["path"], file)
+                    _emit(f, {"type": "file", "folder": entry["path"], **record})
+            if dedup is not None:
+                dedup.add(entry)
+        stats.finish()
+
+        if dedup is not None:
+            for group in dedup.find():
+                _emit(f, {"type": "duplicate", **group})
+
+        summary_record = {
+            "type": "summary",
+            "version": NDJSON_VERSION,
+            "generated": epoch(datetime.now()),
+            "records": records,
+            "total_folders": stats.total_folders,
+            "total_files": stats.total_files,
+            "total_size": stats.total_size,
+            "tag_counts": dict(sorted(stats.tag_counts.items())),
+            "category_counts": stats.category_counts,
+            "leaderboards": leaderboard_records(stats)
+        }
+        if estimate is not None:
+            summary_record["estimate"] = estimate.as_dict()
+        _emit(f, summary_record)
+
+    if METRICS.enabled:
+        METRICS.record_write("write", stats.total_folders, stats.total_files, output_path)
+    return stats
@@ -0,0 +1,150 @@
+# FileSage Report Statistics
+# Accumulates report-wide metrics while folders stream past the writer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypedDict
+from scanner.interpreter import InterpretedEntry, format_file_size
+from scanner.rollup import RollupAccumulator, SubtreeRollup
+from writer.leaderboards import Leaderboards
+
+SUMMARY_ITEM_LIMIT = 5
+
+# (tag, heading, description) for each modular summary category
+SUMMARY_CATEGORIES: List[Tuple[str, str, str]] = [
+    ("#workflow", "🔄 Workflow & CI/CD", "Automation and continuous integration orchestration"),
+    ("#documentation", "📚 Documentation", "Knowledge repositories and explanatory artifacts"),
+    ("#config", "⚙️ Configuration", "Behavioral parameters and system settings"),
+    ("#validation_asset", "🧪 Validation & Testing", "Quality assurance and verification protocols"),
+    ("#cache", "💾 Cache & Compiled", "Optimization artifacts and compiled bytecode"),
+    ("#composite_action", "🛠️ Utilities & Tools", "Helper functions and composite actions")
+]
+
+class SummaryItem(TypedDict):
+    path: str
+    name: str
+    description: str
+
+class ReportAccumulator:
+    """Running totals for every report section.
+
+    Folders are fed in one at a time with ``add``, which visits each file
+    once and returns that folder's summary (as ``calculate_folder_summary``
+    would). Only counters, the first few entries of each summary category
+    and the bounded leaderboards are kept, so memory does not grow with the
+    number of files; pass ``keep_folder_summaries`` to also retain the
+    per-folder summaries. ``leaderboard_sizes`` overrides the settings' K.
+
+    Recursive subtree totals are rolled up as folders arrive (in walk
+    order) and each completed subtree goes to the heaviest-subtrees board
+    and ``on_rollup``; ``keep_rollups`` also retains them in du order.
+    Call ``finish`` after the last folder to complete the open subtrees.
+    """
+
+    def __init__(self, keep_folder_summaries: bool = False,
+                 leaderboard_sizes: Optional[Dict[str, int]] = None, keep_rollups: bool = False) -> None:
+        self.keep_folder_summaries = keep_folder_summaries
+        self.folder_summaries: List[Dict[str, Any]] = []
+        self.total_folders = 0
+        self.total_files = 0
+        self.total_size = 0
+        self.tag_counts: Dict[str, int] = {}
+        self.category_items: Dict[str, List[SummaryItem]] = {tag: [] for tag, _, _ in SUMMARY_CATEGORIES}
+        self.category_counts: Dict[str, int] = {tag: 0 for tag, _, _ in SUMMARY_CATEGORIES}
+        self.leaderboards = Leaderboards(leaderboard_sizes)
+        self.keep_rollups = keep_rollups
+        self.rollups: List[SubtreeRollup] = []
+        self.on_rollup: Optional[Callable[[SubtreeRollup], None]] = None
+        self._subtrees = RollupAccumulator()
+
+    def add(self, entry: InterpretedEntry) -> Dict[str, Any]:
+        """Fold one interpreted folder into the running totals and return its summary"""
+        tag_counts = self.tag_counts
+        self.total_folders += 1
+        for tag in entry.get("tags", []):
+            tag_counts[tag] = tag_counts.get(tag, 0) + 1
+
+        folder_size = 0
+        chaos_total = 0.0
+        weighted_chaos = 0.0
+        folder_tags: Dict[str, int] = {}
+        for file in entry["files"]:
+            folder_size += file["size"]
+            chaos_total += file["chaos_index"]
+            weighted_chaos += file["size"] * file["chaos_index"]
+            for tag in file.get("tags", []):
+                tag_counts[tag] = tag_counts.get(tag, 0) + 1
+                folder_tags[tag] = folder_tags.get(tag, 0) + 1
+                if tag in self.category_counts:
+                    self.category_counts[tag] += 1
+                    items = self.category_items[tag]
+                    if len(items) < SUMMARY_ITEM_LIMIT:
+                        items.append({
+                            "path": entry["path"],
+                            "name": file["name"],
+                            "description": file["description"].split(" — ")[0]
+                        })
+
+        self.leaderboards.add(entry, folder_size)
+        file_count = len(entry["files"])
+        self._completed(self._subtrees.add({
+            "path": entry["path"], "folders": 1, "files": file_count, "size": folder_size,
+            "chaos_total": chaos_total, "weighted_chaos": weighted_chaos, "tag_counts": folder_tags
+        }))
+        self.total_files += file_count
+        self.total_size += folder_size
+        summary = {
+            "total_files": file_count,
+            "total_size": folder_size,
+            "average_chaos": round(chaos_total / file_count, 2) if file_count else 0.0,
+            "size_formatted": format_file_size(folder_size)
+        }
+        if self.keep_folder_summaries:
+            self.folder_summaries.append(summary)
+        return summary
+
+    def finish(self) -> None:
+        """Complete the subtrees still open after the last folder"""
+        self._completed(self._subtrees.finish())
+
+    def _completed(self, rollups: List[SubtreeRollup]) -> None:
+        for rollup in rollups:
+            self.leaderboards.add_subtree(rollup)
+            if self.keep_rollups:
+                self.rollups.append(rollup)
+            if self.on_rollup is not None:
+                self.on_rollup(rollup)
+
+    def merge(self, other: "ReportAccumulator") -> None:
+        """Fold another accumulator's totals in, as if its folders had been added here next.
+
+        Subtree rollups do not carry over: they depend on which folders sit
+        beneath which, so callers re-roll them from the combined order.
+        """
+        self._combine(other, 1)
+        for tag, items in other.category_items.items():
+            mine = self.category_items[tag]
+            mine.extend(items[:SUMMARY_ITEM_LIMIT - len(mine)])
+        self.leaderboards.merge(other.leaderboards)
+
+    def discard(self, other: "ReportAccumulator") -> None:
+        """Take back a merged accumulator's counters (its category items and leaderboard entries stay)"""
+        self._combine(other, -1)
+
+    def _combine(self, other: "ReportAccumulator", sign: int) -> None:
+        self.total_folders += sign * other.total_folders
+        self.total_files += sign * other.total_files
+        self.total_size += sign * other.total_size
+        for tag, count in other.tag_counts.items():
+            remaining = self.tag_counts.get(tag, 0) + sign * count
+            if remaining:
+                self.tag_counts[tag] = remaining
+            else:
+                self.tag_counts.pop(tag, None)
+        for tag, count in other.category_counts.items():
+            self.category_counts[tag] += sign * count
+
+def aggregate_report(structure: Iterable[InterpretedEntry]) -> ReportAccumulator:
+    """Collect every report statistic, including per-folder summaries, in one pass"""
+    stats = ReportAccumulator(keep_folder_summaries=True, keep_rollups=True)
+    for entry in structure:
+        stats.add(entry)
+    stats.finish()
+    return stats
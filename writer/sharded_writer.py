@@ -0,0 +1,189 @@
+# FileSage Sharded Writer
+# Splits huge reports into an index plus linked pages
+import os
+import re
+from typing import Dict, Iterable, List, Optional, TextIO, TypedDict, TYPE_CHECKING
+from scanner.interpreter import InterpretedEntry
+from scanner.metrics import METRICS
+from writer.markdown_writer import (format_folder_size, format_rollup_row, write_duplicates_section,
+                                    write_extensibility_forecast, write_folder_section, write_footer, write_header,
+                                    write_leaderboards, write_modular_summary, write_root_overview,
+                                    write_subtree_usage_header)
+from writer.report_stats import ReportAccumulator
+
+if TYPE_CHECKING:
+    from scanner.dedup import DuplicateFinder
+    from scanner.sampling import SampleEstimate
+    from writer.fragment_cache import FragmentCache
+
+SHARD_MODES = ("top_level", "count")
+DEFAULT_FOLDERS_PER_PAGE = 500
+DEFAULT_MAX_FILES_PER_FOLDER = 200
+DEFAULT_WRITE_BUFFER = 64 * 1024
+# Page of recursive subtree totals; folder pages are all named page-*, so it never collides
+SUBTREE_USAGE_PAGE = "subtree-usage.md"
+
+class PageInfo(TypedDict):
+    title: str
+    filename: str
+    first_path: str
+    last_path: str
+    folders: int
+    files: int
+    size: int
+
+def page_group(path: str) -> str:
+    """The top-level subtree a folder belongs to ('.' for the root itself)"""
+    return path.replace(os.sep, "/").split("/", 1)[0]
+
+def page_filename(number: int, group: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", group).strip("._") or "root"
+    return f"page-{number:04d}-{slug}.md"
+
+class _PageWriter:
+    """Writes page files one at a time, linking each to its neighbours and the index"""
+
+    def __init__(self, pages_dir: str, index_link: str, buffer_size: int,
+                 fragments: Optional["FragmentCache"] = None):
+        self.pages_dir = pages_dir
+        self.index_link = index_link
+        self.buffer_size = buffer_size
+        self.pages: List[PageInfo] = []
+        self._parts: Dict[str, int] = {}  # pages opened so far per group
+        self._file: Optional[TextIO] = None
+        self._write_section = fragments.write_section if fragments is not None else write_folder_section
+
+    def open(self, group: str) -> None:
+        previous = self.pages[-1] if self.pages else None
+        part = self._parts.get(group, 0)
+        self._parts[group] = part + 1
+        title = group if not part else f"{group} (part {part + 1})"
+        filename = page_filename(len(self.pages) + 1, group)
+        self.close(next_page=filename)
+        self.pages.append({"title": title, "filename": filename, "first_path": "", "last_path": "",
+                           "folders": 0, "files": 0, "size": 0})
+
+        # Bounded buffer: pages are flushed in fixed-size chunks however large they grow
+        self._file = open(os.path.join(self.pages_dir, filename), "w", encoding="utf-8",
+                          buffering=self.buffer_size)
+        display = "Root" if title == "." else title
+        self._file.write(f"# 📂 FileSage Report — `{display}`\n\n")
+        self._file.write(self._nav(previous["filename"] if previous else None, None, top=True))
+        self._file.write("---\n\n")
+
+    def write(self, entry: InterpretedEntry, stats: ReportAccumulator, max_files: Optional[int]) -> None:
+        page = self.pages[-1]
+        summary = stats.add(entry)
+        self._write_section(self._file, entry, summary, max_files)
+        if not page["folders"]:
+            page["first_path"] = entry["path"]
+        page["last_path"] = entry["path"]
+        page["folders"] += 1
+        page["files"] += summary["total_files"]
+        page["size"] += summary["total_size"]
+
+    def close(self, next_page: Optional[str] = None) -> None:
+        if self._file is None:
+            return
+        previous = self.pages[-2]["filename"] if len(self.pages) > 1 else None
+        self._file.write(self._nav(previous, next_page, top=False))
+        self._file.close()
+        self._file = None
+
+    def _nav(self, previous: Optional[str], next_page: Optional[str], top: bool) -> str:
+        links = []
+        if previous:
+            links.append(f"[⬅️ Previous]({previous})")
+        links.append(f"[🏛️ Index]({self.index_link})")
+        if next_page:
+            links.append(f"[Next ➡️]({next_page})")
+        return " | ".join(links) + "\n\n"
+
+def write_markdown_sharded(entries: Iterable[InterpretedEntry], output_path: str, shard_by: str = "top_level",
+                           folders_per_page: int = DEFAULT_FOLDERS_PER_PAGE,
+                           max_files_per_folder: Optional[int] = DEFAULT_MAX_FILES_PER_FOLDER,
+                           buffer_size: int = DEFAULT_WRITE_BUFFER,
+                           dedup: Optional["DuplicateFinder"] = None,
+                           fragments: Optional["FragmentCache"] = None,
+                           estimate: Optional["SampleEstimate"] = None) -> List[PageInfo]:
+    """Write the report as an index at ``output_path`` plus linked pages.
+
+    Pages go to a folder named after the index (``foo_structure.md`` gets
+    ``foo_structure/``). With ``shard_by="top_level"`` each top-level subtree
+    starts a new page; either way a page holds at most ``folders_per_page``
+    folders, so one giant subtree still splits. Folders listing more than
+    ``max_files_per_folder`` files show the first ones and a summary of the
+    rest. Entries are consumed one at a time, so this works on the streaming
+    pipeline; subtree usage rows are written to their own page as each
+    subtree completes, and the index (overview, page table, modular summary)
+    is written last. Returns the page table.
+    """
+    if shard_by not in SHARD_MODES:
+        raise ValueError(f"Unknown shard mode '{shard_by}', expected one of: {', '.join(SHARD_MODES)}")
+    folders_per_page = max(1, folders_per_page)
+
+    output_dir = os.path.dirname(output_path)
+    index_name = os.path.basename(output_path)
+    pages_name = os.path.splitext(index_name)[0]
+    pages_dir = os.path.join(output_dir, pages_name)
+    os.makedirs(pages_dir, exist_ok=True)
+
+    stats = ReportAccumulator()
+    writer = _PageWriter(pages_dir, f"../{index_name}", buffer_size, fragments)
+    current_group: Optional[str] = None
+    usage_path = os.path.join(pages_dir, SUBTREE_USAGE_PAGE)
+    with METRICS.timed("write"), open(usage_path, "w", encoding="utf-8", buffering=buffer_size) as usage:
+        usage.write("# 📂 FileSage Report — Subtree Usage\n\n")
+        usage.write(f"[🏛️ Index](../{index_name})\n\n---\n\n")
+        write_subtree_usage_header(usage)
+        stats.on_rollup = lambda rollup: usage.write(format_rollup_row(rollup))
+        try:
+            for entry in entries:
+                if shard_by == "top_level":
+                    group = page_group(entry["path"])
+                else:
+                    group = f"folders {stats.total_folders + 1}+"
+                if not writer.pages or writer.pages[-1]["folders"] >= folders_per_page or \
+                        (shard_by == "top_level" and group != current_group):
+                    writer.open(group)
+                    current_group = group
+                writer.write(entry, stats, max_files_per_folder)
+                if dedup is not None:
+                    dedup.add(entry)
+        finally:
+            writer.close()
+        stats.finish()
+        usage.write(f"\n[🏛️ Index](../{index_name})\n")
+
+        with open(output_path, "w", encoding="utf-8", buffering=buffer_size) as f:
+            write_header(f, estimate)
+            write_root_overview(f, stats, estimate)
+            write_leaderboards(f, stats)
+            write_page_index(f, writer.pages, pages_name, SUBTREE_USAGE_PAGE)
+            write_modular_summary(f, stats)
+            if dedup is not None:
+                write_duplicates_section(f, dedup.find())
+            write_extensibility_forecast(f)
+            write_footer(f)
+
+    if METRICS.enabled:
+        METRICS.record_write("write", stats.total_folders, stats.total_files, output_path,
+                             usage_path, *(os.path.join(pages_dir, page["filename"]) for page in writer.pages))
+    return writer.pages
+
+def write_page_index(f: TextIO, pages: List[PageInfo], pages_name: str, usage_page: Optional[str] = None) -> None:
+    """Write the table of report pages, linking the subtree usage page when there is one"""
+    f.write("## 📚 Report Pages\n\n")
+    if usage_page is not None:
+        f.write(f"Each page counts the files of its own folders; [🧮 Subtree Usage]({pages_name}/{usage_page}) "
+                f"weighs every folder with everything beneath it.\n\n")
+    f.write("| Page | Folders | Files | Size | Range |\n")
+    f.write("|------|---------|-------|------|-------|\n")
+    for page in pages:
+        title = "Root" if page["title"] == "." else page["title"]
+        span = f"`{page['first_path']}`"
+        if page["last_path"] != page["first_path"]:
+            span += f" … `{page['last_path']}`"
+        f.write(f"| [{title}]({pages_name}/{page['filename']}) | {page['folders']} | {page['files']} | "
+                f"{format_folder_size(page['size'])} | {span} |\n")
+    f.write("\n---\n\n")